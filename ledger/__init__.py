@@ -0,0 +1,4 @@
+from ledger import snapshot
+from ledger.store import export_table, get_store, import_table, query_table, read_summary, read_table, table_version
+from ledger.writer import append_rows, submit_rows, transaction
+from ledger import tables
@@ -0,0 +1,82 @@
+import argparse
+import os
+
+import pandas as pd
+
+from ledger import config, trace
+from ledger.archive import archive_path, close_year
+from ledger.normalize import problems
+from ledger.projects import PROJECT_FIELDS, PROJECT_KEY, legacy_projects
+from ledger.store import export_table, get_store, import_table, read_table
+from ledger.writer import file_lock
+
+# ใช้งาน: python -m ledger export [income expense ...]
+#        python -m ledger import [income expense ...]
+#        python -m ledger normalize [income expense ...]   (ทำข้อมูลเดิมในที่เก็บให้อยู่ในรูปมาตรฐาน ดู ledger.normalize)
+#        python -m ledger projects   (ย้ายข้อมูลระดับโครงการจากแถวรายรับเดิมไปทะเบียนโครงการ ดู ledger.projects)
+#        python -m ledger close-year --year 2567   (ปิดปีงบประมาณ ย้ายแถวของปีนั้นไป archive ดู ledger.archive)
+#        python -m ledger trace [--page 51] [--top 10]   (สรุปเวลาจากไฟล์ trace ของหน้าเว็บ ดู ledger.trace)
+parser = argparse.ArgumentParser(prog="python -m ledger")
+parser.add_argument("action", choices=["export", "import", "normalize", "projects", "close-year", "trace"])
+parser.add_argument("tables", nargs="*", metavar="table", help=", ".join(config.LEDGER_TABLES))
+parser.add_argument("--year", help="ปีงบประมาณ (พ.ศ.) สำหรับ close-year")
+parser.add_argument("--page", help="เฉพาะหน้าที่ชื่อมีข้อความนี้ สำหรับ trace")
+parser.add_argument("--top", type=int, default=10, help="จำนวน span ที่ช้าที่สุดต่อหน้า สำหรับ trace")
+args = parser.parse_args()
+for table in args.tables:
+    if table not in config.LEDGER_TABLES:
+        parser.error(f"ไม่รู้จักตาราง {table} (เลือกจาก {', '.join(config.LEDGER_TABLES)})")
+
+if args.action == "close-year":
+    if not args.year:
+        parser.error("close-year ต้องระบุ --year")
+    try:
+        moved = close_year(args.year)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    for table, count in moved.items():
+        print(f"close-year {args.year} {table}: ย้าย {count} แถวไป {archive_path(table, args.year)}")
+    raise SystemExit
+
+if args.action == "trace":
+    records = trace.read()
+    if not records:
+        parser.exit(1, f"ไม่พบข้อมูล trace ใน {config.TRACE_FILE or '(LEDGER_TRACE_FILE ว่าง ปิดการบันทึก)'}\n")
+    stats = trace.summarize(records, args.page)
+    with pd.option_context("display.width", 200, "display.max_colwidth", 60, "display.float_format", "{:,.1f}".format):
+        for page, rows in stats.groupby("page", sort=True):
+            print(f"== {page}")
+            print(rows.drop(columns="page").head(args.top).to_string(index=False))
+    raise SystemExit
+
+if args.action == "projects":
+    # เพิ่มโครงการที่ยังไม่มีในทะเบียน แล้วตัดคอลัมน์ระดับโครงการออกจากตารางรายรับ (รันซ้ำได้)
+    with file_lock(config.LOCK_FILE):
+        # ใช้ replace (ไม่ตรวจรูปแบบรหัส) เพราะเป็นข้อมูลเดิม แถวที่รหัสผิดรูปแบบแจ้งไว้ด้านล่าง
+        income, existing = read_table("income"), read_table("project")
+        moved = legacy_projects(income)
+        moved = moved[~moved[PROJECT_KEY].isin(existing[PROJECT_KEY])]
+        frames = [f for f in [existing, moved] if len(f)]
+        if frames:
+            get_store().replace("project", pd.concat(frames, ignore_index=True))
+        get_store().replace("income", income.drop(columns=[c for c in PROJECT_FIELDS if c in income.columns]))
+    print(f"projects: ย้าย {len(moved)} โครงการไป {config.PROJECT_FILE}")
+    for problem in problems(read_table("project", dtype=str)):
+        print(f"  ! {problem}")
+    raise SystemExit
+
+for table in args.tables or list(config.LEDGER_TABLES):
+    if args.action == "import" and not os.path.exists(config.LEDGER_TABLES[table]):
+        print(f"skip {table}: ไม่พบ {config.LEDGER_TABLES[table]}")
+        continue
+    if args.action == "export":
+        export_table(table)
+    elif args.action == "import":
+        import_table(table)
+    else:
+        get_store().replace(table, read_table(table))
+    print(f"{args.action} {table}: {config.LEDGER_TABLES[table]}")
+    if args.action != "export":
+        # แถวเดิมที่รหัสผิดรูปแบบยังเก็บไว้ตามเดิม แจ้งให้แก้ที่ต้นทาง
+        for problem in problems(read_table(table, dtype=str)):
+            print(f"  ! {problem}")
@@ -0,0 +1,36 @@
+def _key(project_code):
+    return str(project_code).strip().upper()
+
+
+class ARCodeIndex:
+    # index ซ้อน: รหัสโครงการวิจัย -> ar_code -> [(index แถว, รหัสค่าใช้จ่าย), ...]
+    # สร้างครั้งเดียวต่อเวอร์ชันของตาราง AR แทนการกรอง DataFrame ซ้ำทุกงวด
+    # index แถวคงไว้ตามตารางเดิม เพราะหน้าเว็บใช้เป็นส่วนหนึ่งของ key ของ widget
+
+    def __init__(self, ar_df):
+        self._projects = {}
+        columns = zip(ar_df.index, ar_df["รหัสโครงการวิจัย"], ar_df["ar_code"], ar_df["รหัสค่าใช้จ่าย"])
+        for idx, project, ar_code, spend in columns:
+            if not isinstance(ar_code, str) or not ar_code.strip():
+                continue
+            by_ar = self._projects.setdefault(_key(project), {})
+            by_ar.setdefault(ar_code, []).append((idx, spend))
+
+    def ar_codes(self, project_code):
+        return list(self._projects.get(_key(project_code), {}))
+
+    def rows(self, project_code, ar_code):
+        return self._projects.get(_key(project_code), {}).get(ar_code, [])
+
+    def spend_codes(self, project_code, ar_code):
+        return [spend for _, spend in self.rows(project_code, ar_code)]
+
+    def rows_for_spend_codes(self, project_code, spend_codes):
+        # เฉพาะแถวที่รหัสค่าใช้จ่ายอยู่ใน spend_codes จัดกลุ่มตาม ar_code (ลำดับตามตารางเดิม)
+        wanted = set(spend_codes)
+        result = {}
+        for ar_code, rows in self._projects.get(_key(project_code), {}).items():
+            matched = [(idx, spend) for idx, spend in rows if spend in wanted]
+            if matched:
+                result[ar_code] = matched
+        return result
@@ -0,0 +1,138 @@
+import glob
+import os
+import threading
+
+import pandas as pd
+
+from ledger import config, snapshot
+from ledger.projects import PROJECT_KEY, registry
+from ledger.store import filter_rows, get_store
+from ledger.writer import file_lock
+
+if snapshot.HAS_PARQUET:
+    import pyarrow.parquet
+
+# แบ่งข้อมูลตามปีงบประมาณของโครงการ (ทะเบียนโครงการ) ปีที่ปิดแล้วย้ายออกจากที่เก็บหลัก
+# ไปเป็นไฟล์ parquet บีบอัด ARCHIVE_DIR/<ตาราง>/<ปี>.parquet
+# แถวของโครงการเดียวกัน (รายรับ/รายจ่าย/เงินยืม/การคืนเงิน) อยู่ปีเดียวกันเสมอ
+# ที่เก็บหลักจึงมีแค่ปีที่ยังเปิด ขนาดไม่โตตามประวัติ ส่วนการอ่านปีเก่าอ่านเฉพาะไฟล์ของปีนั้น
+ARCHIVE_TABLES = ["income", "expense", "reserve", "reserve_refund"]
+COMPRESSION = "zstd"
+
+
+def current_fiscal_year(today=None):
+    # ปีงบประมาณ (พ.ศ.) เริ่ม 1 ตุลาคม
+    today = pd.Timestamp.today() if today is None else pd.Timestamp(today)
+    return today.year + 543 + (1 if today.month >= 10 else 0)
+
+
+def archive_path(table, year):
+    return os.path.join(config.ARCHIVE_DIR, table, f"{year}.parquet")
+
+
+def closed_years(table=None):
+    # ปีงบประมาณที่มีไฟล์ archive แล้ว (ของตารางที่ระบุ หรือของทุกตาราง)
+    tables = [table] if table else ARCHIVE_TABLES
+    years = set()
+    for name in tables:
+        for path in glob.glob(os.path.join(glob.escape(os.path.join(config.ARCHIVE_DIR, name)), "*.parquet")):
+            years.add(os.path.splitext(os.path.basename(path))[0])
+    return sorted(years)
+
+
+def version(table, years):
+    # ใช้เป็นส่วนหนึ่งของ key cache: เปลี่ยนเมื่อไฟล์ archive ของปีที่อ่านเปลี่ยน
+    return tuple((year, snapshot.file_stamp(archive_path(table, year))) for year in years)
+
+
+def read_archive(table, years, columns=None, where=None):
+    # อ่านแถวของปีที่ระบุ (เฉพาะคอลัมน์ที่ใช้) ค่าเป็นข้อความแบบเดียวกับ read_table(dtype=str)
+    frames = []
+    needed = None if columns is None else list(dict.fromkeys(list(columns) + list((where or {}).keys())))
+    for year in years:
+        path = archive_path(table, year)
+        if not os.path.exists(path):
+            continue
+        if needed is None:
+            frames.append(pd.read_parquet(path))
+        else:
+            available = pyarrow.parquet.read_schema(path).names
+            frames.append(pd.read_parquet(path, columns=[c for c in needed if c in available]))
+    if not frames:
+        return filter_rows(pd.DataFrame(columns=config.DEFAULT_COLUMNS[table]), columns, where)
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return filter_rows(df, columns, where)
+
+
+def _row_keys(df, columns):
+    # key ของแต่ละแถว: ค่าทุกคอลัมน์ (ข้อความ) + ลำดับที่ของแถวที่ค่าซ้ำกัน ใช้จับคู่แถวเดียวกันระหว่าง archive กับที่เก็บหลัก
+    text = df.reindex(columns=columns).astype(object)
+    hashed = pd.util.hash_pandas_object(text.where(text.notna(), "").astype(str), index=False)
+    return pd.MultiIndex.from_arrays([hashed.to_numpy(), hashed.groupby(hashed).cumcount().to_numpy()])
+
+
+def _write_archive(table, year, rows):
+    path = archive_path(table, year)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        # ปิดปีซ้ำหลังล้มกลางทาง แถวที่เขียนลง archive ไปแล้วแต่ยังไม่ถูกลบจากที่เก็บหลักจะมาอีกรอบ
+        # ตัดแถวเดียวกันที่มีอยู่แล้วออกก่อน (แถวที่ซ้ำกันนับตามจำนวนครั้ง) archive จึงมีแถวละครั้งเสมอ
+        existing = pd.read_parquet(path)
+        again = _row_keys(existing, rows.columns).isin(_row_keys(rows, rows.columns))
+        rows = pd.concat([existing[~again], rows], ignore_index=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        rows.astype(object).where(rows.notna(), None).to_parquet(tmp, index=False, compression=COMPRESSION)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def year_projects(year, store=None):
+    store = store or get_store()
+    projects = registry(store.read("project", dtype=str), store.read("income", dtype=str))
+    return set(projects.index[projects["ปีงบประมาณ"].astype(str) == str(year)])
+
+
+def _keep_registry(codes, store):
+    # โครงการเดิมที่ข้อมูลโครงการยังอยู่ในแถวรายรับ ต้องบันทึกลงทะเบียนก่อนย้ายแถวรายรับออก
+    # (ทะเบียนโครงการใช้ตัดสินว่าโครงการอยู่ปีไหน จึงต้องอยู่ในที่เก็บหลักเสมอ)
+    stored = store.read("project")
+    known = set(stored[PROJECT_KEY].dropna().astype(str)) if PROJECT_KEY in stored.columns else set()
+    missing = sorted(set(codes) - known)
+    if missing:
+        projects = registry(None, store.read("income"))
+        rows = projects.loc[[c for c in missing if c in projects.index]].reset_index()
+        store.replace("project", pd.concat([f for f in [stored, rows] if len(f)], ignore_index=True))
+
+
+def close_year(year, store=None, today=None):
+    # ปิดปีงบประมาณ: ย้ายแถวของโครงการในปีนั้นจากที่เก็บหลักไป archive คืน {ตาราง: จำนวนแถวที่ย้าย}
+    # เขียน archive ก่อนแล้วจึงลบออกจากที่เก็บหลัก (ถ้าล้มกลางทาง แถวจะอยู่ทั้งสองที่ ไม่หาย)
+    # เรียกซ้ำได้: รอบถัดไปย้ายแถวที่ยังค้างในที่เก็บหลักโดยไม่เขียนซ้ำใน archive (ดู _write_archive)
+    if not snapshot.HAS_PARQUET:
+        raise RuntimeError("ต้องติดตั้ง pyarrow เพื่อสร้าง archive")
+    year = str(year)
+    if int(year) >= current_fiscal_year(today):
+        raise ValueError(f"ปีงบประมาณ {year} ยังไม่สิ้นสุด ปิดได้เฉพาะปีที่ผ่านมาแล้ว")
+    store = store or get_store()
+    moved = {}
+    with file_lock(config.LOCK_FILE):
+        codes = year_projects(year, store)
+        if not codes:
+            raise ValueError(f"ไม่พบโครงการของปีงบประมาณ {year} ในทะเบียนโครงการ")
+        _keep_registry(codes, store)
+        for table in ARCHIVE_TABLES:
+            text = store.read(table, dtype=str)
+            if PROJECT_KEY not in text.columns:
+                continue
+            inside = text[PROJECT_KEY].isin(codes).to_numpy()
+            if not inside.any():
+                continue
+            _write_archive(table, year, text[inside])
+            raw = store.read(table)
+            store.replace(table, raw[~inside].reset_index(drop=True))
+            moved[table] = int(inside.sum())
+    return moved
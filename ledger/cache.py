@@ -0,0 +1,190 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ledger import config, trace
+
+# cache กลางของ process: ตาราง/ยอดสรุป/index ที่หน้าเว็บใช้ร่วมกันทุก session (เรียกผ่าน cached)
+# - 1 key เก็บได้ 1 เวอร์ชัน ถ้าเวอร์ชันเปลี่ยนจะสร้างใหม่แทนที่ของเดิม
+# - เก็บสถิติต่อ key: hit/miss, เวลาสร้าง, ขนาดในหน่วยความจำ (ประมาณ) ดูได้ที่ stats() และหน้า admin
+# - ขนาดรวมเกิน config.CACHE_MAX_BYTES จะทิ้งรายการที่ไม่ได้ใช้นานที่สุด (LRU) จนกว่าจะอยู่ในงบ
+#   รายการที่ถูกทิ้งแล้วต้องสร้างใหม่ภายหลังนับเป็น rebuilds (ถ้าสูงแปลว่างบน้อยเกินไป cache thrash)
+# - สถิติของ key ที่ไม่อยู่ใน cache แล้วเก็บไว้ไม่เกิน STATS_LIMIT รายการ (LRU เช่นกัน)
+#   key ที่เปลี่ยนไปเรื่อย ๆ (เช่น query ตามช่วงวันที่) จึงไม่ทำให้ _stats/_locks โตไม่สิ้นสุด
+STATS_LIMIT = 1000
+
+_entries = OrderedDict()  # key -> (version, value, bytes) ลำดับจากใช้นานที่สุด -> ล่าสุด
+_stats = OrderedDict()  # key -> สถิติ ลำดับจากใช้นานที่สุด -> ล่าสุด
+_locks = {}
+_lock = threading.Lock()
+_total_bytes = 0
+
+
+def _stat(key):
+    stat = _stats.get(key)
+    if stat is None:
+        stat = _stats[key] = {
+            "hits": 0, "misses": 0, "evictions": 0, "rebuilds": 0,
+            "build_ms": 0.0, "last_build_ms": 0.0, "bytes": 0, "last_used": None, "evicted": False,
+        }
+        _trim_stats()
+    else:
+        _stats.move_to_end(key)
+    return stat
+
+
+def _drop_lock(key):
+    # ล็อกของ key ที่ไม่อยู่ใน cache ไม่จำเป็นแล้ว (ถ้ามี thread กำลังสร้างอยู่ปล่อยไว้ก่อน)
+    lock = _locks.get(key)
+    if lock is not None and not lock.locked():
+        del _locks[key]
+
+
+def _trim_stats():
+    # ทิ้งสถิติ (และล็อก) ของ key ที่ไม่อยู่ใน cache ที่ไม่ได้ใช้นานที่สุด จนเหลือไม่เกิน STATS_LIMIT
+    extra = len(_stats) - len(_entries) - STATS_LIMIT
+    if extra <= 0:
+        return
+    for key in [k for k in _stats if k not in _entries][:extra]:
+        del _stats[key]
+        _drop_lock(key)
+
+
+def _hit(key):
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+        stat = _stat(key)
+        stat["hits"] += 1
+        stat["last_used"] = time.time()
+
+
+def _miss(key):
+    with _lock:
+        stat = _stat(key)
+        stat["misses"] += 1
+        if stat["evicted"]:
+            stat["rebuilds"] += 1
+            stat["evicted"] = False
+
+
+def _put(key, version, value, size, build_ms):
+    global _total_bytes
+    with _lock:
+        previous = _entries.pop(key, None)
+        if previous is not None:
+            _total_bytes -= previous[2]
+        _entries[key] = (version, value, size)
+        _total_bytes += size
+        stat = _stat(key)
+        stat["build_ms"] += build_ms
+        stat["last_build_ms"] = build_ms
+        stat["bytes"] = size
+        stat["last_used"] = time.time()
+        # รายการที่เพิ่งสร้างอยู่ท้ายสุด จึงไม่ถูกทิ้งเอง (รายการเดียวที่ใหญ่กว่างบยังเก็บไว้)
+        while _total_bytes > config.CACHE_MAX_BYTES and len(_entries) > 1:
+            old_key, (_, _, old_size) = _entries.popitem(last=False)
+            _total_bytes -= old_size
+            old_stat = _stat(old_key)
+            old_stat["evictions"] += 1
+            old_stat["evicted"] = True
+            _drop_lock(old_key)
+
+
+def cached(key, version, build):
+    # คืนผลของ build() ที่เก็บไว้ของ key นี้ ถ้า version ไม่ตรงกับที่เก็บไว้ (หรือถูกทิ้งไปแล้ว) จะสร้างใหม่
+    # ล็อกแยกตาม key: ตารางเดียวกันไม่ถูกอ่านซ้ำพร้อมกัน แต่ต่างตารางอ่านคู่ขนานได้
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == version:
+        _hit(key)
+        return entry[1]
+    with _lock:
+        key_lock = _locks.setdefault(key, threading.Lock())
+    with key_lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == version:
+            _hit(key)
+            return entry[1]
+        _miss(key)
+        start = time.perf_counter()
+        with trace.span("build", key=":".join(str(k) for k in key[:2])):
+            value = build()
+        build_ms = (time.perf_counter() - start) * 1000
+        _put(key, version, value, sizeof(value), build_ms)
+    return value
+
+
+def sizeof(value, _seen=None):
+    # ขนาดโดยประมาณ (ไบต์) ของสิ่งที่เก็บใน cache: DataFrame/array ใช้ขนาดข้อมูลจริง
+    # dict/list/object ของ index นับรวมสมาชิกข้างใน (ของชิ้นเดียวกันนับครั้งเดียว)
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(sizeof(k, seen) + sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(sizeof(item, seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return size + sizeof(vars(value), seen)
+    return size
+
+
+def clear():
+    # ทิ้งทุกรายการ (สถิติยังเก็บไว้)
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _total_bytes = 0
+        for key in list(_locks):
+            _drop_lock(key)
+        _trim_stats()
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def usage():
+    # (ขนาดรวมที่เก็บอยู่, งบ, จำนวนรายการ)
+    return _total_bytes, config.CACHE_MAX_BYTES, len(_entries)
+
+
+def stats():
+    # สถิติของทุก key ที่เคยใช้ เรียงตามขนาดที่เก็บอยู่ (รายการที่ถูกทิ้งแล้ว cached = False)
+    now = time.time()
+    with _lock:
+        rows = [
+            {
+                "key": ":".join(str(k) for k in key),
+                "cached": key in _entries,
+                "hits": stat["hits"],
+                "misses": stat["misses"],
+                "hit_rate": stat["hits"] / (stat["hits"] + stat["misses"]) if stat["hits"] + stat["misses"] else 0.0,
+                "evictions": stat["evictions"],
+                "rebuilds": stat["rebuilds"],
+                "last_build_ms": stat["last_build_ms"],
+                "build_ms": stat["build_ms"],
+                "mb": stat["bytes"] / 2 ** 20 if key in _entries else 0.0,
+                "idle_s": None if stat["last_used"] is None else now - stat["last_used"],
+            }
+            for key, stat in _stats.items()
+        ]
+    columns = ["key", "cached", "hits", "misses", "hit_rate", "evictions", "rebuilds",
+               "last_build_ms", "build_ms", "mb", "idle_s"]
+    df = pd.DataFrame(rows, columns=columns)
+    return df.sort_values(["mb", "build_ms"], ascending=False, ignore_index=True)
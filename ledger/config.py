@@ -0,0 +1,76 @@
+import os
+
+TABLE_DIR = "table"
+
+INCOME_FILE = os.path.join(TABLE_DIR, "income_data.xlsx")
+EXPEND_FILE = os.path.join(TABLE_DIR, "expend_data.xlsx")
+RESERVE_FILE = os.path.join(TABLE_DIR, "reserve_payment.xlsx")
+RESERVE_REFUND_FILE = os.path.join(TABLE_DIR, "reserve_refund.xlsx")
+PROJECT_FILE = os.path.join(TABLE_DIR, "project_data.xlsx")
+AR_FILE = os.path.join(TABLE_DIR, "ar_code.xlsx")
+SPEND_LOOKUP_FILE = os.path.join(TABLE_DIR, "unique_spend_code.csv")
+FUNDING_SOURCE_FILE = os.path.join(TABLE_DIR, "funding_source.xlsx")
+FISCAL_YEAR_FILE = os.path.join(TABLE_DIR, "fiscal_year.xlsx")
+
+# backend สำหรับเก็บข้อมูล: "sqlite" (ค่าเริ่มต้น) หรือ "excel" (แบบเดิม เขียนทับทั้งไฟล์)
+BACKEND = os.environ.get("LEDGER_BACKEND", "sqlite")
+DB_FILE = os.environ.get("LEDGER_DB", os.path.join(TABLE_DIR, "ledger.db"))
+# advisory lock ของการบันทึก (ใช้ร่วมกันทุก process ที่เขียนโฟลเดอร์ table เดียวกัน)
+LOCK_FILE = os.environ.get("LEDGER_LOCK", os.path.join(TABLE_DIR, ".ledger.lock"))
+
+# snapshot แบบ parquet ของไฟล์ xlsx (สร้างใหม่เมื่อไฟล์ต้นทางเปลี่ยน)
+SNAPSHOT_DIR = os.environ.get("LEDGER_SNAPSHOT_DIR", os.path.join(TABLE_DIR, ".snapshots"))
+
+# โหลดหลายตารางพร้อมกัน (ledger.tables.load): จำนวน thread และจำนวน process สำหรับแปลงไฟล์ xlsx
+# ไฟล์ xlsx ที่เล็กกว่า PARSE_PROCESS_MIN_BYTES แปลงใน process เดิม (เร็วกว่าส่งข้าม process)
+LOAD_THREADS = int(os.environ.get("LEDGER_LOAD_THREADS", "8"))
+PARSE_PROCESSES = int(os.environ.get("LEDGER_PARSE_PROCESSES", str(min(4, os.cpu_count() or 1))))
+PARSE_PROCESS_MIN_BYTES = int(os.environ.get("LEDGER_PARSE_PROCESS_MIN_BYTES", str(1_000_000)))
+
+# ข้อมูลของปีงบประมาณที่ปิดแล้ว แยกเป็นไฟล์ parquet (บีบอัด) ต่อตารางต่อปี ดู ledger.archive
+ARCHIVE_DIR = os.environ.get("LEDGER_ARCHIVE_DIR", os.path.join(TABLE_DIR, "archive"))
+
+# บันทึกเวลาทำงานของแต่ละหน้า (ledger.trace) เป็น JSON lines ตั้งเป็น "" เพื่อปิด
+# ไฟล์ใหญ่เกิน TRACE_MAX_BYTES จะถูกย้ายไปเป็น <ไฟล์>.1 (เก็บไว้ 1 รุ่น)
+# แผงแสดงเวลาใน sidebar เปิดด้วย LEDGER_DEBUG_PANEL=1 หรือเพิ่ม ?debug=1 ใน URL
+TRACE_FILE = os.environ.get("LEDGER_TRACE_FILE", os.path.join(TABLE_DIR, ".trace.jsonl"))
+TRACE_MAX_BYTES = int(os.environ.get("LEDGER_TRACE_MAX_BYTES", str(20_000_000)))
+DEBUG_PANEL = os.environ.get("LEDGER_DEBUG_PANEL", "") == "1"
+
+# หน่วยความจำรวมของ cache ตาราง/index ที่ใช้ร่วมกันทั้ง process (ledger.cache) เกินแล้วทิ้งรายการที่ไม่ได้ใช้นานที่สุด
+CACHE_MAX_BYTES = int(float(os.environ.get("LEDGER_CACHE_MB", "1024")) * 2 ** 20)
+
+# ตารางที่มีการเขียนข้อมูลจากหน้าเว็บ -> ไฟล์ xlsx ต้นทาง (ใช้ import/export)
+LEDGER_TABLES = {
+    "income": INCOME_FILE,
+    "expense": EXPEND_FILE,
+    "reserve": RESERVE_FILE,
+    "reserve_refund": RESERVE_REFUND_FILE,
+    "project": PROJECT_FILE,
+    "ar": AR_FILE,
+}
+
+DEFAULT_COLUMNS = {
+    "income": [
+        "วันที่กรอกข้อมูล", "รหัสโครงการวิจัย", "ประเภททุน", "งวด", "ar_code", "รหัสค่าใช้จ่าย", "จำนวนเงิน",
+    ],
+    "expense": [
+        "วันที่กรอกข้อมูล", "รหัสโครงการวิจัย", "ประเภททุน", "ประเภทการจ่ายเงิน", "วันที่เบิกจ่าย",
+        "รหัสกิจกรรม", "งวด", "ar_code", "รหัสค่าใช้จ่าย", "จำนวนเงิน",
+    ],
+    "reserve": [
+        "วันที่กรอกข้อมูล", "รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย", "วันที่ยืม",
+        "จำนวนเงิน", "วันที่ต้องคืน", "วันที่คืนเงิน", "เงินที่คืน", "คงเหลือ", "สถานะ",
+    ],
+    # event การคืนเงินยืม (ดู ledger.reserve)
+    "reserve_refund": [
+        "วันที่กรอกข้อมูล", "รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย", "วันที่ยืม",
+        "จำนวนเงิน", "วันที่ต้องคืน", "วันที่คืนเงิน", "เงินที่คืน",
+    ],
+    "ar": ["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย"],
+    # ทะเบียนโครงการ 1 แถวต่อโครงการ (ดู ledger.projects)
+    "project": [
+        "วันที่กรอกข้อมูล", "รหัสโครงการวิจัย", "ปีงบประมาณ", "รหัสงบประมาณ", "วันที่เซนสัญญา",
+        "ระยะเวลาดำเนินโครงการ (เดือน)", "รหัสสัญญา",
+    ],
+}
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from ledger.spend_codes import DETAIL_COLUMNS
+
+# ทำข้อมูลให้อยู่ในรูปมาตรฐานครั้งเดียวตอนบันทึก/นำเข้า (ledger.store) แทนการ strip ทุกครั้งที่อ่าน
+# - ชื่อคอลัมน์: ตัด BOM และช่องว่างหัวท้าย
+# - ค่าข้อความ: ตัด BOM และช่องว่างหัวท้าย ข้อความว่างเป็นค่าว่าง (NaN)
+# - รหัส (CODE_COLUMNS): ตัวพิมพ์ใหญ่
+# - ไม่เก็บคอลัมน์ที่หาได้จากตารางอ้างอิง (DERIVED_COLUMNS) เช่น รายละเอียดของรหัสค่าใช้จ่าย
+# - ตรวจรูปแบบรหัส (PATTERNS) ของแถวที่บันทึกใหม่ ถ้าไม่ตรงจะไม่บันทึก
+BOM = "\ufeff"
+CODE_COLUMNS = ["รหัสโครงการวิจัย", "ar_code", "รหัสสัญญา", "รหัสค่าใช้จ่าย", "รหัสงบประมาณ"]
+PATTERNS = {
+    "รหัสโครงการวิจัย": r"E\d{4}_\d{3}",
+    "รหัสสัญญา": r"CHR\d{3}/\d{4}",
+    "รหัสกิจกรรม": r"\d{13}",
+}
+DERIVED_COLUMNS = {"income": DETAIL_COLUMNS, "expense": DETAIL_COLUMNS}
+
+
+def _text(values, upper):
+    # ทำทีละค่าที่ไม่ซ้ำ (ข้อความในตารางบัญชีซ้ำกันมาก) แล้วกระจายกลับ
+    codes, uniques = pd.factorize(values.astype(object), use_na_sentinel=False)
+    cleaned = []
+    for value in uniques:
+        if isinstance(value, str):
+            value = value.replace(BOM, "").strip()
+            value = value.upper() if upper else value
+            value = value or None
+        cleaned.append(value)
+    return pd.Series(pd.Series(cleaned, dtype=object).to_numpy()[codes], index=values.index, dtype=object)
+
+
+def clean_columns(df):
+    df.columns = df.columns.astype(str).str.replace(BOM, "", regex=False).str.strip()
+    return df
+
+
+def normalize(df, table=None):
+    # คืน DataFrame ใหม่ที่อยู่ในรูปมาตรฐาน (ไม่แก้ df เดิม)
+    df = clean_columns(df.copy())
+    df = df.drop(columns=[c for c in DERIVED_COLUMNS.get(table, []) if c in df.columns])
+    for col in df.columns:
+        if not (pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])):
+            continue
+        df[col] = _text(df[col], col in CODE_COLUMNS)
+    return df
+
+
+def problems(df):
+    # รายการรหัสที่รูปแบบไม่ถูกต้อง (df ต้องผ่าน normalize แล้ว)
+    found = []
+    for col, pattern in PATTERNS.items():
+        if col not in df.columns:
+            continue
+        values = df[col].dropna().astype(str)
+        bad = values[~values.str.fullmatch(pattern)]
+        for value in bad.unique():
+            found.append(f"{col} ไม่ถูกต้อง: {value}")
+    return found
+
+
+def validate(df, table):
+    found = problems(df)
+    if found:
+        raise ValueError(f"ข้อมูล {table} ไม่ถูกต้อง: " + ", ".join(found))
+    return df
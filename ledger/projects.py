@@ -0,0 +1,58 @@
+import pandas as pd
+
+# ทะเบียนโครงการ: ข้อมูลระดับโครงการ (สัญญา/ปีงบ/แหล่งทุน/ระยะเวลา) เก็บ 1 แถวต่อโครงการในตาราง project
+# แทนการคัดลอกซ้ำในทุกแถวของตารางรายรับ ค้นด้วย index รหัสโครงการวิจัย
+PROJECT_KEY = "รหัสโครงการวิจัย"
+PROJECT_FIELDS = ["ปีงบประมาณ", "รหัสงบประมาณ", "วันที่เซนสัญญา", "ระยะเวลาดำเนินโครงการ (เดือน)", "รหัสสัญญา"]
+PROJECT_COLUMNS = ["วันที่กรอกข้อมูล", PROJECT_KEY] + PROJECT_FIELDS
+
+
+def legacy_projects(income_df):
+    # ข้อมูลโครงการจากแถวรายรับแบบเดิมที่ยังมีคอลัมน์ระดับโครงการ (แถวแรกของแต่ละโครงการ เหมือน iloc[0] เดิม)
+    fields = [c for c in PROJECT_FIELDS if c in income_df.columns]
+    if not fields or PROJECT_KEY not in income_df.columns:
+        return pd.DataFrame(columns=PROJECT_COLUMNS)
+    rows = income_df[income_df[PROJECT_KEY].notna() & income_df[fields].notna().any(axis=1)]
+    rows = rows.drop_duplicates(subset=PROJECT_KEY, keep="first")
+    return rows.reindex(columns=PROJECT_COLUMNS).reset_index(drop=True)
+
+
+def registry(project_df, income_df=None):
+    # 1 แถวต่อโครงการ index = รหัสโครงการวิจัย
+    # แถวในตาราง project ที่บันทึกทีหลังแทนของเดิม โครงการที่ยังไม่ย้ายมาใช้ข้อมูลจากแถวรายรับเดิม
+    frames = [f for f in [legacy_projects(income_df) if income_df is not None else None, project_df] if f is not None and len(f)]
+    if not frames:
+        return pd.DataFrame(columns=PROJECT_COLUMNS).set_index(PROJECT_KEY)
+    merged = pd.concat([f.reindex(columns=PROJECT_COLUMNS) for f in frames], ignore_index=True)
+    merged = merged[merged[PROJECT_KEY].notna()].drop_duplicates(subset=PROJECT_KEY, keep="last")
+    merged[PROJECT_KEY] = merged[PROJECT_KEY].astype(str)
+    if not merged[PROJECT_KEY].is_unique:
+        duplicated = sorted(merged.loc[merged[PROJECT_KEY].duplicated(), PROJECT_KEY].unique())
+        raise ValueError(f"รหัสโครงการวิจัยซ้ำในทะเบียนโครงการ: {', '.join(duplicated)}")
+    return merged.set_index(PROJECT_KEY).sort_index()
+
+
+# ลำดับคอลัมน์ของตารางรายรับแบบเดิม (ก่อนย้ายข้อมูลระดับโครงการไปทะเบียนโครงการ) ใช้จัดคอลัมน์หน้าตารางรายรับ
+INCOME_VIEW_ORDER = [
+    "วันที่กรอกข้อมูล", "ปีงบประมาณ", PROJECT_KEY, "ประเภททุน", "รหัสงบประมาณ", "วันที่เซนสัญญา",
+    "ระยะเวลาดำเนินโครงการ (เดือน)", "รหัสสัญญา", "งวด", "ar_code", "รหัสค่าใช้จ่าย", "หมวดรายจ่าย", "รายการ",
+    "ประเภทค่าใช้จ่าย", "จำนวนเงิน",
+]
+
+
+def with_projects(df, registry_df):
+    # เติมข้อมูลระดับโครงการ (PROJECT_FIELDS) จากทะเบียนโครงการให้ทุกแถว ตามรหัสโครงการวิจัย
+    # แถวรายรับแบบเดิมที่มีค่าอยู่แล้วใช้ค่าของแถวนั้น คอลัมน์เรียงตามตารางรายรับแบบเดิม
+    if PROJECT_KEY not in df.columns:
+        return df
+    keys = df[PROJECT_KEY].astype(str)
+    result = df.copy()
+    for col in PROJECT_FIELDS:
+        source = registry_df[col] if col in registry_df.columns else pd.Series(dtype=object)
+        values = pd.Series(source.astype(object).reindex(keys).to_numpy(), index=df.index)
+        if col in df.columns:
+            values = df[col].astype(object).where(df[col].notna(), values)
+        dtype = "category" if isinstance(source.dtype, pd.CategoricalDtype) else source.dtype
+        result[col] = values.astype(dtype) if len(source) else values
+    order = [c for c in INCOME_VIEW_ORDER if c in result.columns]
+    return result[order + [c for c in result.columns if c not in order]]
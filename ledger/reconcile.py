@@ -0,0 +1,41 @@
+import pandas as pd
+
+from ledger.summaries import AMOUNT, COUNT
+
+RECONCILE_KEYS = ["ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย", "งวด"]
+ACTUAL_EXPENSE = "ค่าใช้จ่ายจริง"
+DISBURSEMENT_COLUMNS = ["วันที่เบิกจ่าย", "รหัสกิจกรรม", "ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย", "งวด", AMOUNT]
+
+
+def _side(summary, where, label):
+    # รวมยอดฝั่งเดียวให้เหลือ 1 แถวต่อ key ก่อน join (กัน many-to-many)
+    for col, value in where.items():
+        summary = summary[summary[col] == value]
+    grouped = summary.groupby(RECONCILE_KEYS, as_index=False)[[AMOUNT, COUNT]].sum()
+    return grouped.rename(columns={AMOUNT: label, COUNT: f"จำนวนรายการ{label}"})
+
+
+def reconcile(income_summary, expend_summary, project_code, payment_type=ACTUAL_EXPENSE):
+    # รายรับเทียบรายจ่ายของโครงการ ระดับ (ประเภททุน, ar_code, รหัสค่าใช้จ่าย, งวด)
+    # ทั้งสองฝั่งรวมยอดจากตารางสรุปก่อน จึง join แบบ one-to-one ได้ ผลรวมไม่ถูกนับซ้ำ
+    income = _side(income_summary, {"รหัสโครงการวิจัย": project_code}, "รายรับ")
+    expend = _side(expend_summary, {"รหัสโครงการวิจัย": project_code, "ประเภทการจ่ายเงิน": payment_type}, "รายจ่าย")
+    merged = income.merge(expend, on=RECONCILE_KEYS, how="outer", validate="one_to_one")
+    for col in ["รายรับ", "รายจ่าย", "จำนวนรายการรายรับ", "จำนวนรายการรายจ่าย"]:
+        merged[col] = merged[col].fillna(0)
+    merged["คงเหลือ"] = merged["รายรับ"] - merged["รายจ่าย"]
+    merged["งวด"] = merged["งวด"].astype(int)
+    return merged.sort_values(["งวด", "ar_code", "รหัสค่าใช้จ่าย"], kind="stable").reset_index(drop=True)
+
+
+def period_totals(reconciled):
+    return reconciled.groupby("งวด")[["รายรับ", "รายจ่าย", "คงเหลือ"]].sum()
+
+
+def disbursements(expend_df, project_code, period=None, payment_type=ACTUAL_EXPENSE):
+    # รายการเบิกจ่ายรายครั้ง (drill-down) แยกจากตารางกระทบยอด
+    rows = expend_df[(expend_df["รหัสโครงการวิจัย"] == project_code) & (expend_df["ประเภทการจ่ายเงิน"] == payment_type)]
+    if period is not None:
+        rows = rows[pd.to_numeric(rows["งวด"], errors="coerce") == period]
+    return rows[[c for c in DISBURSEMENT_COLUMNS if c in rows.columns]]
+
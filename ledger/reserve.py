@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# เงินยืมทดรองจ่าย: ตาราง reserve เก็บสัญญายืม (1 แถวต่อการยืม)
+# การคืนเงินแต่ละครั้งเป็น event เล็ก ๆ ในตาราง reserve_refund (เพิ่มแถวเดียว ไม่คัดลอกแถวยืม)
+# ยอดคืน/คงเหลือ/สถานะ คำนวณจากทั้งสองตารางแบบ vectorized ทีเดียวทั้ง portfolio
+LOAN_KEYS = ["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย", "วันที่ยืม", "จำนวนเงิน", "วันที่ต้องคืน"]
+REFUND_COLUMNS = ["วันที่กรอกข้อมูล"] + LOAN_KEYS + ["วันที่คืนเงิน", "เงินที่คืน"]
+PORTFOLIO_COLUMNS = LOAN_KEYS + ["วันที่คืนเงิน", "เงินที่คืน", "คงเหลือ", "สถานะ"]
+
+STATUS_OPEN = "ยังไม่คืน"
+STATUS_OVERDUE = "เลยกำหนด"
+STATUS_CLOSED = "ปิดบัญชี"
+STATUS_UNKNOWN = "ไม่ทราบสถานะ"
+
+
+def _parse_dates(values):
+    return pd.to_datetime(values, errors="coerce", format="ISO8601")
+
+
+def _parse_amounts(values):
+    return pd.to_numeric(values.astype(str).str.replace(",", ""), errors="coerce").astype(float)
+
+
+def _distinct(series, convert):
+    # แปลงเฉพาะค่าที่ไม่ซ้ำแล้วกระจายกลับ (วันที่/จำนวนเงินในตารางเงินยืมซ้ำกันเยอะ)
+    codes, uniques = pd.factorize(pd.Series(series, dtype=object), use_na_sentinel=False)
+    return pd.Series(convert(pd.Series(uniques, dtype=object)).to_numpy()[codes], index=series.index)
+
+
+def _dates(series):
+    return _distinct(series, _parse_dates)
+
+
+def _amounts(series):
+    return _distinct(series, _parse_amounts)
+
+
+def _keys(df):
+    # key ของการยืมในรูปข้อความมาตรฐาน (วันที่/จำนวนเงินแปลงก่อน) ใช้ join ระหว่างสองตาราง
+    # ได้ค่าเดียวกันไม่ว่าอ่านมาเป็นข้อความ ตัวเลข หรือ Timestamp
+    # วันที่ใช้รูปแบบตายตัว (astype(str) ตัดเวลาทิ้งเมื่อทั้งชุดเป็นเที่ยงคืน ชุดที่ปนวันที่มีเวลาจะได้ key ไม่ตรงกัน)
+    keys = df.reindex(columns=LOAN_KEYS)
+    for col in ["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย"]:
+        keys[col] = _distinct(keys[col], lambda u: u.fillna("").astype(str).str.strip())
+    for col in ["วันที่ยืม", "วันที่ต้องคืน"]:
+        keys[col] = _distinct(keys[col], lambda u: _parse_dates(u).dt.strftime("%Y-%m-%d %H:%M:%S").fillna(""))
+    keys["จำนวนเงิน"] = _distinct(keys["จำนวนเงิน"], lambda u: _parse_amounts(u).astype(str).replace("nan", ""))
+    return keys
+
+
+def _refund_totals(frame, amounts, dates):
+    totals = _keys(frame).assign(เงินที่คืน=amounts, วันที่คืนเงิน=dates)
+    return totals.groupby(LOAN_KEYS, sort=False).agg({"เงินที่คืน": "sum", "วันที่คืนเงิน": "max"})
+
+
+def portfolio(reserve_df, refund_df, today=None):
+    # สถานะเงินยืมทุกสัญญา: 1 แถวต่อ LOAN_KEYS
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    loans = _keys(reserve_df).drop_duplicates(ignore_index=True)
+
+    # แถวเดิมใน reserve ที่มีเงินที่คืน > 0 คือสำเนาแถวยืมที่บันทึกการคืนแบบเก่า นับเป็น event เหมือนเดิม (รวมยอด)
+    legacy_amount = _amounts(reserve_df.get("เงินที่คืน", pd.Series(index=reserve_df.index, dtype=object))).fillna(0.0)
+    is_legacy = legacy_amount.to_numpy() > 0
+    legacy = reserve_df[is_legacy]
+    legacy_dates = _dates(legacy["วันที่คืนเงิน"]) if "วันที่คืนเงิน" in legacy else pd.NaT
+    refunds = [_refund_totals(legacy, legacy_amount[is_legacy], legacy_dates)]
+    if refund_df is not None and len(refund_df):
+        refunds.append(_refund_totals(refund_df, _amounts(refund_df["เงินที่คืน"]).fillna(0.0), _dates(refund_df["วันที่คืนเงิน"])))
+    refunded = pd.concat(refunds).groupby(level=LOAN_KEYS, sort=False).agg({"เงินที่คืน": "sum", "วันที่คืนเงิน": "max"})
+    result = loans.merge(refunded, left_on=LOAN_KEYS, right_index=True, how="left")
+
+    amount = _amounts(result["จำนวนเงิน"]).fillna(0.0).to_numpy()
+    refund = result["เงินที่คืน"].fillna(0.0).to_numpy(dtype=float)
+    remain = np.maximum(amount - refund, 0.0)
+    due = _dates(result["วันที่ต้องคืน"])
+    has_due = due.notna().to_numpy()
+    due = due.to_numpy()
+    status = np.select(
+        [(remain != 0) & has_due & (due > today), (remain != 0) & has_due & (due < today), remain == 0],
+        [STATUS_OPEN, STATUS_OVERDUE, STATUS_CLOSED],
+        default=STATUS_UNKNOWN,
+    )
+
+    result["จำนวนเงิน"] = amount
+    result["เงินที่คืน"] = refund
+    result["คงเหลือ"] = remain
+    result["สถานะ"] = status
+    result["วันที่ยืม"] = _dates(result["วันที่ยืม"])
+    result["วันที่ต้องคืน"] = due
+    return result[PORTFOLIO_COLUMNS]
+
+
+def refund_event(loan, amount, return_date, entry_time=None):
+    # แถว event การคืนเงิน 1 ครั้ง จาก loan (แถวของ portfolio หรือ reserve)
+    key = _keys(pd.DataFrame([loan])).iloc[0]
+    event = {"วันที่กรอกข้อมูล": entry_time or pd.Timestamp.now(), **key.to_dict()}
+    event["วันที่คืนเงิน"] = pd.to_datetime(return_date)
+    event["เงินที่คืน"] = float(amount)
+    return pd.DataFrame([event], columns=REFUND_COLUMNS)
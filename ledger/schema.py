@@ -0,0 +1,96 @@
+import pandas as pd
+
+# ชนิดข้อมูลของแต่ละคอลัมน์ในตารางบัญชี แปลงครั้งเดียวตอนโหลด (ledger.tables)
+# หน้าเว็บได้ DataFrame ที่พร้อมใช้ ไม่ต้อง to_numeric/to_datetime/astype(int) ซ้ำทุกครั้ง
+MONEY = "money"        # float64 (ตัด , คั่นหลักพันออก)
+INTEGER = "integer"    # Int64 (งวด, จำนวนเดือน) ว่างได้
+DATE = "date"          # datetime64
+CODE = "code"          # category: รหัส/ประเภทที่ค่าซ้ำกันมาก เก็บเป็นเลขอ้างอิงแทนข้อความเต็ม
+TEXT = "text"          # ข้อความตามเดิม
+
+_COMMON = {
+    "วันที่กรอกข้อมูล": DATE,
+    "รหัสโครงการวิจัย": CODE,
+    "ประเภททุน": CODE,
+    "งวด": INTEGER,
+    "ar_code": CODE,
+    "รหัสค่าใช้จ่าย": CODE,
+    "หมวดรายจ่าย": CODE,
+    "รายการ": CODE,
+    "ประเภทค่าใช้จ่าย": CODE,
+    "จำนวนเงิน": MONEY,
+}
+
+SCHEMAS = {
+    "income": {
+        **_COMMON,
+        "ปีงบประมาณ": CODE,
+        "รหัสงบประมาณ": CODE,
+        "วันที่เซนสัญญา": DATE,
+        "ระยะเวลาดำเนินโครงการ (เดือน)": INTEGER,
+        "รหัสสัญญา": TEXT,
+    },
+    "expense": {
+        **_COMMON,
+        "ประเภทการจ่ายเงิน": CODE,
+        "วันที่เบิกจ่าย": DATE,
+        "รหัสกิจกรรม": TEXT,
+    },
+    "reserve": {
+        **_COMMON,
+        "วันที่ยืม": DATE,
+        "วันที่ต้องคืน": DATE,
+        "วันที่คืนเงิน": DATE,
+        "เงินที่คืน": MONEY,
+        "คงเหลือ": MONEY,
+        "สถานะ": CODE,
+    },
+    "reserve_refund": {
+        **_COMMON,
+        "วันที่ยืม": DATE,
+        "วันที่ต้องคืน": DATE,
+        "วันที่คืนเงิน": DATE,
+        "เงินที่คืน": MONEY,
+    },
+    "project": {
+        "วันที่กรอกข้อมูล": DATE,
+        "ปีงบประมาณ": CODE,
+        "รหัสงบประมาณ": CODE,
+        "วันที่เซนสัญญา": DATE,
+        "ระยะเวลาดำเนินโครงการ (เดือน)": INTEGER,
+        "รหัสสัญญา": TEXT,
+    },
+    "ar": {
+        "รหัสโครงการวิจัย": CODE,
+        "ar_code": CODE,
+        "รหัสค่าใช้จ่าย": CODE,
+    },
+}
+
+
+def _money(series):
+    return pd.to_numeric(series.astype(str).str.replace(",", "", regex=False), errors="coerce").astype("float64")
+
+
+def _integer(series):
+    return pd.to_numeric(series, errors="coerce").round().astype("Int64")
+
+
+def _date(series):
+    return pd.to_datetime(series, errors="coerce", format="ISO8601")
+
+
+def _code(series):
+    return series.astype("category")
+
+
+_CONVERTERS = {MONEY: _money, INTEGER: _integer, DATE: _date, CODE: _code}
+
+
+def apply_schema(df, table):
+    # แปลงคอลัมน์ตาม SCHEMAS[table] (คอลัมน์ที่ไม่ได้ประกาศหรือเป็น TEXT คงไว้ตามเดิม)
+    df = df.copy()
+    for col, kind in SCHEMAS.get(table, {}).items():
+        if col in df.columns and kind in _CONVERTERS:
+            df[col] = _CONVERTERS[kind](df[col])
+    return df
@@ -0,0 +1,143 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from ledger.cache import cached
+
+NGRAM = 3
+
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff\u00ad]")
+_SPACES = re.compile(r"\s+")
+# นิคหิต + สระอา (ํา) ที่พิมพ์แยกกัน -> สระอำ (ำ)
+_SARA_AM = re.compile("\u0e4d\u0e32")
+# วรรณยุกต์/การันต์ที่พิมพ์ก่อนสระบน-ล่าง -> สลับให้สระมาก่อน (ลำดับมาตรฐาน)
+_TONE_BEFORE_VOWEL = re.compile("([\u0e48-\u0e4c])([\u0e31\u0e34-\u0e3a\u0e47])")
+_DOUBLE_TONE = re.compile("([\u0e48-\u0e4c])\\1+")
+
+
+def normalize_text(text):
+    # ทำข้อความให้อยู่ในรูปเดียวกันก่อนค้นหา: ตัด zero-width, รวมรูปแบบสระ/วรรณยุกต์ไทย, ไม่สนตัวพิมพ์
+    text = unicodedata.normalize("NFC", str(text))
+    text = _ZERO_WIDTH.sub("", text)
+    text = _SARA_AM.sub("\u0e33", text)
+    text = _TONE_BEFORE_VOWEL.sub(r"\2\1", text)
+    text = _DOUBLE_TONE.sub(r"\1", text)
+    return _SPACES.sub(" ", text).strip().casefold()
+
+
+def _grams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _is_token_column(series):
+    # คอลัมน์วันที่/ตัวเลข ค่าไม่ซ้ำกันเกือบทุกแถว ทำ 3-gram แล้ว index ใหญ่และสร้างช้าโดยไม่ได้ประโยชน์
+    return pd.api.types.is_datetime64_any_dtype(series) or (
+        pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    )
+
+
+def _token_text(series):
+    # ข้อความของค่าวันที่/ตัวเลขตามที่ผู้ใช้พิมพ์ค้น: 2025-07-09 (ไม่มีเวลาถ้าเป็นเที่ยงคืน), 10000 (ไม่มี .0)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime("%Y-%m-%d %H:%M:%S").str.removesuffix(" 00:00:00")
+    else:
+        values = series.astype("float64")
+        whole = values.notna() & (values % 1 == 0)
+        text = values.astype(str).where(~whole, values.where(whole, 0).astype("int64").astype(str))
+    return text.where(series.notna(), "").astype(object)
+
+
+class SearchIndex:
+    # index สำหรับค้นหาข้อความในตาราง สร้างครั้งเดียวต่อเวอร์ชันข้อมูล
+    # - ทุกช่องถูก normalize แล้วเข้ารหัสเป็นเลขของค่าที่ไม่ซ้ำ (ตารางบัญชีมีค่าซ้ำเยอะ)
+    # - ค่าข้อความที่ไม่ซ้ำมี inverted index แบบ 3-gram ใช้หา candidate แล้วตรวจ substring จริงอีกรอบ
+    # - คอลัมน์วันที่/ตัวเลขเก็บเป็นคำทั้งคำ (เรียงไว้ค้นแบบ binary search) ตรงเมื่อค่าขึ้นต้นด้วยคำค้น
+    #   เช่น 2025-07 ตรงกับทุกวันในเดือนนั้น, 10000 ตรงกับ 10000 (ไม่ตรงกับ 210000)
+    # - คำค้นหลายคำ (คั่นด้วยช่องว่าง) ต้องพบทุกคำ (AND) ในแถวเดียวกัน คำละช่องก็ได้
+    # - คำที่ขึ้นต้นด้วย ^ จับเฉพาะช่องที่ขึ้นต้นด้วยคำนั้น (prefix)
+
+    def __init__(self, df):
+        token_cols = [c for c in df.columns if _is_token_column(df[c])]
+        text_df = df.drop(columns=token_cols)
+        n_rows, n_cols = text_df.shape
+        raw = text_df.astype(object).where(text_df.notna(), "").to_numpy().ravel(order="F")
+        raw_codes, raw_values = pd.factorize(pd.Series(raw, dtype=object).map(str))
+        normalized = [normalize_text(v) for v in raw_values]
+        norm_codes, vocab = pd.factorize(pd.Series(normalized, dtype=object))
+        codes = norm_codes[raw_codes] if len(raw_codes) else raw_codes
+        self._vocab = list(vocab)
+        # ค่าวันที่/ตัวเลขต่อท้าย vocab ข้อความ เรียงตามตัวอักษร (id = len(vocab) + ตำแหน่ง)
+        tokens = pd.concat([_token_text(df[c]) for c in token_cols], ignore_index=True) if token_cols else pd.Series([], dtype=object)
+        token_codes, token_values = pd.factorize(tokens, sort=True)
+        self._tokens = np.asarray(token_values, dtype=str)
+        self._codes = np.hstack([
+            codes.reshape((n_rows, n_cols), order="F"),
+            (token_codes + len(self._vocab)).reshape((len(df), len(token_cols)), order="F"),
+        ])
+        postings = {}
+        for value_id, value in enumerate(self._vocab):
+            for gram in _grams(value):
+                postings.setdefault(gram, []).append(value_id)
+        self._postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return self._codes.shape[0]
+
+    def _matching_tokens(self, term):
+        # ช่วงของค่าวันที่/ตัวเลขที่ขึ้นต้นด้วย term (tokens เรียงแล้ว ค่าที่ขึ้นต้นเหมือนกันอยู่ติดกัน)
+        lo = np.searchsorted(self._tokens, term, side="left")
+        hi = np.searchsorted(self._tokens, term + "\U0010ffff", side="left")
+        return lo, hi
+
+    def _candidates(self, term):
+        grams = sorted((self._postings.get(g) for g in _grams(term)), key=lambda ids: -1 if ids is None else len(ids))
+        if not grams:
+            return range(len(self._vocab))
+        if grams[0] is None:
+            return []
+        ids = grams[0]
+        for other in grams[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+            if not len(ids):
+                break
+        return ids
+
+    def _matching_values(self, term):
+        prefix = term.startswith("^")
+        term = normalize_text(term[1:] if prefix else term)
+        matched = np.zeros(len(self._vocab) + len(self._tokens), dtype=bool)
+        if not term:
+            matched[:] = True
+            return matched
+        for value_id in self._candidates(term):
+            value = self._vocab[value_id]
+            if value.startswith(term) if prefix else term in value:
+                matched[value_id] = True
+        lo, hi = self._matching_tokens(term)
+        matched[len(self._vocab) + lo:len(self._vocab) + hi] = True
+        return matched
+
+    def search(self, query):
+        # คืนตำแหน่งแถว (0..n-1) ที่ตรงกับทุกคำในคำค้น
+        hits = np.ones(len(self), dtype=bool)
+        for term in str(query).split():
+            matched = self._matching_values(term)
+            if not matched.any():
+                return np.array([], dtype=np.int64)
+            hits &= matched[self._codes].any(axis=1) if self._codes.size else False
+        return np.flatnonzero(hits)
+
+    def filter(self, df, query):
+        # df ต้องเป็นตารางเดียวกับที่ใช้สร้าง index
+        if not str(query).strip():
+            return df
+        return df.iloc[self.search(query)]
+
+
+def search_index(name, df, version):
+    # index ของตาราง df ที่หน้าเว็บใช้ค้นหา อยู่ใน cache กลาง
+    # - name แยก index ของแต่ละหน้า และต้องบอกเงื่อนไขที่กรอง df มาก่อนด้วย (เช่น "expense_actual")
+    # - version คือเวอร์ชันของตารางต้นทาง (tables.version) สร้างใหม่เมื่อข้อมูลถูกบันทึก ไม่ต้อง hash ทั้งตารางทุกรอบ
+    return cached(("search", name), (version, len(df)), lambda: SearchIndex(df))
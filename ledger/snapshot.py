@@ -0,0 +1,114 @@
+import glob
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from ledger import config, trace
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _parse_pool():
+    # process pool สำหรับแปลง xlsx (openpyxl ใช้ CPU และถือ GIL thread เดียวจึงขนานกันไม่ได้)
+    # ใช้ spawn เพราะ process หลัก (streamlit) มีหลาย thread การ fork ไม่ปลอดภัย
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(config.PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def parse_excel(path, dtype=None):
+    # pd.read_excel ไฟล์ใหญ่แปลงใน process pool ให้หลายไฟล์แปลงพร้อมกันได้จริง
+    # ถ้า pool ใช้ไม่ได้ (process ลูกตาย/สร้างไม่ได้) ทิ้ง pool แล้วแปลงใน process เดิม
+    global _pool
+    with trace.span("read_excel", file=os.path.basename(path)):
+        if config.PARSE_PROCESSES > 1 and os.path.getsize(path) >= config.PARSE_PROCESS_MIN_BYTES:
+            try:
+                return _parse_pool().submit(pd.read_excel, path, dtype=dtype).result()
+            except (BrokenProcessPool, OSError):
+                with _pool_lock:
+                    _pool = None
+        return pd.read_excel(path, dtype=dtype)
+
+
+def _tag(dtype):
+    if dtype is None:
+        return "raw"
+    if dtype is str:
+        return "str"
+    return getattr(dtype, "__name__", str(dtype))
+
+
+def file_stamp(path):
+    # (mtime, ขนาดไฟล์) ใช้ตรวจว่าไฟล์ต้นทางเปลี่ยนหรือไม่ ไม่มีไฟล์คืน None
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def snapshot_path(path, dtype=None):
+    # ชื่อไฟล์ snapshot ผูกกับ mtime + ขนาดไฟล์ต้นทาง ถ้า xlsx เปลี่ยนชื่อจะไม่ตรงกันและสร้างใหม่
+    mtime_ns, size = file_stamp(path)
+    name = f"{os.path.basename(path)}.{mtime_ns}-{size}.{_tag(dtype)}.parquet"
+    return os.path.join(config.SNAPSHOT_DIR, name)
+
+
+def _write(df, target, path, dtype):
+    os.makedirs(config.SNAPSHOT_DIR, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    except Exception:
+        # คอลัมน์ที่ชนิดข้อมูลปนกัน (เช่น int กับ str) เขียน parquet ไม่ได้ -> ใช้ข้อมูลจาก xlsx ตรงๆ
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    pattern = os.path.join(config.SNAPSHOT_DIR, f"{glob.escape(os.path.basename(path))}.*.{_tag(dtype)}.parquet")
+    for old in glob.glob(pattern):
+        if old != target:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _project(df, columns):
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+
+def read_excel(path, dtype=None, columns=None):
+    # ใช้แทน pd.read_excel: อ่านจาก snapshot แบบ parquet ถ้าไฟล์ xlsx ยังไม่ถูกแก้ไข
+    # columns: อ่านเฉพาะคอลัมน์ที่ระบุ (parquet เก็บแยกคอลัมน์ จึงไม่ต้องอ่านคอลัมน์อื่นเลย)
+    if not HAS_PARQUET:
+        return _project(parse_excel(path, dtype=dtype), columns)
+    target = snapshot_path(path, dtype)
+    if os.path.exists(target):
+        try:
+            with trace.span("read_snapshot", file=os.path.basename(path)):
+                if columns is None:
+                    return pd.read_parquet(target)
+                available = pyarrow.parquet.read_schema(target).names
+                return pd.read_parquet(target, columns=[c for c in columns if c in available])
+        except Exception:
+            pass
+    df = parse_excel(path, dtype=dtype)
+    with _lock:
+        _write(df, target, path, dtype)
+    return _project(df, columns)
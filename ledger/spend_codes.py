@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ledger import config
+from ledger.cache import cached
+from ledger.snapshot import file_stamp
+
+SPEND_COLUMNS = ["รหัสค่าใช้จ่าย", "หมวดรายจ่าย", "รายการ", "ประเภทค่าใช้จ่าย"]
+DETAIL_COLUMNS = SPEND_COLUMNS[1:]
+EMPTY_DETAIL = ("", "", "")
+
+
+def load_spend_table(path=config.SPEND_LOOKUP_FILE):
+    if os.path.exists(path):
+        df = pd.read_csv(path, dtype=str).fillna("")
+        df.columns = df.columns.str.strip()
+        return df
+    return pd.DataFrame(columns=SPEND_COLUMNS)
+
+
+class SpendCodeIndex:
+    # dict รหัสค่าใช้จ่าย -> (หมวดรายจ่าย, รายการ, ประเภทค่าใช้จ่าย) ค้นหาได้ใน O(1)
+    # ถ้ารหัสซ้ำ ใช้แถวแรกเหมือนกับ matched.iloc[0] แบบเดิม
+
+    def __init__(self, df):
+        df = df.drop_duplicates(subset="รหัสค่าใช้จ่าย", keep="first")
+        codes = df["รหัสค่าใช้จ่าย"].astype(str).str.strip()
+        self._details = dict(zip(codes, zip(*(df[c].tolist() for c in DETAIL_COLUMNS))))
+
+    def __len__(self):
+        return len(self._details)
+
+    def lookup(self, code):
+        if code is None:
+            return EMPTY_DETAIL
+        return self._details.get(str(code).strip(), EMPTY_DETAIL)
+
+    def lookup_many(self, codes):
+        get = self._details.get
+        return [get(str(code).strip(), EMPTY_DETAIL) if code is not None else EMPTY_DETAIL for code in codes]
+
+
+def with_details(df, spend_df):
+    # ตารางบัญชีเก็บแค่รหัสค่าใช้จ่าย: เติม หมวดรายจ่าย/รายการ/ประเภทค่าใช้จ่าย จากตารางรหัสตอนอ่าน
+    # เป็น category ที่ใช้ dictionary ของตารางรหัสร่วมกัน (แก้คำอธิบายในตารางรหัสแล้วทุกรายงานเปลี่ยนตาม)
+    # รหัสที่ไม่มีในตารางรหัสใช้ข้อความที่เคยบันทึกไว้ในแถวเดิม (ถ้ามี)
+    if "รหัสค่าใช้จ่าย" not in df.columns:
+        return df
+    spend_df = spend_df.drop_duplicates(subset="รหัสค่าใช้จ่าย", keep="first")
+    positions = pd.Index(spend_df["รหัสค่าใช้จ่าย"].astype(str).str.strip()).get_indexer(df["รหัสค่าใช้จ่าย"].astype(str))
+    found = positions >= 0
+    result = df.copy()
+    insert_at = result.columns.get_loc("รหัสค่าใช้จ่าย") + 1
+    for col in DETAIL_COLUMNS:
+        dictionary = spend_df[col].astype("category")
+        # ต่อ -1 (ค่าว่าง) ไว้ท้าย: ตำแหน่ง -1 ของรหัสที่หาไม่พบจึงได้ค่าว่าง
+        codes = np.append(dictionary.cat.codes.to_numpy(), -1)[positions]
+        values = pd.Categorical.from_codes(codes, categories=dictionary.cat.categories)
+        values = pd.Series(values, index=df.index)
+        if col in df.columns and not found.all():
+            values = values.astype(object).where(found, df[col].astype(object)).astype("category")
+        if col in result.columns:
+            result[col] = values
+        else:
+            result.insert(insert_at, col, values)
+        insert_at = result.columns.get_loc(col) + 1
+    return result
+
+
+def get_spend_index(path=config.SPEND_LOOKUP_FILE):
+    # index เดียวใช้ร่วมกันทั้ง process สร้างใหม่เมื่อไฟล์ csv เปลี่ยน
+    return cached(("spend_index", path), file_stamp(path), lambda: SpendCodeIndex(load_spend_table(path)))
+
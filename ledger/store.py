@@ -0,0 +1,443 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from ledger import config, snapshot
+from ledger.normalize import normalize, validate
+from ledger.summaries import SUMMARY_COLUMNS, SUMMARY_KEYS, SUMMARY_TABLES, summarize
+
+VERSION_TABLE = "_versions"
+# คอลัมน์ที่ query กรองบ่อย สร้าง index ใน sqlite ให้
+INDEXED_COLUMNS = ["รหัสโครงการวิจัย"]
+DATE_COLUMNS = ["วันที่กรอกข้อมูล", "วันที่เซนสัญญา", "วันที่เบิกจ่าย", "วันที่ยืม", "วันที่ต้องคืน", "วันที่คืนเงิน"]
+
+
+def save_to_excel(df, filename):
+    df.to_excel(filename, index=False)
+    if len(df.columns) and df.columns[0] == "วันที่กรอกข้อมูล":
+        wb = load_workbook(filename)
+        ws = wb.active
+        for cell in ws['A']:
+            cell.number_format = 'YYYY-MM-DD HH:mm:ss'
+        wb.save(filename)
+
+
+def _fsync(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _stage_excel(df, path):
+    # เขียนลงไฟล์ชั่วคราวในโฟลเดอร์เดียวกัน + fsync แล้วคืน path ชั่วคราว (ยังไม่แทนไฟล์จริง)
+    folder, name = os.path.split(path)
+    tmp = os.path.join(folder, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp.xlsx")
+    try:
+        save_to_excel(df, tmp)
+        _fsync(tmp)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return tmp
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_db(value):
+    # แปลงค่าจาก DataFrame ให้อยู่ในรูปที่ sqlite เก็บได้ (วันที่เก็บเป็นข้อความแบบเดียวกับ read_excel(dtype=str))
+    if isinstance(value, (list, tuple, dict)):
+        return str(value)
+    if pd.isna(value):
+        return None
+    if hasattr(value, "year") and hasattr(value, "month"):
+        return str(pd.Timestamp(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _as_text(value):
+    # เลียนแบบ pd.read_excel(dtype=str): ตัวเลขจำนวนเต็มไม่มี .0 ต่อท้าย ช่องว่างเป็น NaN
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _apply_dtype(df, dtype):
+    if dtype is str:
+        for col in df.columns:
+            df[col] = df[col].map(_as_text).astype(object)
+    else:
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+    return df
+
+
+def _where_columns(where):
+    return list((where or {}).keys())
+
+
+def filter_rows(df, columns=None, where=None):
+    # กรองแถวตาม where แล้วเลือกคอลัมน์ (ใช้กับที่เก็บที่กรองเองไม่ได้ และกรองซ้ำผลจาก sqlite ไม่จำเป็น)
+    # where = {คอลัมน์: ค่า} ค่าเป็น list/tuple/set = อยู่ในชุดนั้น, slice(เริ่ม, จบ) = เริ่ม <= ค่า < จบ
+    mask = pd.Series(True, index=df.index)
+    for col, value in (where or {}).items():
+        if col not in df.columns:
+            mask &= False
+        elif isinstance(value, slice):
+            values, bound = df[col], (lambda v: v)
+            if col in DATE_COLUMNS:
+                values, bound = pd.to_datetime(values, errors="coerce", format="ISO8601"), pd.Timestamp
+            if value.start is not None:
+                mask &= values >= bound(value.start)
+            if value.stop is not None:
+                mask &= values < bound(value.stop)
+        elif isinstance(value, (list, tuple, set)):
+            mask &= df[col].isin(list(value))
+        else:
+            mask &= df[col] == value
+    df = df[mask.fillna(False).to_numpy(dtype=bool)]
+    if columns is not None:
+        df = df.reindex(columns=list(columns))
+    return df.reset_index(drop=True)
+
+
+class LedgerStore:
+    # อินเทอร์เฟซกลางของที่เก็บข้อมูล ตารางอ้างด้วยชื่อใน config.LEDGER_TABLES
+
+    def read(self, table, dtype=None):
+        raise NotImplementedError
+
+    def append(self, table, df):
+        self.append_many({table: df})
+
+    def append_many(self, batches):
+        # บันทึกแถวใหม่ของหลายตารางพร้อมกัน {ตาราง: DataFrame} สำเร็จทั้งหมดหรือไม่บันทึกเลย
+        raise NotImplementedError
+
+    def replace(self, table, df):
+        raise NotImplementedError
+
+    def query(self, table, columns=None, where=None, dtype=None):
+        # อ่านเฉพาะคอลัมน์ columns ของแถวที่ตรงกับ where (ดู filter_rows) คอลัมน์ที่ไม่มีในตารางเป็นค่าว่าง
+        return filter_rows(self.read(table, dtype=dtype), columns, where)
+
+    def read_summary(self, table):
+        # ยอดรวมสำเร็จรูปของ income/expense (ดู ledger.summaries)
+        return summarize(self.read(table))
+
+    def version(self, table):
+        # ค่าประจำเวอร์ชันของตาราง เปลี่ยนเมื่อมีการเขียนจริงเท่านั้น ใช้เป็น key ของ cache ฝั่งหน้าเว็บ
+        raise NotImplementedError
+
+    def import_excel(self, table, path=None):
+        path = path or config.LEDGER_TABLES[table]
+        self.replace(table, snapshot.read_excel(path, dtype=object))
+
+    def export_excel(self, table, path=None):
+        path = path or config.LEDGER_TABLES[table]
+        save_to_excel(self.read(table), path)
+
+
+class ExcelStore(LedgerStore):
+    # แบบเดิม: อ่านทั้งไฟล์ ต่อแถวใหม่ แล้วเขียนทับ xlsx ทั้งไฟล์
+
+    def read(self, table, dtype=None):
+        path = config.LEDGER_TABLES[table]
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=config.DEFAULT_COLUMNS[table])
+        return snapshot.read_excel(path, dtype=dtype)
+
+    def version(self, table):
+        return snapshot.file_stamp(config.LEDGER_TABLES[table])
+
+    def query(self, table, columns=None, where=None, dtype=None):
+        # อ่านจาก snapshot parquet เฉพาะคอลัมน์ที่ใช้ (ทั้งที่แสดงและที่ใช้กรอง) แล้วค่อยกรองแถว
+        path = config.LEDGER_TABLES[table]
+        if not os.path.exists(path):
+            return filter_rows(pd.DataFrame(columns=config.DEFAULT_COLUMNS[table]), columns, where)
+        needed = None if columns is None else list(dict.fromkeys(list(columns) + _where_columns(where)))
+        return filter_rows(snapshot.read_excel(path, dtype=dtype, columns=needed), columns, where)
+
+    def append_many(self, batches):
+        # เขียนไฟล์ใหม่ของทุกตารางลงไฟล์ชั่วคราว (fsync) ให้ครบก่อน แล้วค่อย rename ทับไฟล์จริง
+        # ถ้าเขียนตารางใดไม่สำเร็จ ไฟล์จริงทุกไฟล์ยังเป็นของเดิม
+        staged = []
+        try:
+            for table, df in batches.items():
+                if df.empty:
+                    continue
+                df = validate(normalize(df, table), table)
+                path = config.LEDGER_TABLES[table]
+                if os.path.exists(path):
+                    old_df = snapshot.read_excel(path)
+                    frames = [f for f in [old_df, df] if not f.empty]
+                    df = pd.concat(frames, ignore_index=True) if frames else df
+                staged.append((_stage_excel(df, path), path))
+        except BaseException:
+            for tmp, _ in staged:
+                os.remove(tmp)
+            raise
+        for tmp, path in staged:
+            os.replace(tmp, path)
+
+    def replace(self, table, df):
+        path = config.LEDGER_TABLES[table]
+        os.replace(_stage_excel(normalize(df, table), path), path)
+
+    def export_excel(self, table, path=None):
+        path = path or config.LEDGER_TABLES[table]
+        if os.path.abspath(path) != os.path.abspath(config.LEDGER_TABLES[table]):
+            super().export_excel(table, path)
+
+
+class SQLiteStore(LedgerStore):
+    # เก็บทุกตารางในไฟล์ sqlite เดียว (WAL) การบันทึกเป็น INSERT เฉพาะแถวใหม่
+    # ครั้งแรกที่เปิดตารางจะ import จากไฟล์ xlsx เดิมให้อัตโนมัติ
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (name TEXT PRIMARY KEY, version INTEGER)")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _columns(conn, table):
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _ensure_table(self, conn, table):
+        if self._columns(conn, table):
+            return
+        source = config.LEDGER_TABLES[table]
+        if os.path.exists(source):
+            df = snapshot.read_excel(source, dtype=object)
+        else:
+            df = pd.DataFrame(columns=config.DEFAULT_COLUMNS[table])
+        df = normalize(df, table)
+        conn.execute(f"CREATE TABLE {_quote(table)} ({', '.join(_quote(c) for c in df.columns)})")
+        self._insert(conn, table, df)
+        self._bump(conn, table)
+
+    @staticmethod
+    def _bump(conn, table):
+        # เวอร์ชันเป็นเวลาที่เขียนล่าสุด (ns) จึงไม่ซ้ำกับค่าเดิมแม้ไฟล์ฐานข้อมูลถูกสร้างใหม่
+        conn.execute(
+            f"INSERT INTO {VERSION_TABLE} (name, version) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET version = excluded.version",
+            (table, time.time_ns()),
+        )
+
+    def _insert(self, conn, table, df):
+        if df.empty:
+            return
+        existing = self._columns(conn, table)
+        for col in df.columns:
+            if col not in existing:
+                conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)}")
+        cols = ", ".join(_quote(c) for c in df.columns)
+        marks = ", ".join("?" for _ in df.columns)
+        rows = [tuple(_to_db(v) for v in row) for row in df.itertuples(index=False, name=None)]
+        conn.executemany(f"INSERT INTO {_quote(table)} ({cols}) VALUES ({marks})", rows)
+
+    @staticmethod
+    def _select(conn, sql):
+        cur = conn.execute(sql)
+        columns = [d[0] for d in cur.description]
+        return pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+
+    def _has_summary(self, conn, table):
+        # ตารางสรุปที่คอลัมน์ไม่ตรงกับ SUMMARY_COLUMNS (สร้างจากเวอร์ชันก่อน) ถือว่ายังไม่มี จะถูกสร้างใหม่
+        return self._columns(conn, SUMMARY_TABLES[table]) == SUMMARY_COLUMNS
+
+    def _rebuild_summary(self, conn, table):
+        name = _quote(SUMMARY_TABLES[table])
+        keys = ", ".join(_quote(c) for c in SUMMARY_KEYS)
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+        conn.execute(f"CREATE TABLE {name} ({', '.join(_quote(c) for c in SUMMARY_COLUMNS)}, PRIMARY KEY ({keys}))")
+        full = _apply_dtype(self._select(conn, f"SELECT * FROM {_quote(table)}"), str)
+        self._apply_summary(conn, table, summarize(full))
+
+    def _apply_summary(self, conn, table, delta):
+        # บวกยอดของแถวชุดใหม่เข้าไปในตารางสรุป (upsert) ไม่ต้องคำนวณจากทั้งตารางใหม่
+        if delta.empty:
+            return
+        name = _quote(SUMMARY_TABLES[table])
+        cols = ", ".join(_quote(c) for c in SUMMARY_COLUMNS)
+        marks = ", ".join("?" for _ in SUMMARY_COLUMNS)
+        keys = ", ".join(_quote(c) for c in SUMMARY_KEYS)
+        amount, count = (_quote(c) for c in SUMMARY_COLUMNS[-2:])
+        rows = [tuple(_to_db(v) for v in row) for row in delta[SUMMARY_COLUMNS].itertuples(index=False, name=None)]
+        conn.executemany(
+            f"INSERT INTO {name} ({cols}) VALUES ({marks}) ON CONFLICT ({keys}) DO UPDATE SET "
+            f"{amount} = {amount} + excluded.{amount}, {count} = {count} + excluded.{count}",
+            rows,
+        )
+
+    def read(self, table, dtype=None):
+        conn = self._connect()
+        if not self._columns(conn, table):
+            with self._transaction() as conn:
+                self._ensure_table(conn, table)
+        df = self._select(conn, f"SELECT * FROM {_quote(table)} ORDER BY rowid")
+        return _apply_dtype(df, dtype)
+
+    def _ensure_indexes(self, conn, table, columns):
+        existing = self._columns(conn, table)
+        for col in columns:
+            if col in INDEXED_COLUMNS and col in existing:
+                name = _quote(f"ix_{table}_{col}")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {_quote(table)} ({_quote(col)})")
+
+    def query(self, table, columns=None, where=None, dtype=None):
+        # กรองและเลือกคอลัมน์ใน sqlite (WHERE/SELECT) ได้แค่แถวของโครงการที่เลือก ไม่ต้องโหลดทั้งตาราง
+        conn = self._connect()
+        existing = self._columns(conn, table)
+        if not existing:
+            with self._transaction() as conn:
+                self._ensure_table(conn, table)
+            existing = self._columns(conn, table)
+        where = where or {}
+        if any(col not in existing for col in where):
+            return filter_rows(pd.DataFrame(columns=existing), columns, where)
+        if any(col in INDEXED_COLUMNS for col in where):
+            with self._transaction() as conn:
+                self._ensure_indexes(conn, table, list(where))
+        clauses, params = [], []
+        for col, value in where.items():
+            name = _quote(col)
+            if isinstance(value, slice):
+                if value.start is not None:
+                    clauses.append(f"{name} >= ?")
+                    params.append(_to_db(value.start))
+                if value.stop is not None:
+                    clauses.append(f"{name} < ?")
+                    params.append(_to_db(value.stop))
+            elif isinstance(value, (list, tuple, set)):
+                value = list(value)
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{name} IN ({', '.join('?' for _ in value)})")
+                params.extend(_to_db(v) for v in value)
+            else:
+                clauses.append(f"{name} = ?")
+                params.append(_to_db(value))
+        selected = existing if columns is None else [c for c in columns if c in existing]
+        sql = f"SELECT {', '.join(_quote(c) for c in selected) or 'NULL'} FROM {_quote(table)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        cur = conn.execute(sql + " ORDER BY rowid", params)
+        df = pd.DataFrame.from_records(cur.fetchall(), columns=[d[0] for d in cur.description])
+        if not selected:
+            df = df.iloc[:, :0]
+        df = _apply_dtype(df, dtype)
+        return df if columns is None else df.reindex(columns=list(columns))
+
+    def read_summary(self, table):
+        conn = self._connect()
+        if not self._has_summary(conn, table):
+            with self._transaction() as conn:
+                self._ensure_table(conn, table)
+                if not self._has_summary(conn, table):
+                    self._rebuild_summary(conn, table)
+        return self._select(conn, f"SELECT * FROM {_quote(SUMMARY_TABLES[table])}")
+
+    def version(self, table):
+        row = self._connect().execute(f"SELECT version FROM {VERSION_TABLE} WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    def append_many(self, batches):
+        batches = {table: validate(normalize(df, table), table) for table, df in batches.items() if not df.empty}
+        if not batches:
+            return
+        with self._transaction() as conn:
+            for table, df in batches.items():
+                self._ensure_table(conn, table)
+                self._insert(conn, table, df)
+                self._bump(conn, table)
+                if table in SUMMARY_TABLES:
+                    if self._has_summary(conn, table):
+                        self._apply_summary(conn, table, summarize(df))
+                    else:
+                        self._rebuild_summary(conn, table)
+
+    def replace(self, table, df):
+        with self._transaction() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            df = normalize(df, table)
+            conn.execute(f"CREATE TABLE {_quote(table)} ({', '.join(_quote(c) for c in df.columns)})")
+            self._insert(conn, table, df)
+            self._bump(conn, table)
+            if table in SUMMARY_TABLES:
+                self._rebuild_summary(conn, table)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if config.BACKEND == "sqlite":
+                _store = SQLiteStore(config.DB_FILE)
+            elif config.BACKEND == "excel":
+                _store = ExcelStore()
+            else:
+                raise ValueError(f"ไม่รู้จัก LEDGER_BACKEND: {config.BACKEND}")
+    return _store
+
+
+def read_table(table, dtype=None):
+    return get_store().read(table, dtype=dtype)
+
+
+def query_table(table, columns=None, where=None, dtype=None):
+    return get_store().query(table, columns=columns, where=where, dtype=dtype)
+
+
+def import_table(table, path=None):
+    get_store().import_excel(table, path)
+
+
+def read_summary(table):
+    return get_store().read_summary(table)
+
+
+def table_version(table):
+    return get_store().version(table)
+
+
+def export_table(table, path=None):
+    get_store().export_excel(table, path)
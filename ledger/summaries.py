@@ -0,0 +1,91 @@
+import pandas as pd
+
+# ยอดรวมสำเร็จรูป (materialized) ของตารางรายรับ/รายจ่าย ระดับ
+# โครงการ x ประเภททุน x ประเภทการจ่ายเงิน x งวด x ar_code x รหัสค่าใช้จ่าย
+# (หมวดรายจ่าย/รายการ เติมจากตารางรหัสค่าใช้จ่ายตอนอ่าน ดู ledger.spend_codes.with_details)
+# ขนาดตารางขึ้นกับจำนวนโครงการ/งวด/รหัส ไม่ได้โตตามจำนวนแถวที่บันทึก
+SUMMARY_TABLES = {"income": "summary_income", "expense": "summary_expense"}
+SUMMARY_KEYS = ["รหัสโครงการวิจัย", "ประเภททุน", "ประเภทการจ่ายเงิน", "งวด", "ar_code", "รหัสค่าใช้จ่าย"]
+AMOUNT = "จำนวนเงิน"
+COUNT = "จำนวนรายการ"
+SUMMARY_COLUMNS = SUMMARY_KEYS + [AMOUNT, COUNT]
+
+
+def _text(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def summarize(df):
+    # รวมยอดของชุดแถว (ทั้งตารางหรือเฉพาะแถวที่เพิ่งบันทึก) ให้อยู่ในระดับ SUMMARY_KEYS
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    keys = pd.DataFrame(index=df.index)
+    for col in SUMMARY_KEYS:
+        keys[col] = _text(df[col]) if col in df.columns else ""
+    if "งวด" in df.columns:
+        keys["งวด"] = pd.to_numeric(df["งวด"], errors="coerce").fillna(0).astype(int)
+    else:
+        keys["งวด"] = 0
+    keys[AMOUNT] = pd.to_numeric(df[AMOUNT], errors="coerce").fillna(0.0).astype(float) if AMOUNT in df.columns else 0.0
+    keys[COUNT] = 1
+    return keys.groupby(SUMMARY_KEYS, as_index=False, sort=False)[[AMOUNT, COUNT]].sum()
+
+
+def totals(summary, by=None, where=None):
+    # รวมยอดจาก summary ตามคอลัมน์ใน by เฉพาะแถวที่ตรงกับ where เช่น
+    # totals(s, ["งวด"], {"ประเภททุน": "ทุนภายใน"}) ถ้าไม่ระบุ by คืนยอดรวมเป็นตัวเลข
+    for col, value in (where or {}).items():
+        summary = summary[summary[col] == value]
+    if not by:
+        return float(summary[AMOUNT].sum())
+    return summary.groupby(by, as_index=False)[AMOUNT].sum()
+
+
+def budget_pivot(income_summary, expend_summary):
+    # ตารางสรุปงบประมาณ 2 ระดับ (หน้า 53): แถว = จัดสรร/เบิกจ่าย/คงเหลือ
+    # คอลัมน์ = (งวดที่ x, รายการ) พร้อมคอลัมน์ "รวม" ของแต่ละงวด
+    income_grouped = income_summary.groupby(['งวด', 'รายการ']).agg({AMOUNT: 'sum'}).reset_index()
+    income_grouped['ประเภท'] = 'จัดสรร'
+
+    expend_grouped = expend_summary.groupby(['งวด', 'รายการ']).agg({AMOUNT: 'sum'}).reset_index()
+    expend_grouped['ประเภท'] = 'เบิกจ่าย'
+
+    combined = pd.concat([income_grouped, expend_grouped], ignore_index=True)
+    combined = combined.rename(columns={AMOUNT: 'ยอดรวม'})
+
+    pivot = combined.pivot_table(
+        index='ประเภท',
+        columns=['งวด', 'รายการ'],
+        values='ยอดรวม',
+        aggfunc='sum',
+        fill_value=0
+    )
+
+    pivot = pivot.T.groupby(level=[0, 1]).sum().T
+
+    # เพิ่มแถว "คงเหลือ" = จัดสรร - เบิกจ่าย
+    allocated = pivot.loc['จัดสรร']
+    spent = pivot.loc['เบิกจ่าย']
+    remain = allocated - spent
+    remain.name = 'คงเหลือ'
+    pivot = pd.concat([pivot, remain.to_frame().T])
+
+    # สร้างคอลัมน์ "รวม" ต่อแต่ละงวด (sum ตามหมวด)
+    sum_dfs = []
+    for period in pivot.columns.get_level_values(0).unique():
+        df_slice = pivot.loc[:, period]
+        sum_col = df_slice.sum(axis=1)
+        sum_df = pd.DataFrame(sum_col)
+        sum_df.columns = pd.MultiIndex.from_tuples([(period, 'รวม')])
+        sum_dfs.append(sum_df)
+
+    pivot_with_sum = pd.concat([pivot] + sum_dfs, axis=1)
+    pivot_with_sum = pivot_with_sum.sort_index(axis=1, level=[0, 1])
+
+    pivot_with_sum.columns.names = ['งวด', 'หมวด']
+
+    # ตั้งชื่อ columns level 0 เป็น "งวดที่ x"
+    cols = pivot_with_sum.columns.to_frame(index=False)
+    cols['งวด'] = cols['งวด'].apply(lambda x: f"งวดที่ {x}")
+    pivot_with_sum.columns = pd.MultiIndex.from_frame(cols)
+    return pivot_with_sum
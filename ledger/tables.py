@@ -0,0 +1,284 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from ledger import archive, cache, config, snapshot, trace
+from ledger.ar_index import ARCodeIndex
+from ledger.cache import cached
+from ledger.normalize import clean_columns
+from ledger.projects import registry, with_projects
+from ledger.reserve import portfolio
+from ledger.schema import apply_schema
+from ledger.spend_codes import DETAIL_COLUMNS, load_spend_table, with_details
+from ledger.store import query_table, read_summary, read_table, table_version
+from ledger.summaries import AMOUNT, COUNT, SUMMARY_KEYS, summarize
+
+# จุดเดียวที่หน้าเว็บใช้อ่านตาราง: แต่ละตารางถูกอ่าน/แปลงชนิดข้อมูล (ledger.schema) ครั้งเดียวต่อเวอร์ชัน
+# แล้วใช้ร่วมกันทุกหน้าและทุก session ใน process (เหมือน st.cache_resource) ผ่าน cache กลาง ledger.cache
+# DataFrame ที่ได้เป็นของกลาง ห้ามแก้ไขตรง ๆ ถ้าจะเพิ่ม/แก้คอลัมน์ให้ .copy() ก่อน
+
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def load(*loaders):
+    # เรียกตัวโหลดหลายตัวพร้อมกัน (เช่น tables.load(income, expense)) คืนผลตามลำดับ
+    # ตารางที่ยังไม่อยู่ใน cache จึงใช้เวลาเท่าตารางที่ช้าที่สุด แทนผลรวมของทุกตาราง
+    # - sqlite/parquet อ่านใน thread (ปล่อย GIL ระหว่างอ่าน) ไฟล์ xlsx ใหญ่แปลงใน process pool (ดู snapshot.parse_excel)
+    # - เรียกซ้อนจากใน load เองจะทำทีละตัว (กัน thread pool รอกันเองจนค้าง)
+    global _executor
+    if len(loaders) < 2 or getattr(_local, "loading", False):
+        return tuple(loader() for loader in loaders)
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(config.LOAD_THREADS, thread_name_prefix="ledger-load")
+    # ส่ง context ของผู้เรียกไปด้วย (span ที่เกิดใน thread อยู่ใต้ trace/span ของผู้เรียก ดู ledger.trace)
+    futures = [_executor.submit(contextvars.copy_context().run, _run_loader, loader) for loader in loaders]
+    return tuple(future.result() for future in futures)
+
+
+def _run_loader(loader):
+    _local.loading = True
+    try:
+        return loader()
+    finally:
+        _local.loading = False
+
+
+def clear():
+    cache.clear()
+
+
+# ตารางที่เก็บแค่รหัสค่าใช้จ่าย รายละเอียดเติมจากตารางรหัสตอนอ่าน (ledger.spend_codes.with_details)
+_SPEND_DETAIL_TABLES = ("income", "expense")
+
+# คอลัมน์วันที่ที่ query(start=..., end=...) ใช้กรองของแต่ละตาราง
+DATE_FIELDS = {
+    "income": "วันที่กรอกข้อมูล",
+    "expense": "วันที่เบิกจ่าย",
+    "reserve": "วันที่ยืม",
+    "reserve_refund": "วันที่คืนเงิน",
+    "project": "วันที่เซนสัญญา",
+}
+
+
+def _spend_version():
+    return snapshot.file_stamp(config.SPEND_LOOKUP_FILE)
+
+
+def _version(table, year=None):
+    # year = ปีที่ปิดแล้ว ใช้เวอร์ชันของไฟล์ archive ปีนั้นแทนที่เก็บหลัก
+    stamp = table_version(table) if year is None else archive.version(table, [year])
+    return (stamp, _spend_version()) if table in _SPEND_DETAIL_TABLES else stamp
+
+
+def version(name, year=None):
+    # เวอร์ชันปัจจุบันของตารางที่หน้าเว็บอ่าน (ชื่อตาราง เช่น "expense" หรือไฟล์อ้างอิง "spend_codes", "funding_sources")
+    # ใช้เป็น key ของ cache ที่สร้างต่อจากตารางนั้น เช่น search index (ledger.search) ไม่ต้อง hash เนื้อหาทุกรอบ
+    # year = ปีที่ปิดแล้ว (ตารางที่อ่านจาก archive)
+    files = {
+        "spend_codes": config.SPEND_LOOKUP_FILE,
+        "funding_sources": config.FUNDING_SOURCE_FILE,
+        "fiscal_years": config.FISCAL_YEAR_FILE,
+    }
+    if name in files:
+        return snapshot.file_stamp(files[name])
+    if name == "income_view":
+        return (_version("income", year), table_version("project"))
+    return _version(name, year)
+
+
+def _prepare(df, table):
+    # ข้อมูลในที่เก็บผ่าน ledger.normalize มาแล้วตอนบันทึก ไม่ต้อง strip ซ้ำ
+    with trace.span("prepare", table=table, rows=len(df)):
+        df = apply_schema(df, table)
+        return with_details(df, spend_codes()) if table in _SPEND_DETAIL_TABLES else df
+
+
+def _read(table, year=None):
+    if year is not None:
+        with trace.span("read", table=table, year=year):
+            return archive.read_archive(table, [year])
+    with trace.span("read", table=table):
+        return read_table(table, dtype=str)
+
+
+def _ledger(table, year=None):
+    # year = None อ่านที่เก็บหลัก (ปีที่เปิดอยู่) หรือปีที่ปิดแล้วจาก archive (ดู ledger.archive)
+    key = ("table", table) if year is None else ("table", table, year)
+    return cached(key, _version(table, year), lambda: _prepare(_read(table, year), table))
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _archive_years(table, project, fiscal_year):
+    # ปีใน archive ที่ต้องอ่าน: ปีที่ระบุ หรือปีของโครงการที่ระบุ ถ้าไม่ระบุทั้งสองอ่านแค่ที่เก็บหลัก (ปีที่เปิดอยู่)
+    closed = archive.closed_years(table) if table in archive.ARCHIVE_TABLES else []
+    if not closed:
+        return []
+    if fiscal_year is not None:
+        return [y for y in closed if y == str(fiscal_year)]
+    if project is None:
+        return []
+    years = projects().reindex(_as_list(project))["ปีงบประมาณ"].dropna().astype(str)
+    return sorted(set(years) & set(closed))
+
+
+def query(table, columns=None, project=None, fiscal_year=None, fund_type=None, payment_type=None, start=None, end=None):
+    # อ่านเฉพาะคอลัมน์/แถวที่หน้าใช้: ตัวกรองถูกส่งไปกรองในที่เก็บ (sqlite WHERE + index, parquet เฉพาะคอลัมน์)
+    # ก่อนสร้าง DataFrame หน้ารายโครงการจึงแตะแค่แถวของโครงการนั้น
+    # project = รหัสเดียวหรือ list, fiscal_year หาโครงการของปีนั้นจากทะเบียนโครงการ
+    # start/end = ช่วงวันที่ (รวมวันสุดท้าย) ของคอลัมน์ DATE_FIELDS[table]
+    where = {}
+    version = _version(table)
+    if project is not None:
+        where["รหัสโครงการวิจัย"] = list(project) if isinstance(project, (list, tuple, set)) else project
+    if fiscal_year is not None:
+        if table == "project":
+            where["ปีงบประมาณ"] = str(fiscal_year)
+        else:
+            registry = projects()
+            codes = registry.index[registry["ปีงบประมาณ"].astype(str) == str(fiscal_year)].tolist()
+            if project is not None:
+                codes = [c for c in codes if c in set(_as_list(project))]
+            where["รหัสโครงการวิจัย"] = codes
+            version = (version, table_version("project"), table_version("income"))
+    if fund_type is not None:
+        where["ประเภททุน"] = fund_type
+    if payment_type is not None:
+        where["ประเภทการจ่ายเงิน"] = payment_type
+    if start is not None or end is not None:
+        stop = None if end is None else pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        where[DATE_FIELDS[table]] = slice(None if start is None else pd.Timestamp(start), stop)
+
+    # ปีที่ปิดแล้วอยู่ใน archive: อ่านเฉพาะไฟล์ของปีที่ตัวกรองต้องใช้ (ดู ledger.archive)
+    years = _archive_years(table, project, fiscal_year)
+    if years:
+        version = (version, archive.version(table, years))
+
+    fetch = columns
+    if columns is not None and table in _SPEND_DETAIL_TABLES and any(c in DETAIL_COLUMNS for c in columns):
+        fetch = [c for c in columns if c not in DETAIL_COLUMNS] + ["รหัสค่าใช้จ่าย"]
+
+    def build():
+        with trace.span("read", table=table, where=sorted(where)):
+            df = query_table(table, columns=fetch, where=where, dtype=str)
+        if years:
+            df = pd.concat([df, archive.read_archive(table, years, fetch, where)], ignore_index=True)
+        df = _prepare(df, table)
+        return df if columns is None else df[list(columns)]
+    key = ("query", table, None if columns is None else tuple(columns), repr(where))
+    return cached(key, version, build)
+
+
+def _excel_file(path, columns):
+    def build():
+        if os.path.exists(path):
+            return clean_columns(snapshot.read_excel(path, dtype=str))
+        return pd.DataFrame(columns=columns)
+    return cached(("file", path), snapshot.file_stamp(path), build)
+
+
+def income(year=None):
+    return _ledger("income", year)
+
+
+def income_view(year=None):
+    # ตารางรายรับสำหรับแสดงผล: เติมข้อมูลระดับโครงการจากทะเบียนโครงการ คอลัมน์เหมือนตารางรายรับแบบเดิม
+    key = ("income_view",) if year is None else ("income_view", year)
+    return cached(key, version("income_view", year), lambda: with_projects(income(year), projects()))
+
+
+def expense(year=None):
+    return _ledger("expense", year)
+
+
+def reserve(year=None):
+    return _ledger("reserve", year)
+
+
+def reserve_refunds(year=None):
+    return _ledger("reserve_refund", year)
+
+
+def ar_codes():
+    return _ledger("ar")
+
+
+def projects():
+    # ทะเบียนโครงการ index = รหัสโครงการวิจัย (รวมโครงการเดิมที่ข้อมูลยังอยู่ในแถวรายรับ ดู ledger.projects)
+    version = (table_version("project"), table_version("income"))
+    return cached(("projects",), version, lambda: registry(_ledger("project"), income()))
+
+
+def project(code):
+    # ข้อมูลโครงการเดียว (Series) หรือ None ถ้าไม่มีในทะเบียน
+    df = projects()
+    return df.loc[code] if code in df.index else None
+
+
+def ar_index():
+    # index สำหรับหน้ากรอกข้อมูล: ช่องว่างเป็น ""
+    def build():
+        return ARCodeIndex(ar_codes().astype(object).fillna(""))
+    return cached(("ar_index",), table_version("ar"), build)
+
+
+def closed_years(table):
+    # ปีงบประมาณที่ปิดแล้วของตาราง (อ่านได้ด้วย income(year)/expense(year)/... หรือ query(fiscal_year=...))
+    return archive.closed_years(table)
+
+
+def _archive_summary(table, year):
+    stamp = archive.version(table, [year])
+    return cached(("archive_summary", table, year), stamp, lambda: summarize(archive.read_archive(table, [year])))
+
+
+def summary(table):
+    # ยอดรวมสำเร็จรูปของ income/expense (ดู ledger.summaries) พร้อมรายละเอียดรหัสค่าใช้จ่าย
+    # รวมยอดของปีที่ปิดแล้ว (archive) ด้วย รายงานจึงเห็นประวัติครบ
+    years = archive.closed_years(table)
+    version = (table_version(table), _spend_version(), archive.version(table, years))
+
+    def build():
+        live = read_summary(table)
+        if not years:
+            return with_details(live, spend_codes())
+        frames = [live] + [_archive_summary(table, year) for year in years]
+        merged = pd.concat([f for f in frames if len(f)] or [live], ignore_index=True)
+        merged = merged.groupby(SUMMARY_KEYS, as_index=False, sort=False)[[AMOUNT, COUNT]].sum()
+        return with_details(merged, spend_codes())
+    return cached(("summary", table), version, build)
+
+
+def reserve_portfolio(today=None, project=None):
+    # สถานะเงินยืมทุกสัญญา (ดู ledger.reserve) สถานะเลยกำหนดเปลี่ยนตามวัน จึงผูกกับวันที่ด้วย
+    # ระบุ project เพื่อคำนวณเฉพาะเงินยืมของโครงการนั้น (อ่านเฉพาะแถวของโครงการ)
+    today = pd.Timestamp.today().normalize() if today is None else pd.Timestamp(today)
+    version = (table_version("reserve"), table_version("reserve_refund"), today)
+    if project is None:
+        return cached(("reserve_portfolio",), version, lambda: portfolio(reserve(), reserve_refunds(), today))
+    return cached(
+        ("reserve_portfolio", project), version,
+        lambda: portfolio(query("reserve", project=project), query("reserve_refund", project=project), today),
+    )
+
+
+def spend_codes():
+    path = config.SPEND_LOOKUP_FILE
+    return cached(("file", path), _spend_version(), lambda: load_spend_table(path))
+
+
+def funding_sources():
+    return _excel_file(config.FUNDING_SOURCE_FILE, ["รหัสงบประมาณ"])
+
+
+def fiscal_years():
+    return _excel_file(config.FISCAL_YEAR_FILE, ["ปีงบประมาณ"])
+
@@ -0,0 +1,196 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from ledger import config
+
+# จับเวลาแบบเบา ๆ ต่อการรัน 1 ครั้ง (1 rerun ของหน้า): trace = รายการ span ซ้อนกันได้
+#   tr = trace.start("51 สรุปรายโครงการ")
+#   tr.phase("load")            # phase = span ระดับบนสุดของหน้า (load/compute/render) ต่อกันตามลำดับ
+#   with trace.span("read_excel"):   # span ย่อย ซ้อนใต้ phase/span ที่กำลังทำงาน (ใช้ได้จากโค้ดใน ledger)
+#       ...
+#   tr.finish()                 # ต่อท้ายไฟล์ config.TRACE_FILE เป็น JSON 1 บรรทัด
+# ถ้าไม่มี trace ที่กำลังทำงาน span ไม่ทำอะไร โค้ดใน ledger จึงใส่ span ไว้ได้เสมอ
+# thread ที่ tables.load สร้างได้ context ของผู้เรียก span จึงอยู่ใน trace เดียวกัน
+
+_trace = contextvars.ContextVar("ledger_trace", default=None)
+_parent = contextvars.ContextVar("ledger_span", default=None)
+_write_lock = threading.Lock()
+
+
+class Trace:
+    # span แต่ละตัวเป็น dict: name, id, parent (id), depth, start_ms (นับจากเริ่ม trace), ms
+
+    def __init__(self, page, session=None):
+        self.page = page
+        self.session = session
+        self.started = time.time()
+        self.spans = []
+        self.status = None
+        self.elapsed_ms = None
+        self._t0 = time.perf_counter()
+        self._last_ms = 0.0
+        self._phase = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status is not None
+
+    def _open(self, name, parent, attrs):
+        record = {
+            "name": name,
+            "parent": None if parent is None else parent["id"],
+            "depth": 0 if parent is None else parent["depth"] + 1,
+            "start_ms": self._now(),
+            "ms": None,
+            **attrs,
+        }
+        # span จาก thread ของ tables.load เปิดพร้อมกันได้ id ต้องไม่ซ้ำ
+        with self._lock:
+            record["id"] = len(self.spans)
+            self.spans.append(record)
+        return record
+
+    def _now(self):
+        self._last_ms = (time.perf_counter() - self._t0) * 1000
+        return self._last_ms
+
+    def _close(self, record, end_ms=None):
+        if record["ms"] is None:
+            record["ms"] = (self._now() if end_ms is None else end_ms) - record["start_ms"]
+
+    def phase(self, name, **attrs):
+        # ปิด phase เดิมแล้วเริ่ม phase ใหม่ (span ย่อยที่เกิดหลังจากนี้อยู่ใต้ phase นี้)
+        if self._phase is not None:
+            self._close(self._phase)
+        self._phase = self._open(name, None, attrs)
+        _parent.set(self._phase)
+        return self._phase
+
+    def total_ms(self):
+        return (time.perf_counter() - self._t0) * 1000
+
+    def finish(self, status="ok"):
+        # ปิดทุก span ที่ยังค้างแล้วเขียนลงไฟล์ เรียกซ้ำได้
+        # status อื่น (เช่น "stopped" หน้าหยุดด้วย st.stop) ปิดด้วยเวลาล่าสุดที่มีการบันทึก ไม่นับเวลาที่รอรอบถัดไป
+        if self.finished:
+            return self
+        end_ms = self.total_ms() if status == "ok" else self._last_ms
+        for record in self.spans:
+            self._close(record, end_ms)
+        self.status = status
+        self.elapsed_ms = end_ms
+        if _trace.get() is self:
+            _trace.set(None)
+            _parent.set(None)
+        write(self)
+        return self
+
+    def to_dict(self):
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "page": self.page,
+            "session": self.session,
+            "status": self.status,
+            "total_ms": round(self.total_ms() if self.elapsed_ms is None else self.elapsed_ms, 3),
+            "spans": [
+                {k: round(v, 3) if isinstance(v, float) else v for k, v in record.items()}
+                for record in self.spans
+            ],
+        }
+
+
+def activate(tr):
+    # ให้ tr เป็น trace ของ context ปัจจุบัน (span หลังจากนี้ถูกบันทึกลง tr)
+    _trace.set(tr)
+    _parent.set(None)
+    return tr
+
+
+def start(page, session=None):
+    return activate(Trace(page, session))
+
+
+def current():
+    return _trace.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    tr = _trace.get()
+    if tr is None or tr.finished:
+        yield None
+        return
+    record = tr._open(name, _parent.get(), attrs)
+    token = _parent.set(record)
+    try:
+        yield record
+    finally:
+        tr._close(record)
+        _parent.reset(token)
+
+
+def write(tr, path=None):
+    # ต่อท้ายไฟล์ trace (JSON lines) ถ้าไฟล์ใหญ่เกิน TRACE_MAX_BYTES ย้ายไปเป็น <ไฟล์>.1 แล้วเริ่มใหม่
+    path = config.TRACE_FILE if path is None else path
+    if not path:
+        return
+    line = json.dumps(tr.to_dict(), ensure_ascii=False) + "\n"
+    with _write_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > config.TRACE_MAX_BYTES:
+            os.replace(path, path + ".1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read(path=None):
+    # อ่าน trace ทั้งหมดจากไฟล์ (รวมไฟล์ที่ถูกย้ายไปเป็น .1) บรรทัดที่อ่านไม่ได้ข้ามไป
+    path = config.TRACE_FILE if path is None else path
+    records = []
+    for name in [path + ".1", path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def _label(record):
+    # ชื่อ span พร้อมสิ่งที่มันทำงานด้วย (key/table/file) ถ้ามี
+    for attr in ("key", "table", "file"):
+        if attr in record:
+            return f"{record['name']}[{record[attr]}]"
+    return record["name"]
+
+
+def summarize(records, page=None):
+    # สถิติเวลาต่อ (หน้า, span) จาก trace หลายรอบ: จำนวนครั้ง, mean/p50/p95/max (ms) เรียงจากช้าสุด
+    # span ระบุด้วย path จาก phase ลงไป (เช่น load/build[table:income]/read[income]) span ชื่อเดียวกันคนละที่จึงแยกกัน
+    # แถว "(ทั้งรอบ)" ของแต่ละหน้าคือเวลาทั้งรอบ
+    rows = []
+    for record in records:
+        if page is not None and page not in record["page"]:
+            continue
+        rows.append({"page": record["page"], "span": "(ทั้งรอบ)", "ms": record["total_ms"]})
+        paths = {}
+        for s in record["spans"]:
+            paths[s["id"]] = _label(s) if s["parent"] is None else f"{paths.get(s['parent'], '?')}/{_label(s)}"
+            rows.append({"page": record["page"], "span": paths[s["id"]], "ms": s["ms"]})
+    if not rows:
+        return pd.DataFrame(columns=["page", "span", "count", "mean", "p50", "p95", "max"])
+    grouped = pd.DataFrame(rows).groupby(["page", "span"])["ms"]
+    stats = grouped.agg(
+        count="count", mean="mean", p50="median", p95=lambda ms: ms.quantile(0.95), max="max"
+    ).reset_index()
+    return stats.sort_values(["page", "p95"], ascending=[True, False], ignore_index=True)
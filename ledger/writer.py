@@ -0,0 +1,192 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+import pandas as pd
+
+from ledger import config
+from ledger.store import get_store
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# รอรวมคำขอบันทึกที่เข้ามาใกล้ ๆ กันไว้เป็น commit เดียว (วินาที)
+COALESCE_WINDOW = 0.02
+
+
+@contextmanager
+def file_lock(path):
+    # advisory lock ข้าม process (หลาย worker / หลายเครื่องที่ใช้โฟลเดอร์ table ร่วมกัน)
+    with open(path, "a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class WriteQueue:
+    # คิวบันทึกข้อมูลของทั้ง process มี thread เขียนเพียงตัวเดียว
+    # - หน้าเว็บส่งแถวใหม่ {ตาราง: DataFrame} เข้าคิวแล้วได้ Future กลับไป (รอผลหรือไม่ก็ได้)
+    # - thread เขียนรวมคำขอที่มาถึงภายใน COALESCE_WINDOW เป็นชุดเดียว ต่อกันตามลำดับที่ส่ง
+    #   แล้ว commit ครั้งเดียว (store.append_many) ภายใต้ file lock จึงไม่มีแถวของใครหาย
+    # - ถ้า commit รวมไม่สำเร็จ จะลองทีละคำขอ คำขอที่ผิดจะไม่ทำให้ของคนอื่นไม่ถูกบันทึก
+    # - คำขอที่ถูกยกเลิก (Future.cancel) ก่อนถึงคิวจะถูกข้าม เมื่อเริ่ม commit แล้วยกเลิกไม่ได้
+
+    def __init__(self, store=None, lock_path=config.LOCK_FILE, window=COALESCE_WINDOW):
+        self._store = store
+        self._lock_path = lock_path
+        self._window = window
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, batches):
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((batches, future))
+        return future
+
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(batches, future) for batches, future in self._next_batch() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # เช่น เปิดไฟล์ lock ไม่ได้ แจ้งทุกคำขอในชุดที่ยังไม่มีผล แล้วทำงานต่อ
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch):
+        store = self._store or get_store()
+        with file_lock(self._lock_path):
+            try:
+                store.append_many(_combine([batches for batches, _ in batch]))
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                for batches, future in batch:
+                    try:
+                        store.append_many(_combine([batches]))
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(_row_count(batches))
+            else:
+                for batches, future in batch:
+                    future.set_result(_row_count(batches))
+
+
+def _combine(requests):
+    # รวมแถวของหลายคำขอเป็นตารางละ DataFrame เดียว (ลำดับตามที่ส่งเข้าคิว)
+    frames = {}
+    for batches in requests:
+        for table, df in batches.items():
+            if not df.empty:
+                frames.setdefault(table, []).append(df)
+    return {table: pd.concat(dfs, ignore_index=True) if len(dfs) > 1 else dfs[0] for table, dfs in frames.items()}
+
+
+def _row_count(batches):
+    return sum(len(df) for df in batches.values())
+
+
+class Transaction:
+    # รวบรวมแถวของหลายตารางไว้ก่อน แล้ว commit พร้อมกันครั้งเดียวตอนจบ with transaction()
+
+    def __init__(self):
+        self._frames = {}
+
+    def append(self, table, df):
+        self._frames.setdefault(table, []).append(df)
+
+    def batches(self):
+        return {table: pd.concat(dfs, ignore_index=True) for table, dfs in self._frames.items()}
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            os.makedirs(os.path.dirname(config.LOCK_FILE) or ".", exist_ok=True)
+            _writer = WriteQueue()
+    return _writer
+
+
+def submit_rows(table, df):
+    # ส่งแถวใหม่เข้าคิวบันทึก คืน Future (result() = จำนวนแถวที่บันทึก)
+    return get_writer().submit({table: df})
+
+
+def _wait(future, timeout):
+    # รอผลการบันทึก ถ้าเกิน timeout ขณะคำขอยังรออยู่ในคิว จะยกเลิกคำขอแล้ว raise TimeoutError (ไม่ถูกบันทึกแน่นอน ลองใหม่ได้)
+    # ถ้า thread เขียนเริ่ม commit คำขอนี้ไปแล้ว ยกเลิกไม่ได้ จะรอจน commit นั้นจบแล้วคืนผลตามจริง
+    # จึงไม่มีกรณีที่ได้ TimeoutError แต่แถวถูกบันทึกภายหลัง (ผู้ใช้กดบันทึกซ้ำแล้วได้แถวซ้ำ)
+    # Python 3.10 ใช้ concurrent.futures.TimeoutError แยกจาก TimeoutError ของระบบ (3.11 ขึ้นไปเป็นคลาสเดียวกัน)
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        if future.cancel():
+            raise
+        return future.result()
+
+
+def append_rows(table, df, timeout=60):
+    # บันทึกแล้วรอจนกว่าจะ commit เสร็จ ถ้าบันทึกไม่สำเร็จจะ raise ข้อผิดพลาดเดิม (timeout ดู _wait)
+    return _wait(submit_rows(table, df), timeout)
+
+
+@contextmanager
+def transaction(timeout=60):
+    # with transaction() as tx:
+    #     tx.append("expense", expense_rows)
+    #     tx.append("reserve", reserve_rows)
+    # ทุกตารางถูกบันทึกใน commit เดียว ถ้าเกิดข้อผิดพลาดในบล็อก with จะไม่บันทึกอะไรเลย
+    tx = Transaction()
+    yield tx
+    _wait(get_writer().submit(tx.batches()), timeout)
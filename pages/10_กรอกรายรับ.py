@@ -1,62 +1,20 @@
 import streamlit as st
 from datetime import datetime
 import pandas as pd
-import os
-from openpyxl import load_workbook
 import re
+from ledger import tables, transaction
+from ledger.spend_codes import get_spend_index
+from ui import page_trace
 
-FUND_FILE = "table/income_data.xlsx"
-AR_LOOKUP_FILE = "table/ar_code.xlsx"
-SPEND_LOOKUP_FILE = "table/unique_spend_code.csv"
-FUNDING_SOURCE_FILE = "table/funding_source.xlsx"
-FISCAL_YEAR_FILE = "table/fiscal_year.xlsx"
-
+timing = page_trace("10 กรอกรายรับ")
 
 if st.session_state.get("reset_flag", False):
     st.session_state.clear()
     st.session_state["just_reset"] = True
     st.rerun()
 
-@st.cache_data(ttl=60)
-def load_ar_lookup():
-    if os.path.exists(AR_LOOKUP_FILE):
-        df = pd.read_excel(AR_LOOKUP_FILE, dtype=str).fillna("")
-        df.columns = df.columns.str.strip().str.replace("\ufeff", "", regex=False)
-        df = df.apply(lambda col: col.map(lambda x: x.strip() if isinstance(x, str) else x))
-        return df
-    return pd.DataFrame(columns=["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย"])
-@st.cache_data
-def load_spend_lookup():
-    if os.path.exists(SPEND_LOOKUP_FILE):
-        return pd.read_csv(SPEND_LOOKUP_FILE, dtype=str).fillna("")
-    return pd.DataFrame(columns=["รหัสค่าใช้จ่าย", "หมวดรายจ่าย", "รายการ", "ประเภทค่าใช้จ่าย"])
-
-@st.cache_data
-def load_funding_source_data():
-    if os.path.exists(FUNDING_SOURCE_FILE):
-        return pd.read_excel(FUNDING_SOURCE_FILE, dtype=str).fillna("")
-    return pd.DataFrame(columns=["รหัสงบประมาณ"])
-
-@st.cache_data
-def load_fiscal_year_data():
-    if os.path.exists(FISCAL_YEAR_FILE):
-        return pd.read_excel(FISCAL_YEAR_FILE, dtype=str).fillna("")
-    return pd.DataFrame(columns=["ปีงบประมาณ"])
-
 def lookup_spend_detail(spend_code):
-    df = load_spend_lookup()
-    matched = df[df["รหัสค่าใช้จ่าย"] == spend_code.strip()]
-    if not matched.empty:
-        return matched.iloc[0]["หมวดรายจ่าย"], matched.iloc[0]["รายการ"], matched.iloc[0]["ประเภทค่าใช้จ่าย"]
-    return "", "", ""
-
-def save_to_excel(df, filename):
-    df.to_excel(filename, index=False)
-    wb = load_workbook(filename)
-    ws = wb.active
-    for cell in ws['A']:
-        cell.number_format = 'YYYY-MM-DD HH:mm:ss'
-    wb.save(filename)
+    return spend_index.lookup(spend_code)
 
 # --- Session State Setup ---
 def init_session():
@@ -85,6 +43,7 @@ def remove_round():
     if len(st.session_state.rounds) > 1:
         last = st.session_state.rounds.pop()
         st.session_state.pop(f"round_{last}_codes", None)
+        st.session_state.pop(f"round_{last}_total", None)
 
 def add_code(r_idx):
     st.session_state[f"round_{r_idx}_codes"].append(
@@ -125,13 +84,14 @@ st.set_page_config(page_title="ระบบบันทึกทุนโคร
 st.markdown('<div class="title-style">📋 ระบบบันทึกทุนโครงการวิจัย</div>', unsafe_allow_html=True)
 st.write("")
 # --- Main App UI ---
-ar_lookup = load_ar_lookup()
-spend_lookup = load_spend_lookup()
-fund_source_df = load_funding_source_data()
+# ตารางอ้างอิงไม่ขึ้นต่อกัน โหลดพร้อมกัน
+timing.phase("load")
+ar_index, spend_index, fund_source_df, fiscal_year_df = tables.load(
+    tables.ar_index, get_spend_index, tables.funding_sources, tables.fiscal_years
+)
 fund_type_list = ["","ทุนภายใน", "ทุนภายนอก"]
 fund_source_list1 = sorted(fund_source_df["รหัสงบประมาณ"].dropna().unique().tolist())
 fund_source_list2 = [""] + fund_source_list1  # หรือ ["กรุณาเลือก"] + fund_source_list
-fiscal_year_df = load_fiscal_year_data()
 fiscal_year_list1 = sorted(fiscal_year_df["ปีงบประมาณ"].dropna().unique().tolist())
 fiscal_year_list2 = [""] + fiscal_year_list1  # หรือ ["กรุณาเลือก"] + fund_source_list
 st.set_page_config(page_title="ระบบบันทึกทุนโครงการวิจัย", layout="wide")
@@ -152,7 +112,7 @@ if st.session_state.get("fund_source", "") not in fund_source_list2:
 if st.session_state.get("fiscal_year", "") not in fiscal_year_list2:
     st.session_state.fiscal_year = fiscal_year_list2[0] if fiscal_year_list2 else ""
 
-
+timing.phase("render")
 st.session_state.fund_date = st.date_input("วันที่กรอกข้อมูล", value=st.session_state.fund_date)
 st.session_state.fiscal_year = st.selectbox("ปีงบประมาณ",fiscal_year_list2,index=fiscal_year_list2.index(st.session_state.fiscal_year))
 st.session_state.fund_project_code = st.text_input("รหัสโครงการวิจัย", value=st.session_state.fund_project_code).strip().upper()
@@ -181,11 +141,47 @@ if not re.match(pattern_contract_code, st.session_state.contract_code):
 
 
 fund_project_code = st.session_state.fund_project_code
-project_ar_codes = ar_lookup[ar_lookup["รหัสโครงการวิจัย"].str.upper() == fund_project_code]["ar_code"].unique().tolist()
+project_ar_codes = ar_index.ar_codes(fund_project_code)
 has_ar = len(project_ar_codes) > 0
 
 # --- รอบ (งวด)
-for r_idx in st.session_state.rounds:
+# แต่ละงวดและแถบยอดรวมเป็น fragment ของตัวเอง: พิมพ์/แก้ในงวดไหน rerun แค่งวดนั้น (ไม่โหลดตารางหรือวาดงวดอื่นใหม่)
+# ยอดรวมของแต่ละงวดเก็บใน session_state (round_<n>_total) แถบยอดรวมจึงรวมแค่ตัวเลขงวดละค่า
+TOTALS_FRAGMENT = "totals_bar"
+
+
+def round_total(r_idx):
+    # ยอดรวมของงวดจากค่าที่กรอกไว้ใน session_state
+    total_amt = 0.0
+    if has_ar:
+        # ยอดจาก ar_code
+        ar_selected_list = st.session_state.get(f"ar_{r_idx}_multi", [])
+        for ar_idx, ar_code in enumerate(ar_selected_list):
+            for idx, _ in ar_index.rows(fund_project_code, ar_code):
+                total_amt += st.session_state.get(f"amt_{r_idx}_{ar_idx}_{idx}", 0.0)
+
+        # ยอดจากรหัสค่าใช้จ่ายอิสระนอกกลุ่ม ar_code
+        for c_idx in st.session_state.get(f"round_{r_idx}_codes", [0]):
+            total_amt += st.session_state.get(f"amt_free_{r_idx}_{c_idx}", 0.0)
+    else:
+        # กรณีไม่มี ar_code
+        for c_idx in st.session_state.get(f"round_{r_idx}_codes", [0]):
+            total_amt += st.session_state.get(f"amt_{r_idx}_{c_idx}", 0.0)
+    return total_amt
+
+
+def round_changed(r_idx):
+    # จำนวนเงิน/AR code ของงวดเปลี่ยน: คำนวณยอดงวดใหม่ แล้ว rerun แค่งวดนี้กับแถบยอดรวม
+    st.session_state[f"round_{r_idx}_total"] = round_total(r_idx)
+    st.rerun([f"round_{r_idx}", TOTALS_FRAGMENT])
+
+
+def code_removed(r_idx, c_idx):
+    remove_code(r_idx, c_idx)
+    round_changed(r_idx)
+
+
+def round_block(r_idx):
     with st.expander(f"📦 งวดที่ {r_idx+1}", expanded=True):
         st.markdown(f"### รายละเอียดงวดที่ {r_idx+1}")
 
@@ -195,17 +191,12 @@ for r_idx in st.session_state.rounds:
 
         if has_ar:
             # 1. ส่วน ar_code ตามเดิม
-            ar_selected_list = st.multiselect(f"🔗 เลือก AR code สำหรับงวดที่ {r_idx+1}", project_ar_codes, key=f"ar_{r_idx}_multi")
+            ar_selected_list = st.multiselect(f"🔗 เลือก AR code สำหรับงวดที่ {r_idx+1}", project_ar_codes, key=f"ar_{r_idx}_multi", on_change=round_changed, args=(r_idx,))
             for ar_idx, ar_selected in enumerate(ar_selected_list):
                 st.markdown(f'#### 🎯 AR code: {ar_selected}')
-                rows = ar_lookup[
-                    (ar_lookup["รหัสโครงการวิจัย"] == fund_project_code) &
-                    (ar_lookup["ar_code"] == ar_selected)
-                ]
-                for i, row in rows.iterrows():
-                    spend = row["รหัสค่าใช้จ่าย"]
-                    cat, item, cost_type = lookup_spend_detail(spend)
-
+                rows = ar_index.rows(fund_project_code, ar_selected)
+                details = spend_index.lookup_many(spend for _, spend in rows)
+                for (i, spend), (cat, item, cost_type) in zip(rows, details):
                     col1, col2 = st.columns([2, 3])
                     with col1:
                         st.text_input("🔢 รหัสค่าใช้จ่าย", value=spend, key=f"code_{r_idx}_{ar_idx}_{i}", disabled=True)
@@ -213,74 +204,40 @@ for r_idx in st.session_state.rounds:
                         st.text_input("📂 หมวดรายจ่าย", value=cat, key=f"cat_{r_idx}_{ar_idx}_{i}", disabled=True)
                         st.text_input("📌 รายการ", value=item, key=f"item_{r_idx}_{ar_idx}_{i}", disabled=True)
                         st.text_input("🧾 ประเภทค่าใช้จ่าย", value=cost_type, key=f"cost_{r_idx}_{ar_idx}_{i}", disabled=True)
-                        st.number_input("💰 จำนวนเงิน", min_value=0.0, step=100.0, key=f"amt_{r_idx}_{ar_idx}_{i}")
+                        st.number_input("💰 จำนวนเงิน", min_value=0.0, step=100.0, key=f"amt_{r_idx}_{ar_idx}_{i}", on_change=round_changed, args=(r_idx,))
 
             # 2. ส่วนเพิ่มรหัสค่าใช้จ่ายนอก ar code (เหมือนตอนไม่มี ar code)
             st.markdown("#### ➕ เพิ่มรหัสค่าใช้จ่ายนอกกลุ่ม AR code")
-            for c_idx in st.session_state[key_codes]:
-                code_col, detail_col = st.columns([2, 5])
-                with code_col:
-                    code = st.text_input(f"🔢 รหัสค่าใช้จ่าย (งวด {r_idx+1} รายการ {c_idx+1})", key=f"round_{r_idx}_code_{c_idx}")
-                cat, item, cost_type = lookup_spend_detail(code)
-                with detail_col:
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.text_input("📂 หมวดรายจ่าย", value=cat, key=f"cat_{r_idx}_{c_idx}")
-                        st.text_input("📌 รายการ", value=item, key=f"item_{r_idx}_{c_idx}")
-                        st.text_input("🧾 ประเภทค่าใช้จ่าย", value=cost_type, key=f"cost_{r_idx}_{c_idx}")
-                        st.number_input("💰 จำนวนเงิน", min_value=0.0, step=100.0, key=f"amt_free_{r_idx}_{c_idx}")
-                if c_idx != 0:
-                    if st.button(f"➖ ลบรายการ (งวด {r_idx+1} รายการ {c_idx+1})", key=f"btn_remove_{r_idx}_{c_idx}"):
-                        remove_code(r_idx, c_idx)
-                        st.rerun()
-            if st.button(f"➕ เพิ่มรหัสค่าใช้จ่าย (งวด {r_idx+1})", key=f"btn_add_code_{r_idx}"):
-                add_code(r_idx)
-                st.rerun()
-
+            amount_key = "amt_free"
         else:
             # กรณีไม่มี ar code เหมือนเดิม
-            for c_idx in st.session_state[key_codes]:
-                code_col, detail_col = st.columns([2, 5])
-                with code_col:
-                    code = st.text_input(f"🔢 รหัสค่าใช้จ่าย (งวด {r_idx+1} รายการ {c_idx+1})", key=f"round_{r_idx}_code_{c_idx}")
-                cat, item, cost_type = lookup_spend_detail(code)
-                with detail_col:
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.text_input("📂 หมวดรายจ่าย", value=cat, key=f"cat_{r_idx}_{c_idx}")
-                        st.text_input("📌 รายการ", value=item, key=f"item_{r_idx}_{c_idx}")
-                        st.text_input("🧾 ประเภทค่าใช้จ่าย", value=cost_type, key=f"cost_{r_idx}_{c_idx}")
-                        st.number_input("💰 จำนวนเงิน", min_value=0.0, step=100.0, key=f"amt_{r_idx}_{c_idx}")
-                if c_idx != 0:
-                    if st.button(f"➖ ลบรายการ (งวด {r_idx+1} รายการ {c_idx+1})", key=f"btn_remove_{r_idx}_{c_idx}"):
-                        remove_code(r_idx, c_idx)
-                        st.rerun()
-            if st.button(f"➕ เพิ่มรหัสค่าใช้จ่าย (งวด {r_idx+1})", key=f"btn_add_code_{r_idx}"):
-                add_code(r_idx)
-                st.rerun()
-        # รวมยอดแต่ละงวด
-        total_amt = 0.0
-        if has_ar:
-            # ยอดจาก ar_code
-            ar_selected_list = st.session_state.get(f"ar_{r_idx}_multi", [])
-            for ar_idx, ar_code in enumerate(ar_selected_list):
-                rows = ar_lookup[
-                    (ar_lookup["รหัสโครงการวิจัย"] == fund_project_code) &
-                    (ar_lookup["ar_code"] == ar_code)
-                ]
-                for idx, _ in rows.iterrows():
-                    total_amt += st.session_state.get(f"amt_{r_idx}_{ar_idx}_{idx}", 0.0)
-
-            # ยอดจากรหัสค่าใช้จ่ายอิสระนอกกลุ่ม ar_code
-            for c_idx in st.session_state.get(f"round_{r_idx}_codes", [0]):
-                total_amt += st.session_state.get(f"amt_free_{r_idx}_{c_idx}", 0.0)
+            amount_key = "amt"
+        for c_idx in st.session_state[key_codes]:
+            code_col, detail_col = st.columns([2, 5])
+            with code_col:
+                code = st.text_input(f"🔢 รหัสค่าใช้จ่าย (งวด {r_idx+1} รายการ {c_idx+1})", key=f"round_{r_idx}_code_{c_idx}")
+            cat, item, cost_type = lookup_spend_detail(code)
+            with detail_col:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.text_input("📂 หมวดรายจ่าย", value=cat, key=f"cat_{r_idx}_{c_idx}", disabled=True)
+                    st.text_input("📌 รายการ", value=item, key=f"item_{r_idx}_{c_idx}", disabled=True)
+                    st.text_input("🧾 ประเภทค่าใช้จ่าย", value=cost_type, key=f"cost_{r_idx}_{c_idx}", disabled=True)
+                    st.number_input("💰 จำนวนเงิน", min_value=0.0, step=100.0, key=f"{amount_key}_{r_idx}_{c_idx}", on_change=round_changed, args=(r_idx,))
+            if c_idx != 0:
+                st.button(f"➖ ลบรายการ (งวด {r_idx+1} รายการ {c_idx+1})", key=f"btn_remove_{r_idx}_{c_idx}", on_click=code_removed, args=(r_idx, c_idx))
+        # รายการใหม่ยังไม่มีจำนวนเงิน ยอดรวมไม่เปลี่ยน rerun แค่งวดนี้
+        st.button(f"➕ เพิ่มรหัสค่าใช้จ่าย (งวด {r_idx+1})", key=f"btn_add_code_{r_idx}", on_click=add_code, args=(r_idx,))
 
-        else:
-            # กรณีไม่มี ar_code
-            for c_idx in st.session_state.get(f"round_{r_idx}_codes", [0]):
-                total_amt += st.session_state.get(f"amt_{r_idx}_{c_idx}", 0.0)
+        # รวมยอดแต่ละงวด
+        total_amt = round_total(r_idx)
+        st.session_state[f"round_{r_idx}_total"] = total_amt
         st.info(f"💵 ยอดรวมงวดที่ {r_idx+1}: {total_amt:,.2f} บาท")
 
+
+for r_idx in st.session_state.rounds:
+    st.fragment(round_block, key=f"round_{r_idx}")(r_idx)
+
 # ปุ่มเพิ่ม/ลบงวด
 cols = st.columns([8, 1, 1])
 cols[1].button("➕ เพิ่มงวด", on_click=add_round, key="btn_add_round")
@@ -299,28 +256,15 @@ def reset_form():
     st.session_state["just_reset"] = True
     st.rerun()
 
-total_all = 0.0
-for r_idx in st.session_state.rounds:
-    if has_ar:
-        # ยอดจาก ar_code
-        ar_selected_list = st.session_state.get(f"ar_{r_idx}_multi", [])
-        for ar_idx, ar_code in enumerate(ar_selected_list):
-            rows = ar_lookup[
-                (ar_lookup["รหัสโครงการวิจัย"] == fund_project_code) &
-                (ar_lookup["ar_code"] == ar_code)
-            ]
-            for idx, _ in rows.iterrows():
-                total_all += st.session_state.get(f"amt_{r_idx}_{ar_idx}_{idx}", 0.0)
 
-        # ยอดจากรหัสค่าใช้จ่ายอิสระนอกกลุ่ม ar_code
-        for c_idx in st.session_state.get(f"round_{r_idx}_codes", [0]):
-            total_all += st.session_state.get(f"amt_free_{r_idx}_{c_idx}", 0.0)
-    else:
-        for c_idx in st.session_state.get(f"round_{r_idx}_codes", [0]):
-            total_all += st.session_state.get(f"amt_{r_idx}_{c_idx}", 0.0)
+@st.fragment(key=TOTALS_FRAGMENT)
+def totals_bar():
+    total_all = sum(st.session_state.get(f"round_{r_idx}_total", 0.0) for r_idx in st.session_state.rounds)
+    st.markdown("---")
+    st.markdown(f"## 💰 ยอดรวมทั้งหมด: {total_all:,.2f} บาท")
 
-st.markdown("---")
-st.markdown(f"## 💰 ยอดรวมทั้งหมด: {total_all:,.2f} บาท")
+
+totals_bar()
 
 
 form_valid  = (
@@ -340,6 +284,7 @@ if not form_valid:
 
 # ปุ่มบันทึก (จะ disabled ถ้าไม่ valid)
 if st.button("💾 บันทึกข้อมูลทุนทั้งหมด", disabled=not form_valid, key="btn_save_all"):
+    timing.phase("save")
     all_rows = []
     for r_idx in st.session_state.rounds:
         round_num = r_idx + 1
@@ -347,29 +292,15 @@ if st.button("💾 บันทึกข้อมูลทุนทั้งห
             # บันทึกรายการจาก ar_code ตามเดิม
             ar_selected_list = st.session_state.get(f"ar_{r_idx}_multi", [])
             for ar_idx, ar_code in enumerate(ar_selected_list):
-                rows = ar_lookup[
-                    (ar_lookup["รหัสโครงการวิจัย"] == fund_project_code) &
-                    (ar_lookup["ar_code"] == ar_code)
-                ]
-                for idx, row in rows.iterrows():
-                    spend = row["รหัสค่าใช้จ่าย"]
-                    cat, item, cost_type = lookup_spend_detail(spend)
+                for idx, spend in ar_index.rows(fund_project_code, ar_code):
                     amt = st.session_state.get(f"amt_{r_idx}_{ar_idx}_{idx}", 0.0)
                     all_rows.append({
                         "วันที่กรอกข้อมูล": datetime.combine(st.session_state.fund_date, datetime.now().time()),
-                        "ปีงบประมาณ" : st.session_state.fiscal_year,
                         "รหัสโครงการวิจัย": fund_project_code,
                         "ประเภททุน": st.session_state.fund_type,
-                        "รหัสงบประมาณ" : st.session_state.fund_source,
-                        "วันที่เซนสัญญา": st.session_state.contract_date,
-                        "ระยะเวลาดำเนินโครงการ (เดือน)": st.session_state.duration_months,
-                        "รหัสสัญญา": st.session_state.contract_code,
                         "งวด": round_num,
                         "ar_code": ar_code,
                         "รหัสค่าใช้จ่าย": spend,
-                        "หมวดรายจ่าย": cat,
-                        "รายการ": item,
-                        "ประเภทค่าใช้จ่าย": cost_type,
                         "จำนวนเงิน": amt
                     })
             # **เพิ่มบันทึกรหัสค่าใช้จ่ายนอกกลุ่ม AR code ด้วย**
@@ -377,25 +308,14 @@ if st.button("💾 บันทึกข้อมูลทุนทั้งห
                 code = st.session_state.get(f"round_{r_idx}_code_{c_idx}", "").strip()
                 if code == "":
                     continue
-                cat = st.session_state.get(f"cat_{r_idx}_{c_idx}", "")
-                item = st.session_state.get(f"item_{r_idx}_{c_idx}", "")
-                cost_type = st.session_state.get(f"cost_{r_idx}_{c_idx}", "")
                 amt = st.session_state.get(f"amt_free_{r_idx}_{c_idx}", 0.0)
                 all_rows.append({
                     "วันที่กรอกข้อมูล": datetime.combine(st.session_state.fund_date, datetime.now().time()),
-                    "ปีงบประมาณ" : st.session_state.fiscal_year,
                     "รหัสโครงการวิจัย": fund_project_code,
                     "ประเภททุน": st.session_state.fund_type,
-                    "รหัสงบประมาณ" : st.session_state.fund_source,
-                    "วันที่เซนสัญญา": st.session_state.contract_date,
-                    "ระยะเวลาดำเนินโครงการ (เดือน)": st.session_state.duration_months,
-                    "รหัสสัญญา": st.session_state.contract_code,
                     "งวด": round_num,
                     "ar_code": "",  # ไม่มี ar_code สำหรับรหัสนอกกลุ่ม
                     "รหัสค่าใช้จ่าย": code,
-                    "หมวดรายจ่าย": cat,
-                    "รายการ": item,
-                    "ประเภทค่าใช้จ่าย": cost_type,
                     "จำนวนเงิน": amt
                 })
         else:
@@ -404,37 +324,32 @@ if st.button("💾 บันทึกข้อมูลทุนทั้งห
                 code = st.session_state.get(f"round_{r_idx}_code_{c_idx}", "").strip()
                 if code == "":
                     continue
-                cat = st.session_state.get(f"cat_{r_idx}_{c_idx}", "")
-                item = st.session_state.get(f"item_{r_idx}_{c_idx}", "")
-                cost_type = st.session_state.get(f"cost_{r_idx}_{c_idx}", "")
                 amt = st.session_state.get(f"amt_{r_idx}_{c_idx}", 0.0)
                 all_rows.append({
                     "วันที่กรอกข้อมูล": datetime.combine(st.session_state.fund_date, datetime.now().time()),
-                    "ปีงบประมาณ" : st.session_state.fiscal_year,
                     "รหัสโครงการวิจัย": fund_project_code,
                     "ประเภททุน": st.session_state.fund_type,
-                    "รหัสงบประมาณ" : st.session_state.fund_source,
-                    "วันที่เซนสัญญา": st.session_state.contract_date,
-                    "ระยะเวลาดำเนินโครงการ (เดือน)": st.session_state.duration_months,
-                    "รหัสสัญญา": st.session_state.contract_code,
                     "งวด": round_num,
                     "ar_code": "",
                     "รหัสค่าใช้จ่าย": code,
-                    "หมวดรายจ่าย": cat,
-                    "รายการ": item,
-                    "ประเภทค่าใช้จ่าย": cost_type,
                     "จำนวนเงิน": amt
                 })
 
     if all_rows:
-        df = pd.DataFrame(all_rows)
-        if os.path.exists(FUND_FILE):
-            old_df = pd.read_excel(FUND_FILE)
-            df = pd.concat([old_df, df], ignore_index=True)
-
-        save_to_excel(df, FUND_FILE)
+        # ข้อมูลระดับโครงการบันทึกในทะเบียนโครงการแถวเดียว (แถวรายรับเก็บแค่รหัสโครงการ)
+        project_row = {
+            "วันที่กรอกข้อมูล": datetime.combine(st.session_state.fund_date, datetime.now().time()),
+            "รหัสโครงการวิจัย": fund_project_code,
+            "ปีงบประมาณ": st.session_state.fiscal_year,
+            "รหัสงบประมาณ": st.session_state.fund_source,
+            "วันที่เซนสัญญา": st.session_state.contract_date,
+            "ระยะเวลาดำเนินโครงการ (เดือน)": st.session_state.duration_months,
+            "รหัสสัญญา": st.session_state.contract_code,
+        }
+        with transaction() as tx:
+            tx.append("project", pd.DataFrame([project_row]))
+            tx.append("income", pd.DataFrame(all_rows))
         st.success("✅ บันทึกข้อมูลทุนทั้งหมดเรียบร้อยแล้ว")
-        st.cache_data.clear()
         
         st.session_state["__tmp_new_rows__"] = all_rows
         reset_form()
@@ -456,3 +371,5 @@ if "new_rows" in st.session_state:
     new_rows_df = pd.DataFrame(st.session_state["new_rows"])
     st.subheader("📋 ข้อมูลที่เพิ่งเพิ่มล่าสุด")
     st.dataframe(new_rows_df.astype(str))
+
+timing.finish()
@@ -1,27 +1,11 @@
 import streamlit as st
 import pandas as pd
-import os
 import re
-
-SPEND_LOOKUP_FILE = "table/unique_spend_code.csv"
-AR_FILE = "table/ar_code.xlsx"
-
-@st.cache_data
-def load_spend_lookup():
-    if os.path.exists(SPEND_LOOKUP_FILE):
-        return pd.read_csv(SPEND_LOOKUP_FILE, dtype=str).fillna("")
-    return pd.DataFrame(columns=["รหัสค่าใช้จ่าย", "หมวดรายจ่าย", "รายการ", "ประเภทค่าใช้จ่าย"])
-
-
-def load_ar_data():
-    if os.path.exists(AR_FILE):
-        return pd.read_excel(AR_FILE, dtype=str).fillna("")
-    return pd.DataFrame(columns=["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย"])
+from ledger import append_rows, tables
+from ui import page_trace
 
 def save_ar_data(new_rows):
-    old = load_ar_data()
-    combined = pd.concat([old, new_rows], ignore_index=True)
-    combined.to_excel(AR_FILE, index=False)
+    append_rows("ar", new_rows)
 
 
 def reset_form():
@@ -38,6 +22,8 @@ def reset_form():
 
 
 # --- UI ---
+timing = page_trace("12 กรอก AR code")
+
 st.set_page_config(page_title="เพิ่ม AR Code หลายชุด", layout="wide")
 st.title("📌 เพิ่ม AR Code สำหรับโครงการวิจัย")
 
@@ -53,7 +39,9 @@ if "saved_successfully" in st.session_state:
     st.success(f"✅ บันทึก AR Codes สำหรับโครงการ {st.session_state['saved_successfully']} แล้ว")
     del st.session_state["saved_successfully"]
 
-spend_df = load_spend_lookup()
+timing.phase("load")
+spend_df = tables.spend_codes()
+timing.phase("render")
 
 # --- รหัสโครงการหลัก ---
 if "reset_project_code" in st.session_state and st.session_state["reset_project_code"]:
@@ -107,8 +95,11 @@ if st.button("➕ เพิ่ม AR Code ใหม่"):
 
 # --- บันทึกทั้งหมด ---
 if st.button("💾 บันทึก AR Codes ทั้งหมด"):
+    timing.phase("save")
     if not project_code.strip():
         st.warning("กรุณากรอกรหัสโครงการวิจัย")
+    elif not re.match(pattern_project_code, project_code.strip()):
+        st.error("❌ รหัสโครงการวิจัยไม่ถูกต้อง (รูปแบบ EXXXX_XXX) ยังไม่ได้บันทึกข้อมูล")
     else:
         all_rows = []
         for i in st.session_state.ar_sets:
@@ -124,14 +115,17 @@ if st.button("💾 บันทึก AR Codes ทั้งหมด"):
 
         if all_rows:
             df = pd.DataFrame(all_rows)
-            save_ar_data(df)
-
-            # เตรียมแสดงข้อมูลล่าสุดในรอบถัดไป
-            st.session_state["saved_successfully"] = project_code.strip()
-            st.session_state["__tmp_new_rows__"] = all_rows
-            reset_form()
-            st.rerun()
-            # st.cache_data.clear()
+            try:
+                save_ar_data(df)
+            except Exception as e:
+                st.error(f"❌ ไม่สามารถบันทึก AR Codes ได้: {e}")
+            else:
+                # เตรียมแสดงข้อมูลล่าสุดในรอบถัดไป
+                st.session_state["saved_successfully"] = project_code.strip()
+                st.session_state["__tmp_new_rows__"] = all_rows
+                reset_form()
+                st.rerun()
+                # st.cache_data.clear()
         else:
             st.warning("กรุณากรอก AR code และเลือกรหัสค่าใช้จ่ายอย่างน้อย 1 ชุด")
 
@@ -144,3 +138,5 @@ if "new_rows" in st.session_state:
 
 for key in list(st.session_state.keys()):
     del st.session_state[key]
+
+timing.finish()
@@ -1,20 +1,17 @@
 import streamlit as st
 import pandas as pd
-import os
+from ledger import tables
+from ledger.search import search_index
+from ui import fiscal_year_select, page_trace, paged_dataframe
 
-FILENAME = "table/income_data.xlsx"
-
-@st.cache_data
-def load_data():
-    if os.path.exists(FILENAME):
-        return pd.read_excel(FILENAME, dtype=str)
-    else:
-        return pd.DataFrame()
+timing = page_trace("31 ตารางรายรับ")
 
 st.set_page_config(page_title="ตารางรายรับ", layout="wide")
 st.title("📊 ตารางข้อมูลรายรับ")
 
-df = load_data()
+timing.phase("load")
+year = fiscal_year_select("income", key="income_year")
+df = tables.income_view(year)
 
 if df.empty:
     st.info("ยังไม่มีข้อมูลให้แสดง")
@@ -23,24 +20,29 @@ else:
     search_text = st.text_input("🔎 ค้นหารหัสหรือคำที่เกี่ยวข้อง", "")
 
     # กรองข้อมูล
+    timing.phase("search")
     if search_text:
-        filtered_df = df[df.apply(lambda row: row.astype(str).str.contains(search_text, case=False, na=False).any(), axis=1)]
+        filtered_df = search_index(("income", year), df, tables.version("income_view", year)).filter(df, search_text)
     else:
         filtered_df = df
 
+    timing.phase("render")
     st.markdown(f"📌 พบทั้งหมด {len(filtered_df):,} รายการที่ตรงกับการค้นหา")
 
-    # ใช้ pandas Styler เพื่อ wrap text ใน header
-    styled_df = filtered_df.style.set_table_styles(
-        [{
-            'selector': 'th',
-            'props': [
-                ('white-space', 'normal'),   # ให้ข้อความ header ขึ้นบรรทัดใหม่ได้
-                ('max-width', '150px'),      # กำหนดความกว้างสูงสุดของ header cell ปรับได้ตามชอบ
-                ('text-align', 'center'),
-                ('vertical-align', 'middle'),
-            ]
-        }]
-    )
-
-    st.dataframe(styled_df, use_container_width=True)
+    # ใช้ pandas Styler เพื่อ wrap text ใน header (เฉพาะแถวในหน้าที่แสดง)
+    def header_style(page_df):
+        return page_df.style.set_table_styles(
+            [{
+                'selector': 'th',
+                'props': [
+                    ('white-space', 'normal'),   # ให้ข้อความ header ขึ้นบรรทัดใหม่ได้
+                    ('max-width', '150px'),      # กำหนดความกว้างสูงสุดของ header cell ปรับได้ตามชอบ
+                    ('text-align', 'center'),
+                    ('vertical-align', 'middle'),
+                ]
+            }]
+        )
+
+    paged_dataframe(filtered_df, key="income_table", style=header_style, width="stretch")
+
+timing.finish()
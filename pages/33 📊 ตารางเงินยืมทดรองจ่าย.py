@@ -1,30 +1,22 @@
 import streamlit as st
 import pandas as pd
-import os
+from ledger import tables
+from ledger.search import search_index
+from ui import fiscal_year_select, page_trace, paged_dataframe
 
-FILENAME = "table/expend_data.xlsx"
+timing = page_trace("33 ตารางเงินยืมทดรองจ่าย")
 
-@st.cache_data
-def load_data():
-    if os.path.exists(FILENAME):
-        return pd.read_excel(FILENAME, sheet_name="Sheet1", dtype=str)
-    else:
-        return pd.DataFrame()
-    
 st.set_page_config(page_title="ตารางรายจ่าย(เงินยืมทดรองจ่าย)", layout="wide")
 st.title("📊 ตารางข้อมูลรายจ่าย (เงินยืมทดรองจ่าย)")
 
-df = load_data()
+timing.phase("load")
+year = fiscal_year_select("expense", key="reserve_year")
+df = tables.expense(year)
 
 if df.empty:
     st.info("ยังไม่มีข้อมูลให้แสดง")
 else:
-    df.columns = df.columns.str.strip()
-
     if "ประเภทการจ่ายเงิน" in df.columns and "จำนวนเงิน" in df.columns:
-        df["ประเภทการจ่ายเงิน"] = df["ประเภทการจ่ายเงิน"].str.strip()
-        df["จำนวนเงิน"] = pd.to_numeric(df["จำนวนเงิน"], errors="coerce").fillna(0)
-
         # ✅ เงื่อนไขหลัก: เงินยืมทดรองจ่าย และ จำนวนเงิน > 0
         filtered_df = df[
             (df["ประเภทการจ่ายเงิน"] == "เงินยืมทดรองจ่าย") &
@@ -34,13 +26,14 @@ else:
         # 🔍 ช่องค้นหาเพิ่มเติม
         search_text = st.text_input("🔎 ค้นหา (เช่น รหัสโครงการ, รหัสค่าใช้จ่าย, รายการ ฯลฯ):")
 
+        timing.phase("search")
         if search_text:
-            filtered_df = filtered_df[filtered_df.apply(
-                lambda row: row.astype(str).str.contains(search_text, case=False, na=False).any(),
-                axis=1
-            )]
+            filtered_df = search_index(("expense_reserve", year), filtered_df, tables.version("expense", year)).filter(filtered_df, search_text)
 
+        timing.phase("render")
         st.markdown(f"📌 พบทั้งหมด {len(filtered_df):,} รายการที่ตรงกับเงื่อนไข")
-        st.dataframe(filtered_df, use_container_width=True)
+        paged_dataframe(filtered_df, key="reserve_table", width="stretch")
     else:
         st.warning("ไม่พบคอลัมน์ 'ประเภทการจ่ายเงิน' หรือ 'จำนวนเงิน' ในข้อมูล")
+
+timing.finish()
@@ -1,27 +1,16 @@
 import streamlit as st
 import pandas as pd
-import os
+from ledger import tables
+from ui import page_trace, paged_dataframe
 
-AR_FILE = "table/ar_code.xlsx"
-SPEND_FILE = "table/unique_spend_code.csv"
-
-@st.cache_data
-def load_ar_data():
-    if os.path.exists(AR_FILE):
-        return pd.read_excel(AR_FILE, dtype=str)
-    return pd.DataFrame()
-
-@st.cache_data
-def load_spend_data():
-    if os.path.exists(SPEND_FILE):
-        return pd.read_csv(SPEND_FILE, dtype=str).fillna("")
-    return pd.DataFrame(columns=["รหัสค่าใช้จ่าย", "หมวดรายจ่าย", "รายการ", "ประเภทค่าใช้จ่าย"])
+timing = page_trace("34 ตาราง AR code")
 
 st.set_page_config(page_title="ตาราง AR code", layout="wide")
 st.title("📊 ตาราง AR code พร้อมรายละเอียด")
 
-ar_df = load_ar_data()
-spend_df = load_spend_data()
+timing.phase("load")
+ar_df = tables.ar_codes()
+spend_df = tables.spend_codes()
 
 if ar_df.empty:
     st.info("ยังไม่มีข้อมูลให้แสดง")
@@ -36,15 +25,15 @@ else:
         filtered_df = ar_df.copy()
 
     # เชื่อมรายละเอียดรหัสค่าใช้จ่าย
+    timing.phase("compute")
     merged_df = filtered_df.merge(spend_df, how="left", on="รหัสค่าใช้จ่าย")
 
     # สรุปตามรหัสโครงการวิจัย และแยก ar_code พร้อมรหัสค่าใช้จ่าย
-    grouped = merged_df.groupby(["รหัสโครงการวิจัย", "ar_code"]).agg({
+    grouped = merged_df.groupby(["รหัสโครงการวิจัย", "ar_code"], observed=True).agg({
         "รหัสค่าใช้จ่าย": lambda x: ", ".join(sorted(x.dropna().unique()))
     }).reset_index()
 
-
-
+    timing.phase("render")
     current_project = None
     for _, row in grouped.iterrows():
         project = row["รหัสโครงการวิจัย"]
@@ -55,4 +44,6 @@ else:
 
     st.markdown("---")
     st.markdown("### 📋 รายการรายละเอียดทั้งหมด")
-    st.dataframe(merged_df, use_container_width=True)
+    paged_dataframe(merged_df, key="ar_table", width="stretch")
+
+timing.finish()
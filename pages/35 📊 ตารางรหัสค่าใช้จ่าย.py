@@ -1,21 +1,17 @@
 # ตาราง
 import streamlit as st
 import pandas as pd
-import os
+from ledger import tables
+from ledger.search import search_index
+from ui import page_trace
 
-FILENAME = "table/unique_spend_code.csv"
-
-@st.cache_data
-def load_data():
-    if os.path.exists(FILENAME):
-        return pd.read_csv(FILENAME, dtype=str).fillna("")
-    else:
-        return pd.DataFrame()
+timing = page_trace("35 ตารางรหัสค่าใช้จ่าย")
 
 st.set_page_config(page_title="ตารางรหัสค่าใช้จ่าย", layout="wide")
 st.title("📊 ตารางรหัสค่าใช้จ่าย")
 
-df = load_data()
+timing.phase("load")
+df = tables.spend_codes()
 
 if df.empty:
     st.info("ยังไม่มีข้อมูลให้แสดง")
@@ -24,10 +20,14 @@ else:
     search_text = st.text_input("🔎 ค้นหารหัสค่าใช้จ่ายหรือคำที่เกี่ยวข้อง", "")
 
     # กรองข้อมูล
+    timing.phase("search")
     if search_text:
-        filtered_df = df[df.apply(lambda row: row.astype(str).str.contains(search_text, case=False, na=False).any(), axis=1)]
+        filtered_df = search_index("spend_codes", df, tables.version("spend_codes")).filter(df, search_text)
     else:
         filtered_df = df
 
+    timing.phase("render")
     st.markdown(f"📌 พบทั้งหมด {len(filtered_df):,} รายการที่ตรงกับการค้นหา")
     st.dataframe(filtered_df, use_container_width=True)
+
+timing.finish()
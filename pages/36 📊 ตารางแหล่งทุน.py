@@ -1,21 +1,17 @@
 # ตาราง
 import streamlit as st
 import pandas as pd
-import os
+from ledger import tables
+from ledger.search import search_index
+from ui import page_trace
 
-FILENAME = "table/funding_source.xlsx"
-
-
-@st.cache_data
-def load_data():
-    if os.path.exists(FILENAME):
-        return pd.read_excel(FILENAME, dtype=str)
-    return pd.DataFrame()
+timing = page_trace("36 ตารางแหล่งทุน")
 
 st.set_page_config(page_title="ตารางรหัสงบประมาณ", layout="wide")
 st.title("📊 ตารางรหัสงบประมาณ")
 
-df = load_data()
+timing.phase("load")
+df = tables.funding_sources()
 
 if df.empty:
     st.info("ยังไม่มีข้อมูลให้แสดง")
@@ -24,10 +20,14 @@ else:
     search_text = st.text_input("🔎 ค้นหารหัสงบประมาณหรือคำที่เกี่ยวข้อง", "")
 
     # กรองข้อมูล
+    timing.phase("search")
     if search_text:
-        filtered_df = df[df.apply(lambda row: row.astype(str).str.contains(search_text, case=False, na=False).any(), axis=1)]
+        filtered_df = search_index("funding_sources", df, tables.version("funding_sources")).filter(df, search_text)
     else:
         filtered_df = df
 
+    timing.phase("render")
     st.markdown(f"📌 พบทั้งหมด {len(filtered_df):,} รายการที่ตรงกับการค้นหา")
     st.dataframe(filtered_df, use_container_width=True)
+
+timing.finish()
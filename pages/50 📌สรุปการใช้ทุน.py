@@ -1,17 +1,19 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from ledger import tables
+from ledger.summaries import totals
+from ui import page_trace
+
+timing = page_trace("50 สรุปการใช้ทุน")
 
 st.set_page_config(page_title="กราฟทุน", layout="wide")
 
 TOTAL_BUDGET = 5_000_000
-DATA_FILE = "table/income_data.xlsx"
-
-@st.cache_data
-def load_data():
-    return pd.read_excel(DATA_FILE)
 
-df = load_data()
+# ยอดรวมสำเร็จรูปของรายรับ (อัปเดตทุกครั้งที่บันทึก) แทนการอ่านทุกแถว
+timing.phase("load")
+df = tables.summary("income")
 st.set_page_config(page_title="สรุปการใช้ทุน)", layout="wide")
 st.title("📋 📊 สรุปการใช้ทุน (เฉพาะทุนภายใน)")
 
@@ -25,12 +27,13 @@ else:
     if missing_cols:
         st.error(f"❌ ไม่พบคอลัมน์: {', '.join(missing_cols)} กรุณาตรวจสอบไฟล์")
     else:
-        internal_df = df[df['ประเภททุน'] == 'ทุนภายใน'].copy()
+        timing.phase("compute")
+        internal = {'ประเภททุน': 'ทุนภายใน'}
+        summary = totals(df, ['รหัสโครงการวิจัย'], internal)
 
-        if internal_df.empty:
+        if summary.empty:
             st.warning("⚠️ ไม่มีข้อมูลสำหรับประเภท 'ทุนภายใน'")
         else:
-            summary = internal_df.groupby('รหัสโครงการวิจัย')['จำนวนเงิน'].sum().reset_index()
             summary['สัดส่วนจากเงินทุนทั้งหมด'] = (summary['จำนวนเงิน'] / TOTAL_BUDGET) * 100
 
             formatted_summary = summary.copy()
@@ -39,7 +42,7 @@ else:
             
 
             pie_data = summary[['รหัสโครงการวิจัย', 'จำนวนเงิน']].copy()
-            total_used = pie_data['จำนวนเงิน'].sum()
+            total_used = totals(df, where=internal)
             remaining = TOTAL_BUDGET - total_used
 
             # เพิ่มแถวคงเหลือ
@@ -58,6 +61,7 @@ else:
                 categories=project_names,
                 ordered=True
             )
+            timing.phase("figure")
             fig = px.pie(
                 pie_data,
                 names='รหัสโครงการวิจัย',
@@ -93,6 +97,7 @@ else:
             # st.dataframe(formatted_summary)
             # st.plotly_chart(fig, use_container_width=True)
 
+            timing.phase("render")
             col1, col2 = st.columns(2)
             col1, col2 = st.columns([2, 1])
 
@@ -105,3 +110,5 @@ else:
             st.dataframe(formatted_summary, use_container_width=True)
 
         st.markdown(f"### 💰 ใช้ไป (ทุนภายใน): `{total_used:,.0f}` บาท / คงเหลือ: `{remaining:,.0f}` บาท")
+
+timing.finish()
@@ -2,65 +2,43 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
+from ledger import tables
+from ledger.reconcile import ACTUAL_EXPENSE, DISBURSEMENT_COLUMNS, disbursements, period_totals, reconcile
+from ledger.summaries import totals
+from ui import page_trace
 
-INCOME_FILE = "table/income_data.xlsx"
-EXPEND_FILE = "table/expend_data.xlsx"
-
-@st.cache_data
-def load_data():
-    income_df = pd.read_excel(INCOME_FILE, dtype=str)
-    expend_df = pd.read_excel(EXPEND_FILE, dtype=str)
-    return income_df, expend_df
+timing = page_trace("51 สรุปรายโครงการ")
 
 st.set_page_config(page_title="📊 สรุปรายรับ-รายจ่ายรายโครงการ", layout="wide")
 st.title("📊 สรุปรายรับ-รายจ่ายรายโครงการ")
 
-# โหลดข้อมูล
-income_df, expend_df = load_data()
-
-# เตรียมข้อมูล
-income_df["จำนวนเงิน"] = pd.to_numeric(income_df["จำนวนเงิน"], errors='coerce').fillna(0)
-income_df["งวด"] = pd.to_numeric(income_df["งวด"], errors='coerce').fillna(0).astype(int)
-expend_df["จำนวนเงิน"] = pd.to_numeric(expend_df["จำนวนเงิน"], errors='coerce').fillna(0)
-expend_df["งวด"] = pd.to_numeric(expend_df["งวด"], errors='coerce').fillna(0).astype(int)
-
-for df in [income_df, expend_df]:
-    for col in df.columns:
-        if df[col].dtype == "object":
-            df[col] = df[col].str.strip()
-
-# ตัวกรองรหัสโครงการ
-project_codes = income_df["รหัสโครงการวิจัย"].dropna().unique()
-selected_code = st.selectbox("📌 เลือกรหัสโครงการวิจัย:", sorted(project_codes))
-
-# กรองข้อมูลตามรหัสโครงการ
-income_proj = income_df[income_df["รหัสโครงการวิจัย"] == selected_code].copy()
-expend_proj = expend_df[expend_df["รหัสโครงการวิจัย"] == selected_code].copy()
-
-# กรองเฉพาะค่าใช้จ่ายจริง
-expend_proj = expend_proj[expend_proj["ประเภทการจ่ายเงิน"] == "ค่าใช้จ่ายจริง"]
-
-# รวมรายรับ-รายจ่าย
-merged = pd.merge(
-    income_proj[[
-        "วันที่กรอกข้อมูล", "ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย", "จำนวนเงิน", "งวด"
-    ]].rename(columns={"จำนวนเงิน": "รายรับ"}),
-    expend_proj[[
-        "ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย", "จำนวนเงิน", "งวด", "วันที่เบิกจ่าย"
-    ]].rename(columns={"จำนวนเงิน": "รายจ่าย"}),
-    on=["ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย", "งวด"],
-    how="outer"
+# โหลดข้อมูล (ตารางกลางใช้ร่วมกันทุกหน้า ข้อความ/รหัสอยู่ในรูปมาตรฐานตั้งแต่ตอนบันทึก)
+timing.phase("load")
+income_summary, expend_summary = tables.load(lambda: tables.summary("income"), lambda: tables.summary("expense"))
+
+# ตัวกรองรหัสโครงการ (ทะเบียนโครงการ เรียงตามรหัสแล้ว)
+selected_code = st.selectbox("📌 เลือกรหัสโครงการวิจัย:", tables.projects().index.tolist())
+
+# รายการเบิกจ่ายรายครั้ง: อ่านเฉพาะแถว/คอลัมน์ของโครงการที่เลือก
+expend_df = tables.query(
+    "expense",
+    columns=["รหัสโครงการวิจัย", "ประเภทการจ่ายเงิน"] + DISBURSEMENT_COLUMNS,
+    project=selected_code,
+    payment_type=ACTUAL_EXPENSE,
 )
 
-merged["รายรับ"] = merged["รายรับ"].fillna(0)
-merged["รายจ่าย"] = merged["รายจ่าย"].fillna(0)
-merged["คงเหลือ"] = merged["รายรับ"] - merged["รายจ่าย"]
+timing.phase("compute")
+# กระทบยอดรายรับ-รายจ่าย (ค่าใช้จ่ายจริง) ระดับ ประเภททุน/ar_code/รหัสค่าใช้จ่าย/งวด
+# ทั้งสองฝั่งรวมยอดก่อน join จึงไม่มีแถวซ้ำและยอดรายรับไม่ถูกนับซ้ำ
+merged = reconcile(income_summary, expend_summary, selected_code)
+by_period = period_totals(merged)
 
-# คำนวณสรุปภาพรวม
-total_income_all = merged["รายรับ"].sum()
-total_expend_all = merged["รายจ่าย"].sum()
+# คำนวณสรุปภาพรวม (ยอดรวมจากตารางสรุปโดยตรง เท่ากับผลรวมของตารางกระทบยอด)
+total_income_all = totals(income_summary, where={"รหัสโครงการวิจัย": selected_code})
+total_expend_all = totals(expend_summary, where={"รหัสโครงการวิจัย": selected_code, "ประเภทการจ่ายเงิน": ACTUAL_EXPENSE})
 total_balance_all = total_income_all - total_expend_all
 
+timing.phase("figure")
 # สร้าง Pie Chart เฉพาะ รายจ่าย + คงเหลือ
 pie_total = pd.DataFrame({
     "ประเภท": ["รายจ่าย", "คงเหลือ"],
@@ -81,11 +59,13 @@ fig_total = px.pie(
 fig_total.update_traces(textposition="inside", textinfo="percent+label")
 
 # แสดงรายละเอียดโครงการ + Pie Chart
-proj_info = income_proj.iloc[0] if not income_proj.empty else None
+timing.phase("render")
+proj_info = tables.project(selected_code)
 if proj_info is not None:
     contract_code = proj_info.get("รหัสสัญญา", "-")
     contract_date_str = proj_info.get("วันที่เซนสัญญา", "")
-    project_months = int(float(proj_info.get("ระยะเวลาดำเนินโครงการ (เดือน)", 0)))
+    project_months = proj_info.get("ระยะเวลาดำเนินโครงการ (เดือน)", 0)
+    project_months = 0 if pd.isna(project_months) else int(project_months)
 
     try:
         contract_date = pd.to_datetime(contract_date_str, errors="coerce")
@@ -137,17 +117,22 @@ for period in sorted(merged["งวด"].unique()):
     st.markdown(f"#### 🔸 งวดที่ {period}")
 
     st.dataframe(period_data[[
-        "วันที่กรอกข้อมูล", "ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย",
-        "รายรับ", "วันที่เบิกจ่าย", "รายจ่าย", "คงเหลือ"
-    ]].fillna("").style.format({
-        "รายรับ": "{:,.2f}", "รายจ่าย": "{:,.2f}", "คงเหลือ": "{:,.2f}"
+        "ประเภททุน", "ar_code", "รหัสค่าใช้จ่าย",
+        "รายรับ", "จำนวนรายการรายจ่าย", "รายจ่าย", "คงเหลือ"
+    ]].rename(columns={"จำนวนรายการรายจ่าย": "จำนวนครั้งที่เบิก"}).fillna("").style.format({
+        "รายรับ": "{:,.2f}", "จำนวนครั้งที่เบิก": "{:,.0f}", "รายจ่าย": "{:,.2f}", "คงเหลือ": "{:,.2f}"
     }))
 
-    total_income = period_data["รายรับ"].sum()
-    total_expend = period_data["รายจ่าย"].sum()
-    balance = total_income - total_expend
+    with st.expander(f"🔎 รายการเบิกจ่ายรายครั้ง งวดที่ {period}"):
+        period_disbursements = disbursements(expend_df, selected_code, period)
+        if period_disbursements.empty:
+            st.info("ไม่มีรายการเบิกจ่ายในงวดนี้")
+        else:
+            st.dataframe(period_disbursements.style.format({"จำนวนเงิน": "{:,.2f}"}))
 
-    overall_income = merged["รายรับ"].sum()
+    total_income, total_expend, balance = by_period.loc[period]
+
+    overall_income = total_income_all
     percent_income = (total_income / overall_income) * 100 if overall_income > 0 else 0
     percent_expend = (total_expend / overall_income) * 100 if overall_income > 0 else 0
     percent_balance = (balance / overall_income) * 100 if overall_income > 0 else 0
@@ -159,10 +144,14 @@ for period in sorted(merged["งวด"].unique()):
     - คงเหลือ: {balance:,.2f} บาท ({percent_balance:.2f}% ของรายรับรวมทั้งหมด)
     """)
 
-# สรุปรวมทั้งหมด
+# สรุปรวมทั้งหมด (โครงการที่ยังไม่มีรายรับ แสดงสัดส่วนเป็น 0%)
+percent_expend_all = (total_expend_all / total_income_all) * 100 if total_income_all > 0 else 0
+percent_balance_all = (total_balance_all / total_income_all) * 100 if total_income_all > 0 else 0
 st.markdown("### 🧾 สรุปภาพรวมทั้งหมด")
 st.markdown(f"""
 - รายรับรวมทั้งหมด: {total_income_all:,.2f} บาท (100%)
-- รายจ่ายรวมทั้งหมด: {total_expend_all:,.2f} บาท ({(total_expend_all/total_income_all)*100:.2f}%)
-- คงเหลือรวม: {total_balance_all:,.2f} บาท ({(total_balance_all/total_income_all)*100:.2f}%)
+- รายจ่ายรวมทั้งหมด: {total_expend_all:,.2f} บาท ({percent_expend_all:.2f}%)
+- คงเหลือรวม: {total_balance_all:,.2f} บาท ({percent_balance_all:.2f}%)
 """)
+
+timing.finish()
@@ -2,80 +2,27 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import uuid
+from ledger import append_rows, tables
+from ledger.reserve import refund_event
+from ui import fiscal_year_select, page_trace
 
-today = pd.to_datetime(datetime.today().date())
-RESERVE_FILE = "table/reserve_payment.xlsx"
-
-@st.cache_data(ttl=1)
-def load_reserve_data():
+def load_reserve_data(project):
+    # สถานะเงินยืมของโครงการ คำนวณจากตารางเงินยืม + event การคืนเงิน เฉพาะแถวของโครงการนั้น (ใช้ร่วมกันทั้ง process)
     try:
-        df = pd.read_excel(RESERVE_FILE, dtype=str).fillna("")
-        df.columns = df.columns.str.strip()
-
-        df["จำนวนเงิน"] = pd.to_numeric(df["จำนวนเงิน"].str.replace(",", ""), errors="coerce")
-        df["เงินที่คืน"] = pd.to_numeric(df.get("เงินที่คืน", 0), errors="coerce").fillna(0.0)
-        df["วันที่ยืม"] = pd.to_datetime(df["วันที่ยืม"], errors='coerce')
-        df["วันที่ต้องคืน"] = pd.to_datetime(df["วันที่ต้องคืน"], errors='coerce')
-        df["วันที่คืนเงิน"] = pd.to_datetime(df.get("วันที่คืนเงิน", None), errors='coerce')
-
-        return df
+        return tables.reserve_portfolio(project=project)
     except Exception as e:
         st.error(f"ไม่สามารถโหลดข้อมูลได้: {e}")
         return pd.DataFrame()
-    
-def add_remaining_column(df):
-    df = df.copy()
-    df["จำนวนเงิน"] = pd.to_numeric(df["จำนวนเงิน"], errors="coerce")
-    df["เงินที่คืน"] = pd.to_numeric(df["เงินที่คืน"], errors="coerce").fillna(0.0)
-    df["คงเหลือ"] = df["จำนวนเงิน"] - df["เงินที่คืน"]
-    df["คงเหลือ"] = df["คงเหลือ"].apply(lambda x: max(x, 0))
-    return df
-
-def save_reserve_data(df):
+
+
+def save_refund(loan, amount, return_date):
     try:
-        df = add_remaining_column(df)
-        df.to_excel(RESERVE_FILE, index=False)
+        append_rows("reserve_refund", refund_event(loan, amount, return_date))
         st.success("✅ บันทึกข้อมูลเรียบร้อยแล้ว")
     except Exception as e:
         st.error(f"❌ เกิดข้อผิดพลาดในการบันทึกข้อมูล: {e}")
 
 
-def process_summary(df):
-    df = df.copy()
-    # แปลงเป็นตัวเลข
-    df["จำนวนเงิน"] = pd.to_numeric(df["จำนวนเงิน"], errors="coerce").fillna(0)
-    df["เงินที่คืน"] = pd.to_numeric(df["เงินที่คืน"], errors="coerce").fillna(0)
-    
-    # รวมเงินที่คืนทั้งหมด ต่อกลุ่ม key ที่เหมือนกัน
-    group_cols = ['รหัสโครงการวิจัย', 'ar_code', 'รหัสค่าใช้จ่าย', 'วันที่ยืม', 'จำนวนเงิน', 'วันที่ต้องคืน']
-    
-    refund_sum = df.groupby(group_cols)["เงินที่คืน"].sum().reset_index()
-    
-    # คำนวณคงเหลือ = จำนวนเงิน - รวมเงินที่คืน
-    refund_sum["คงเหลือ"] = refund_sum["จำนวนเงิน"] - refund_sum["เงินที่คืน"]
-    refund_sum["คงเหลือ"] = refund_sum["คงเหลือ"].apply(lambda x: max(x, 0))
-    
-    # กำหนดสถานะ
-    today = pd.to_datetime(datetime.today().date())
-    refund_sum["วันที่ต้องคืน"] = pd.to_datetime(refund_sum["วันที่ต้องคืน"], errors='coerce')
-
-    def get_status(row):
-        remain = row["คงเหลือ"]
-        due_date = row["วันที่ต้องคืน"]
-        if remain != 0 and pd.notna(due_date) and due_date > today:
-            return "ยังไม่คืน"
-        elif remain != 0 and pd.notna(due_date) and due_date < today:
-            return "เลยกำหนด"
-        elif remain == 0:
-            return "ปิดบัญชี"
-        else:
-            return "ไม่ทราบสถานะ"
-
-    refund_sum["สถานะ"] = refund_sum.apply(get_status, axis=1)
-    
-    return refund_sum
-
-
 def reset_form():
     tmp_rows = st.session_state.get("__tmp_new_rows__", None)
     keys_to_keep = {"__tmp_new_rows__", "refund_key"}
@@ -97,37 +44,29 @@ def highlight_status(row):
         color = "background-color: #d4edda"
     return [""] * (len(row) - 1) + [color]
 
-# ====== ฟังก์ชันกรองแถวคืนเงินล่าสุด ======
-def filter_latest_return(df):
-    df = df.copy()
-    df["วันที่คืนเงิน_filled"] = df["วันที่คืนเงิน"].fillna(pd.Timestamp("1900-01-01"))
-
-    idx = df.groupby(
-        ['รหัสโครงการวิจัย', 'ar_code', 'รหัสค่าใช้จ่าย', 'วันที่ยืม']
-    )["วันที่คืนเงิน_filled"].idxmax()
-
-    return df.loc[idx].drop(columns=["วันที่คืนเงิน_filled"])
-
-
 # ====== UI =======
+timing = page_trace("52 สรุปเงินยืมทดรองจ่าย")
 st.set_page_config(page_title="อัปเดตการคืนเงิน", layout="wide")
 st.title("📌สรุปเงินยืมทดรองจ่าย")
 
-reserve_df = load_reserve_data()
+# รายชื่อโครงการอ่านแค่สองคอลัมน์ของตารางเงินยืม (ปีที่ปิดแล้วอ่านจาก archive เฉพาะโครงการของปีนั้น)
+timing.phase("load")
+year = fiscal_year_select("reserve", key="reserve_year")
+loans = tables.query("reserve", columns=["รหัสโครงการวิจัย", "จำนวนเงิน"], fiscal_year=year)
 
-if reserve_df.empty:
+if loans.empty:
     st.warning("ไม่พบข้อมูลต้นทาง")
     st.stop()
 
-reserve_df = reserve_df[reserve_df["จำนวนเงิน"] > 0]
-
-project_codes = sorted(reserve_df["รหัสโครงการวิจัย"].dropna().unique())
+project_codes = sorted(loans.loc[loans["จำนวนเงิน"] > 0, "รหัสโครงการวิจัย"].dropna().unique())
 selected_project = st.selectbox("เลือกรหัสโครงการวิจัย", project_codes)
 
-filtered_df = reserve_df[reserve_df["รหัสโครงการวิจัย"] == selected_project].reset_index(drop=True)
-
-sum_df = process_summary(filtered_df)
-filtered_latest_df = sum_df
+reserve_df = load_reserve_data(selected_project)
+if reserve_df.empty:
+    st.warning("ไม่พบข้อมูลเงินยืมของโครงการนี้")
+    st.stop()
+timing.phase("render")
+filtered_latest_df = reserve_df[reserve_df["จำนวนเงิน"] > 0].reset_index(drop=True)
 
 st.markdown(f"### 📊 รายการเงินยืมทดรองจ่ายของโครงการวิจัย: `{selected_project}`")
 
@@ -146,11 +85,16 @@ styled_df = filtered_latest_df[[
 st.dataframe(styled_df, use_container_width=True)
 
 st.markdown("---")
+if year is not None:
+    # ปีที่ปิดแล้วดูได้อย่างเดียว
+    st.info("ปีงบประมาณที่ปิดแล้ว ไม่สามารถเพิ่มข้อมูลการคืนเงินได้")
+    timing.finish()
+    st.stop()
 st.markdown("### ➕ เพิ่มข้อมูลการคืนเงิน")
 
 df_not_zero = filtered_latest_df[filtered_latest_df["คงเหลือ"] != 0]
 
-has_ar_code = filtered_df["ar_code"].replace("", pd.NA).dropna().nunique() > 0
+has_ar_code = filtered_latest_df["ar_code"].replace("", pd.NA).dropna().nunique() > 0
 
 if has_ar_code:
     st.markdown("#### เลือกรหัส ar_code")
@@ -170,8 +114,6 @@ else:
 if rows.empty:
     st.warning("ไม่พบข้อมูลรายการที่เกี่ยวข้อง")
 else:
-    row_idx = rows.index[0]
-
     # ✅ เตรียม key สำหรับ reset ช่องกรอกจำนวนเงิน
     if "refund_key" not in st.session_state:
         st.session_state["refund_key"] = str(uuid.uuid4())
@@ -189,28 +131,13 @@ else:
         submitted = st.form_submit_button("📂 บันทึก")
 
         if submitted:
-            selected_row = sum_df.loc[row_idx]
-            actual_idx = filtered_df.index[row_idx]
+            timing.phase("save")
+            if return_amt <= 0:
+                st.warning("⚠️ กรุณาระบุจำนวนที่คืน")
+                st.stop()
 
-            # ข้อมูลแถวเก่า
-            old_row = reserve_df.loc[actual_idx].copy()
-
-            old_refund = pd.to_numeric(old_row["เงินที่คืน"], errors="coerce")
-            if pd.isna(old_refund):
-                old_refund = 0.0
-
-            new_refund = old_refund + return_amt
-            new_return_date = pd.to_datetime(return_date)
-
-            # สร้างแถวใหม่ แทนการแก้ไขแถวเก่า
-            new_row = old_row.copy()
-            new_row["เงินที่คืน"] = new_refund
-            new_row["วันที่คืนเงิน"] = new_return_date
-
-            # เพิ่มแถวใหม่ลง DataFrame
-            reserve_df = pd.concat([reserve_df, pd.DataFrame([new_row])], ignore_index=True)
-
-            save_reserve_data(reserve_df)
+            # บันทึกเฉพาะ event การคืนเงินครั้งนี้ (ไม่คัดลอกแถวเงินยืม)
+            save_refund(rows.iloc[0], return_amt, return_date)
 
             # เปลี่ยน key ใหม่เพื่อ reset ช่องกรอกจำนวนเงิน
             st.session_state["refund_key"] = str(uuid.uuid4())
@@ -218,3 +145,5 @@ else:
             st.success("✅ เพิ่มข้อมูลเรียบร้อยแล้ว")
             reset_form()
             st.rerun()
+
+timing.finish()
@@ -1,70 +1,21 @@
 import streamlit as st
 import pandas as pd
 import io
+from ledger import tables
+from ledger.summaries import budget_pivot
+from ui import page_trace
 
-INCOME_FILE = "table/income_data.xlsx"
-EXPEND_FILE = "table/expend_data.xlsx"
+timing = page_trace("53 สรุปค่าใช้จ่ายตามรายการค่าใช้จ่าย")
 
 st.set_page_config(page_title="ตารางสรุปงบประมาณ 2 ระดับ", layout="wide")
 
-@st.cache_data
-def load_data():
-    income_df = pd.read_excel(INCOME_FILE)
-    expend_df = pd.read_excel(EXPEND_FILE)
-    return income_df, expend_df
+# ยอดรวมสำเร็จรูป (รายการ เติมจากตารางรหัสค่าใช้จ่ายตามรหัสของแต่ละแถว)
+timing.phase("load")
+income_df, expend_df = tables.load(lambda: tables.summary("income"), lambda: tables.summary("expense"))
 
-income_df, expend_df = load_data()
-
-# รวมชื่อคอลัมน์ให้ตรงกับไฟล์จริงถ้าจำเป็น
-income_df = income_df.rename(columns={'รายการงบ': 'รายการ'})
-expend_df = expend_df.rename(columns={'รายการรายจ่าย': 'รายการ'})
-
-# รวมยอดจัดสรรและเบิกจ่ายแยกตามงวดและรายการ
-income_grouped = income_df.groupby(['งวด', 'รายการ']).agg({'จำนวนเงิน': 'sum'}).reset_index()
-income_grouped['ประเภท'] = 'จัดสรร'
-
-expend_grouped = expend_df.groupby(['งวด', 'รายการ']).agg({'จำนวนเงิน': 'sum'}).reset_index()
-expend_grouped['ประเภท'] = 'เบิกจ่าย'
-
-combined = pd.concat([income_grouped, expend_grouped], ignore_index=True)
-combined = combined.rename(columns={'จำนวนเงิน': 'ยอดรวม'})
-
-# สร้าง Pivot table: index = ประเภท, columns = (งวด, รายการ)
-pivot = combined.pivot_table(
-    index='ประเภท',
-    columns=['งวด', 'รายการ'],
-    values='ยอดรวม',
-    aggfunc='sum',
-    fill_value=0
-)
-
-pivot = pivot.T.groupby(level=[0,1]).sum().T
-
-# เพิ่มแถว "คงเหลือ" = จัดสรร - เบิกจ่าย
-allocated = pivot.loc['จัดสรร']
-spent = pivot.loc['เบิกจ่าย']
-remain = allocated - spent
-remain.name = 'คงเหลือ'
-pivot = pd.concat([pivot, remain.to_frame().T])
-
-# สร้างคอลัมน์ "รวม" ต่อแต่ละงวด (sum ตามหมวด)
-sum_dfs = []
-for period in pivot.columns.get_level_values(0).unique():
-    df_slice = pivot.loc[:, period]
-    sum_col = df_slice.sum(axis=1)
-    sum_df = pd.DataFrame(sum_col)
-    sum_df.columns = pd.MultiIndex.from_tuples([(period, 'รวม')])
-    sum_dfs.append(sum_df)
-
-pivot_with_sum = pd.concat([pivot] + sum_dfs, axis=1)
-pivot_with_sum = pivot_with_sum.sort_index(axis=1, level=[0,1])
-
-pivot_with_sum.columns.names = ['งวด', 'หมวด']
-
-# ตั้งชื่อ columns level 0 เป็น "งวดที่ x"
-cols = pivot_with_sum.columns.to_frame(index=False)
-cols['งวด'] = cols['งวด'].apply(lambda x: f"งวดที่ {x}")
-pivot_with_sum.columns = pd.MultiIndex.from_frame(cols)
+timing.phase("compute")
+# ตารางสรุป 2 ระดับ (งวด x รายการ) ดู ledger.summaries.budget_pivot
+pivot_with_sum = budget_pivot(income_df, expend_df)
 
 # ฟังก์ชันใส่สีพื้นหลังคอลัมน์สลับตามงวด
 def highlight_cols_auto(col):
@@ -77,6 +28,7 @@ def highlight_cols_auto(col):
     color = colors[(num - 1) % len(colors)]
     return [f'background-color: {color}'] * len(col)
 
+timing.phase("render")
 styled_df = pivot_with_sum.style.apply(highlight_cols_auto, axis=0)
 
 header_style = [
@@ -96,6 +48,7 @@ st.dataframe(
 
 
 # สร้าง Excel ไฟล์ในหน่วยความจำ
+timing.phase("export")
 output = io.BytesIO()
 with pd.ExcelWriter(output, engine='openpyxl') as writer:
     pivot_with_sum.to_excel(writer, sheet_name='สรุปงบประมาณ')
@@ -107,3 +60,5 @@ st.download_button(
     file_name="สรุปงบประมาณ_2ระดับ.xlsx",
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 )
+
+timing.finish()
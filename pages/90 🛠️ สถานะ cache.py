@@ -0,0 +1,65 @@
+import streamlit as st
+from ledger import cache
+from ui import page_trace
+
+timing = page_trace("90 สถานะ cache")
+
+st.set_page_config(page_title="สถานะ cache", layout="wide")
+st.title("🛠️ สถานะ cache ของระบบ")
+st.caption("ตาราง/ยอดสรุป/index ที่ใช้ร่วมกันทุกผู้ใช้ใน server นี้ (ledger.cache) งบหน่วยความจำตั้งด้วย LEDGER_CACHE_MB")
+
+timing.phase("load")
+used, budget, entries = cache.usage()
+stats = cache.stats()
+
+timing.phase("render")
+hits, misses = int(stats["hits"].sum()), int(stats["misses"].sum())
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("หน่วยความจำที่ใช้", f"{used / 2 ** 20:,.1f} MB", f"งบ {budget / 2 ** 20:,.0f} MB", delta_color="off")
+col2.metric("จำนวนรายการ", f"{entries:,}")
+col3.metric("Hit rate", f"{hits / (hits + misses) * 100:.1f} %" if hits + misses else "-")
+col4.metric("ถูกทิ้ง (evictions)", f"{int(stats['evictions'].sum()):,}")
+st.progress(min(used / budget, 1.0) if budget else 0.0)
+
+# รายการที่ถูกทิ้งแล้วต้องสร้างใหม่ซ้ำ = งบไม่พอกับชุดข้อมูลที่ใช้งานจริง
+thrash = stats[stats["rebuilds"] > 0]
+if len(thrash):
+    st.warning(
+        f"⚠️ มี {len(thrash)} รายการที่ถูกทิ้งแล้วต้องสร้างใหม่ (รวม {int(thrash['rebuilds'].sum())} ครั้ง) "
+        "ควรเพิ่ม LEDGER_CACHE_MB"
+    )
+
+if stats.empty:
+    st.info("ยังไม่มีการใช้ cache")
+else:
+    view = stats.rename(columns={
+        "key": "รายการ",
+        "cached": "อยู่ใน cache",
+        "hit_rate": "hit rate",
+        "rebuilds": "สร้างใหม่หลังถูกทิ้ง",
+        "last_build_ms": "สร้างล่าสุด (ms)",
+        "build_ms": "เวลาสร้างรวม (ms)",
+        "mb": "ขนาด (MB)",
+        "idle_s": "ไม่ได้ใช้มา (วินาที)",
+    })
+    st.dataframe(
+        view.style.format({
+            "hit rate": "{:.0%}",
+            "สร้างล่าสุด (ms)": "{:,.1f}",
+            "เวลาสร้างรวม (ms)": "{:,.1f}",
+            "ขนาด (MB)": "{:,.2f}",
+            "ไม่ได้ใช้มา (วินาที)": "{:,.0f}",
+        }, na_rep="-"),
+        hide_index=True,
+        width="stretch",
+    )
+
+col_clear, col_reset, _ = st.columns([1, 1, 4])
+if col_clear.button("🗑️ ล้าง cache"):
+    cache.clear()
+    st.rerun()
+if col_reset.button("🔄 เริ่มนับสถิติใหม่"):
+    cache.reset_stats()
+    st.rerun()
+
+timing.finish()
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from tests.synthetic import generate, populate, use_store
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("ledger")
+    group.addoption("--ledger-rows", type=int, default=int(os.environ.get("LEDGER_BENCH_ROWS", "10000")),
+                    help="จำนวนแถวรายจ่ายของข้อมูลจำลอง (10k-1M)")
+    group.addoption("--ledger-backend", choices=["sqlite", "excel"], default=os.environ.get("LEDGER_BACKEND", "sqlite"))
+
+
+@pytest.fixture(scope="session")
+def ledger_data(request):
+    return generate(request.config.getoption("--ledger-rows"))
+
+
+@pytest.fixture(scope="session")
+def ledger(request, ledger_data, tmp_path_factory):
+    # ที่เก็บข้อมูลในโฟลเดอร์ชั่วคราวที่มีข้อมูลจำลอง
+    with use_store(tmp_path_factory.mktemp("ledger"), request.config.getoption("--ledger-backend")) as store:
+        populate(store, ledger_data)
+        yield ledger_data
+
+
+@pytest.fixture
+def ledger_copy(request, ledger, tmp_path):
+    # สำเนาของที่เก็บข้อมูลจำลองต่อ test สำหรับ benchmark ที่บันทึกข้อมูล
+    # ที่เก็บของ session ไม่เปลี่ยน จำนวนแถวที่ test อื่นตรวจจึงไม่ขึ้นกับลำดับการรัน
+    with use_store(tmp_path, request.config.getoption("--ledger-backend")) as store:
+        populate(store, ledger)
+        yield ledger
+
+
+@pytest.fixture
+def store(request, tmp_path):
+    # ที่เก็บข้อมูลว่างของแต่ละ test (backend sqlite หรือระบุด้วย parametrize(..., indirect=True))
+    with use_store(tmp_path, getattr(request, "param", "sqlite")) as store:
+        yield store
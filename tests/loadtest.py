@@ -0,0 +1,269 @@
+import argparse
+import glob
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# คำเตือนของ streamlit (เช่น missing ScriptRunContext ของ thread ในโหมด AppTest) ไม่เกี่ยวกับผลวัด
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager  # noqa: E402
+from streamlit.runtime.dataframe_source_manager import DataframeSourceManager  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.util import patch_config_options  # noqa: E402
+
+from ledger import config
+from tests.synthetic import generate, populate, use_store
+
+# จำลองผู้ใช้หลายคนใช้หน้าเว็บพร้อมกัน (streamlit AppTest ไม่ต้องเปิด browser)
+# ทุก session รันใน process เดียวกันเหมือน server จริง (ใช้ cache/ที่เก็บข้อมูลร่วมกัน)
+# แต่ละหน้ามีสคริปต์การใช้งานทั่วไป (SCENARIOS) ทุกการโต้ตอบ = 1 rerun ที่ถูกจับเวลา
+# รายงาน p50/p95/p99 ของเวลา rerun และ RSS สูงสุดระหว่างรันแต่ละหน้า
+# ถ้า p95 ของหน้าใดเกินงบ (BUDGETS) จะจบด้วย exit code 1
+#
+#   python -m tests.loadtest --sessions 20 --rows 100000
+#   python -m tests.loadtest --pages 51 52 --budget 51=500
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# งบเวลา p95 ของ rerun (มิลลิวินาที) ต่อหน้า
+BUDGETS = {"10": 3000, "11": 3000, "51": 3000, "52": 3000}
+
+
+def _widget(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"ไม่พบ widget '{label}'")
+
+
+def _options(widget, skip_empty=True):
+    return [o for o in widget.options if o or not skip_empty]
+
+
+def _entry_income(at, project):
+    # หน้า 10: พิมพ์รหัสโครงการ เพิ่มงวด เลือก AR code งวดแรก แล้วกรอกจำนวนเงิน
+    # AR code/จำนวนเงิน rerun แค่ fragment ของงวดนั้นกับแถบยอดรวม
+    # (หลังจากนั้น at มีแค่ element ของ fragment ขั้นที่ต้องใช้ปุ่มนอกงวดจึงทำก่อน)
+    at.run()
+    yield "เปิดหน้า"
+    _widget(at.text_input, "รหัสโครงการวิจัย").set_value(project).run()
+    yield "พิมพ์รหัสโครงการ"
+    at.button(key="btn_add_round").click().run()
+    yield "เพิ่มงวด"
+    ar = at.multiselect(key="ar_0_multi")
+    ar.set_value(ar.options[:1]).run()
+    yield "เลือก AR code"
+    keys = [n.key for n in at.number_input if n.key and n.key.startswith("amt_0_0_")]
+    for amount, key in zip([1000.0, 500.0], keys):
+        at.number_input(key=key).set_value(amount).run()
+        yield "กรอกจำนวนเงิน"
+
+
+def _entry_expense(at, project):
+    # หน้า 11: เลือกโครงการแล้วเลือกงวด
+    at.run()
+    yield "เปิดหน้า"
+    _widget(at.selectbox, "รหัสโครงการวิจัย").set_value(project).run()
+    yield "เลือกโครงการ"
+    if at.multiselect:
+        rounds = at.multiselect[0]
+        rounds.set_value(rounds.options[:2]).run()
+        yield "เลือกงวด"
+
+
+def _switch_projects(label):
+    # หน้า 51/52: สลับดูหลายโครงการ
+    def scenario(at, project):
+        at.run()
+        yield "เปิดหน้า"
+        box = _widget(at.selectbox, label)
+        options = _options(box)
+        start = options.index(project) if project in options else 0
+        for code in (options * 3)[start:start + 3]:
+            _widget(at.selectbox, label).set_value(code).run()
+            yield "เปลี่ยนโครงการ"
+    return scenario
+
+
+SCENARIOS = {
+    "10": _entry_income,
+    "11": _entry_expense,
+    "51": _switch_projects("📌 เลือกรหัสโครงการวิจัย:"),
+    "52": _switch_projects("เลือกรหัสโครงการวิจัย"),
+}
+
+
+def _page_file(page):
+    return glob.glob(os.path.join(ROOT, "pages", f"{page}[_ ]*.py"))[0]
+
+
+def _rss():
+    # RSS ปัจจุบัน (ไบต์) ถ้าอ่าน /proc ไม่ได้ใช้ค่าสูงสุดของ process แทน
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _PeakRSS:
+    # เก็บ RSS สูงสุดระหว่างบล็อก with (อ่านทุก interval วินาที)
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss())
+
+
+@contextmanager
+def _shared_runtime():
+    # AppTest สร้าง Runtime จำลอง (singleton ของ streamlit) ตอนเริ่มแต่ละ run แล้วลบทิ้งตอนจบ
+    # หลาย session รันพร้อมกันจึงลบ runtime ของกันและกัน ระหว่างวัดให้ทุก session ใช้ runtime เดียวกัน
+    # (เหมือน server จริงที่มี runtime เดียว st.cache_data จึงใช้ร่วมกันทุก session ด้วย)
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    # AppTest สร้าง ScriptCache ใหม่ทุก run (คอมไพล์หน้าใหม่ทุกครั้ง) server จริงคอมไพล์ครั้งเดียวแล้วใช้ร่วมกัน
+    # และ ast.parse พร้อมกันหลาย thread พังใน CPython 3.11 จึงใช้ cache เดียว (มี lock ของตัวเอง คอมไพล์ทีละหน้า)
+    scripts = ScriptCache()
+    compile_page = ScriptCache.get_bytecode
+
+    def get_bytecode(self, script_path):
+        return compile_page(scripts, script_path)
+
+    with patch.object(Runtime, "instance", classmethod(lambda cls: runtime)), \
+            patch.object(Runtime, "exists", classmethod(lambda cls: True)), \
+            patch.object(ScriptCache, "get_bytecode", get_bytecode), \
+            patch_config_options({"global.appTest": True}):
+        yield
+
+
+def _session(page, project, iterations, timeout):
+    # 1 ผู้ใช้: รันสคริปต์ของหน้านี้ iterations รอบ คืน [(ขั้นตอน, วินาที), ...] และข้อผิดพลาดที่พบ
+    timings, errors = [], []
+    for _ in range(iterations):
+        at = AppTest.from_file(_page_file(page), default_timeout=timeout)
+        steps = SCENARIOS[page](at, project)
+        while True:
+            start = time.perf_counter()
+            try:
+                step = next(steps)
+            except StopIteration:
+                break
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                break
+            timings.append((step, time.perf_counter() - start))
+            errors.extend(f"{step}: {e.value}" for e in at.exception)
+    return timings, errors
+
+
+def run_page(page, projects, sessions, iterations=1, timeout=120):
+    with _shared_runtime(), _PeakRSS() as rss, ThreadPoolExecutor(sessions) as pool:
+        futures = [
+            pool.submit(_session, page, projects[i % len(projects)], iterations, timeout)
+            for i in range(sessions)
+        ]
+        results = [f.result() for f in futures]
+    latencies = np.array([seconds for timings, _ in results for _, seconds in timings]) * 1000
+    return {
+        "page": page,
+        "sessions": sessions,
+        "reruns": int(latencies.size),
+        "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+        "p95_ms": float(np.percentile(latencies, 95)) if latencies.size else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if latencies.size else None,
+        "peak_rss_mb": rss.peak / 2 ** 20,
+        "errors": sorted({e for _, errors in results for e in errors}),
+    }
+
+
+def _report(results, budgets):
+    print(f"{'หน้า':<6}{'sessions':>9}{'reruns':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}{'งบ p95':>9}")
+    failed = []
+    for r in results:
+        budget = budgets.get(r["page"])
+        over = r["p95_ms"] is None or (budget is not None and r["p95_ms"] > budget) or bool(r["errors"])
+        print(
+            f"{r['page']:<6}{r['sessions']:>9}{r['reruns']:>8}"
+            f"{r['p50_ms'] or 0:>10.0f}{r['p95_ms'] or 0:>10.0f}{r['p99_ms'] or 0:>10.0f}"
+            f"{r['peak_rss_mb']:>9.0f}{budget if budget is not None else '-':>9}{'  เกินงบ' if over else ''}"
+        )
+        for error in r["errors"]:
+            print(f"      ข้อผิดพลาด: {error}")
+        if over:
+            failed.append(r["page"])
+    return failed
+
+
+def _budget(text):
+    page, _, ms = text.partition("=")
+    return page, float(ms)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="วัดเวลา rerun ของหน้าเว็บเมื่อมีผู้ใช้พร้อมกันหลายคน")
+    parser.add_argument("--pages", nargs="+", default=list(SCENARIOS), help=f"หน้า ({', '.join(SCENARIOS)})")
+    parser.add_argument("--sessions", type=int, default=20, help="จำนวนผู้ใช้พร้อมกัน")
+    parser.add_argument("--iterations", type=int, default=1, help="จำนวนรอบของสคริปต์ต่อผู้ใช้")
+    parser.add_argument("--rows", type=int, default=10_000, help="จำนวนแถวรายจ่ายของข้อมูลจำลอง")
+    parser.add_argument("--backend", choices=["sqlite", "excel"], default="sqlite")
+    parser.add_argument("--budget", type=_budget, action="append", default=[], metavar="หน้า=ms",
+                        help="งบ p95 ของหน้า (แทนค่าใน BUDGETS)")
+    parser.add_argument("--json", help="บันทึกผลเป็นไฟล์ JSON")
+    parser.add_argument("--trace", default="", help="บันทึก trace ของทุก rerun ลงไฟล์นี้ (ดู python -m ledger trace)")
+    args = parser.parse_args(argv)
+    unknown = [p for p in args.pages if p not in SCENARIOS]
+    if unknown:
+        parser.error(f"ไม่มีสคริปต์ของหน้า: {', '.join(unknown)}")
+    budgets = {**BUDGETS, **dict(args.budget)}
+
+    # หน้าเว็บอ่านไฟล์อ้างอิงด้วย path สัมพัทธ์ (table/...) ต้องรันจากโฟลเดอร์โปรเจกต์
+    os.chdir(ROOT)
+    data = generate(args.rows)
+    projects = data["expense"]["รหัสโครงการวิจัย"].value_counts().index.tolist()
+    results = []
+    # trace ของข้อมูลจำลองไม่ปนกับไฟล์ trace ของระบบจริง (ไม่ระบุ --trace = ไม่บันทึก)
+    config.TRACE_FILE = args.trace
+    with tempfile.TemporaryDirectory() as root, use_store(root, args.backend) as store:
+        populate(store, data)
+        for page in args.pages:
+            results.append(run_page(page, projects, args.sessions, args.iterations))
+    failed = _report(results, budgets)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rows": args.rows, "budgets": budgets, "results": results}, f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import argparse
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger import config, store, tables, writer
+from ledger.reserve import LOAN_KEYS
+from ledger.spend_codes import load_spend_table
+
+# ข้อมูลจำลองสำหรับ benchmark/ทดสอบโหลด: ตารางรายรับ รายจ่าย เงินยืม การคืนเงิน AR และทะเบียนโครงการ
+# ขนาดกำหนดด้วยจำนวนแถวรายจ่าย (ตารางที่ใหญ่ที่สุดในการใช้งานจริง) ตารางอื่นโตตามสัดส่วน
+# - โครงการ: รหัส E<ปี>_<ลำดับ> กระจายหลายปีงบประมาณ แต่ละโครงการมี ar_code 2-4 กลุ่ม กลุ่มละ 3-8 รหัสค่าใช้จ่าย
+# - รายรับ: 1 แถวต่อ โครงการ x งวด x (ar_code, รหัสค่าใช้จ่าย)
+# - รายจ่าย/เงินยืม: สุ่มจากรหัสของโครงการ วันที่อยู่ในปีงบประมาณของโครงการ
+# รหัสค่าใช้จ่ายมาจากตารางจริง (unique_spend_code.csv) ค่าที่ได้เหมือนที่หน้าเว็บบันทึก (ผ่าน normalize/validate ได้)
+FISCAL_YEARS = [2566, 2567, 2568, 2569]
+FUND_TYPES = ["ทุนภายใน", "ทุนภายนอก"]
+FUND_SOURCES = ["682200234734000", "680200015156001", "682200234733001"]
+PAYMENT_TYPES = ["ค่าใช้จ่ายจริง", "เงินยืมทดรองจ่าย"]
+
+
+def default_projects(rows):
+    # จำนวนโครงการตามขนาดข้อมูล (ประมาณ 500 แถวรายจ่ายต่อโครงการ) รหัสมีได้ไม่เกิน 999 ต่อปี
+    return int(min(max(rows // 500, 5), 999 * len(FISCAL_YEARS)))
+
+
+def _fiscal_start(year):
+    # ปีงบประมาณ (พ.ศ.) เริ่ม 1 ตุลาคมของปีก่อนหน้า
+    return pd.Timestamp(year=year - 544, month=10, day=1)
+
+
+def _dates(rng, start, days):
+    return pd.DatetimeIndex(start + pd.to_timedelta(rng.integers(0, np.maximum(days, 1)), unit="D"))
+
+
+def _projects(rng, n, start_time):
+    seq = np.arange(n)
+    years = np.array(FISCAL_YEARS)[seq % len(FISCAL_YEARS)]
+    codes = [f"E{y}_{s:03d}" for y, s in zip(years, seq // len(FISCAL_YEARS) + 1)]
+    signed = pd.DatetimeIndex([_fiscal_start(y) for y in years]) + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+    return pd.DataFrame({
+        "วันที่กรอกข้อมูล": start_time,
+        "รหัสโครงการวิจัย": codes,
+        "ปีงบประมาณ": years.astype(str),
+        "รหัสงบประมาณ": rng.choice(FUND_SOURCES, n),
+        "วันที่เซนสัญญา": signed,
+        "ระยะเวลาดำเนินโครงการ (เดือน)": rng.choice([6, 12, 18, 24], n),
+        "รหัสสัญญา": [f"CHR{s % 1000:03d}/{y}" for y, s in zip(years, seq + 1)],
+    })
+
+
+def _ar(rng, project_df, spend_codes):
+    # กลุ่ม ar_code ของแต่ละโครงการ กลุ่มละหลายรหัสค่าใช้จ่าย (ไม่ซ้ำกันในโครงการ)
+    rows = []
+    for code in project_df["รหัสโครงการวิจัย"]:
+        groups = rng.integers(2, 5)
+        picked = rng.choice(spend_codes, size=min(len(spend_codes), groups * 8), replace=False)
+        start = 0
+        for g in range(groups):
+            size = rng.integers(3, 9)
+            for spend in picked[start:start + size]:
+                rows.append((code, f"ARC{g + 1:03d}", spend))
+            start += size
+    return pd.DataFrame(rows, columns=config.DEFAULT_COLUMNS["ar"])
+
+
+def _income(rng, project_df, ar_df, rounds):
+    info = project_df.set_index("รหัสโครงการวิจัย")
+    n_rounds = pd.Series(rng.integers(1, rounds + 1, len(info)), index=info.index)
+    lines = ar_df.loc[ar_df.index.repeat(n_rounds.reindex(ar_df["รหัสโครงการวิจัย"]).to_numpy())].reset_index(drop=True)
+    lines["งวด"] = lines.groupby(["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย"]).cumcount() + 1
+    signed = info["วันที่เซนสัญญา"].reindex(lines["รหัสโครงการวิจัย"]).to_numpy()
+    return pd.DataFrame({
+        "วันที่กรอกข้อมูล": pd.DatetimeIndex(signed) + pd.to_timedelta((lines["งวด"] - 1) * 90, unit="D"),
+        "รหัสโครงการวิจัย": lines["รหัสโครงการวิจัย"],
+        "ประเภททุน": rng.choice(FUND_TYPES, len(info))[info.index.get_indexer(lines["รหัสโครงการวิจัย"])],
+        "งวด": lines["งวด"],
+        "ar_code": lines["ar_code"],
+        "รหัสค่าใช้จ่าย": lines["รหัสค่าใช้จ่าย"],
+        "จำนวนเงิน": rng.integers(1, 200, len(lines)) * 1000,
+    })
+
+
+def _pick_income_lines(rng, income_df, n):
+    # สุ่มแถวรายรับ (โครงการ/งวด/รหัส ที่มีงบจริง) เป็นต้นแบบของรายจ่าย/เงินยืม
+    return income_df.iloc[rng.integers(0, len(income_df), n)].reset_index(drop=True)
+
+
+def _expense(rng, income_df, n):
+    lines = _pick_income_lines(rng, income_df, n)
+    spent = _dates(rng, lines["วันที่กรอกข้อมูล"], 365)
+    return pd.DataFrame({
+        "วันที่กรอกข้อมูล": spent + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+        "รหัสโครงการวิจัย": lines["รหัสโครงการวิจัย"],
+        "ประเภททุน": lines["ประเภททุน"],
+        "ประเภทการจ่ายเงิน": np.where(rng.random(n) < 0.9, PAYMENT_TYPES[0], PAYMENT_TYPES[1]),
+        "วันที่เบิกจ่าย": spent,
+        "รหัสกิจกรรม": [f"{v:013d}" for v in rng.integers(10 ** 12, 10 ** 13, n)],
+        "งวด": lines["งวด"],
+        "ar_code": lines["ar_code"],
+        "รหัสค่าใช้จ่าย": lines["รหัสค่าใช้จ่าย"],
+        "จำนวนเงิน": np.round(rng.uniform(100, 20000, n), 2),
+    })
+
+
+def _reserve(rng, income_df, n, start_time):
+    lines = _pick_income_lines(rng, income_df, n)
+    borrowed = _dates(rng, lines["วันที่กรอกข้อมูล"], 365)
+    amount = rng.integers(1, 50, n) * 1000
+    df = pd.DataFrame({
+        "วันที่กรอกข้อมูล": start_time,
+        "รหัสโครงการวิจัย": lines["รหัสโครงการวิจัย"],
+        "ar_code": lines["ar_code"],
+        "รหัสค่าใช้จ่าย": lines["รหัสค่าใช้จ่าย"],
+        "วันที่ยืม": borrowed,
+        "จำนวนเงิน": amount,
+        "วันที่ต้องคืน": borrowed + pd.Timedelta(days=90),
+        "วันที่คืนเงิน": pd.NaT,
+        "เงินที่คืน": 0,
+        "คงเหลือ": amount,
+        "สถานะ": "",
+    })
+    # สัญญาเงินยืมระบุด้วย LOAN_KEYS (ledger.reserve) จึงไม่ให้ซ้ำกัน
+    return df.drop_duplicates(subset=LOAN_KEYS, ignore_index=True)
+
+
+def _refunds(rng, reserve_df):
+    # การคืนเงินของเงินยืมประมาณ 60% (คืนครบหรือคืนบางส่วน บางสัญญาคืนหลายครั้ง)
+    returned = reserve_df[rng.random(len(reserve_df)) < 0.6]
+    times = rng.integers(1, 3, len(returned))
+    returned = returned.loc[returned.index.repeat(times)].reset_index(drop=True)
+    times = np.repeat(times, times)
+    refund_date = returned["วันที่ยืม"] + pd.to_timedelta(rng.integers(1, 120, len(returned)), unit="D")
+    df = returned[["รหัสโครงการวิจัย", "ar_code", "รหัสค่าใช้จ่าย", "วันที่ยืม", "จำนวนเงิน", "วันที่ต้องคืน"]].copy()
+    df.insert(0, "วันที่กรอกข้อมูล", refund_date)
+    df["วันที่คืนเงิน"] = refund_date
+    df["เงินที่คืน"] = (df["จำนวนเงิน"] / times).round(2)
+    return df.reindex(columns=config.DEFAULT_COLUMNS["reserve_refund"])
+
+
+def generate(rows=10_000, projects=None, rounds=4, seed=0, spend_path=config.SPEND_LOOKUP_FILE):
+    # คืน {ตาราง: DataFrame} ชื่อตารางตาม config.LEDGER_TABLES (seed เดียวกันได้ข้อมูลเดิมทุกครั้ง)
+    rng = np.random.default_rng(seed)
+    start_time = pd.Timestamp("2024-01-01 09:00:00")
+    spend_codes = load_spend_table(spend_path)["รหัสค่าใช้จ่าย"].dropna().astype(str).unique()
+    project_df = _projects(rng, projects or default_projects(rows), start_time)
+    ar_df = _ar(rng, project_df, spend_codes)
+    income_df = _income(rng, project_df, ar_df, rounds)
+    reserve_df = _reserve(rng, income_df, max(rows // 20, 1), start_time)
+    return {
+        "project": project_df,
+        "ar": ar_df,
+        "income": income_df,
+        "expense": _expense(rng, income_df, rows),
+        "reserve": reserve_df,
+        "reserve_refund": _refunds(rng, reserve_df),
+    }
+
+
+def populate(store, data):
+    # เขียนข้อมูลจำลองแทนที่ทุกตารางในที่เก็บ (ผ่าน store.replace จึงถูก normalize เหมือนข้อมูลจริง)
+    for table, df in data.items():
+        store.replace(table, df)
+
+
+def _reset():
+    store._store = None
+    writer._writer = None
+    tables.clear()
+
+
+@contextmanager
+def use_store(root, backend="sqlite"):
+    # ชี้ที่เก็บข้อมูลของทั้ง process ไปที่โฟลเดอร์ root ระหว่างบล็อก with (ไม่แตะโฟลเดอร์ table ของจริง)
+    # ตารางอ้างอิง (รหัสค่าใช้จ่าย แหล่งทุน ปีงบประมาณ) ใช้ไฟล์จริงเดิม คืน store ที่ใช้งาน
+    root = str(root)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config, "BACKEND", backend)
+        mp.setattr(config, "DB_FILE", os.path.join(root, "ledger.db"))
+        mp.setattr(config, "LOCK_FILE", os.path.join(root, ".ledger.lock"))
+        mp.setattr(config, "SNAPSHOT_DIR", os.path.join(root, ".snapshots"))
+        mp.setattr(config, "ARCHIVE_DIR", os.path.join(root, "archive"))
+        for table, path in config.LEDGER_TABLES.items():
+            mp.setitem(config.LEDGER_TABLES, table, os.path.join(root, os.path.basename(path)))
+        _reset()
+        writer._writer = writer.WriteQueue(lock_path=config.LOCK_FILE)
+        try:
+            yield store.get_store()
+        finally:
+            _reset()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้างข้อมูลจำลองสำหรับทดสอบประสิทธิภาพ")
+    parser.add_argument("out", help="โฟลเดอร์ปลายทาง")
+    parser.add_argument("--rows", type=int, default=10_000, help="จำนวนแถวรายจ่าย (10k-1M)")
+    parser.add_argument("--projects", type=int, default=None)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["sqlite", "xlsx"], default="sqlite")
+    args = parser.parse_args(argv)
+
+    data = generate(args.rows, args.projects, args.rounds, args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    if args.format == "sqlite":
+        # ใช้กับ LEDGER_DB=<out>/ledger.db
+        populate(store.SQLiteStore(os.path.join(args.out, "ledger.db")), data)
+    else:
+        # ชื่อไฟล์เดียวกับโฟลเดอร์ table (ใช้กับ LEDGER_BACKEND=excel หรือ python -m ledger import)
+        for table, df in data.items():
+            df.to_excel(os.path.join(args.out, os.path.basename(config.LEDGER_TABLES[table])), index=False)
+    for table, df in data.items():
+        print(f"{table}: {len(df):,} แถว")
+
+
+if __name__ == "__main__":
+    main()
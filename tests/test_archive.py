@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from ledger import tables
+from ledger.archive import ARCHIVE_TABLES, close_year, read_archive, year_projects
+from ledger.projects import PROJECT_KEY
+from tests.synthetic import populate
+
+YEAR = "2566"
+TODAY = pd.Timestamp("2026-10-01")
+
+
+@pytest.fixture(autouse=True)
+def data(store, ledger_data):
+    populate(store, ledger_data)
+
+
+def _totals():
+    return {table: tables.summary(table)["จำนวนเงิน"].sum() for table in ["income", "expense"]}
+
+
+def test_close_year_moves_rows(store):
+    codes = year_projects(YEAR, store)
+    expected = {table: int(store.read(table)[PROJECT_KEY].isin(codes).sum()) for table in ARCHIVE_TABLES}
+    before = _totals()
+    assert close_year(YEAR, store, today=TODAY) == {t: n for t, n in expected.items() if n}
+    for table in ARCHIVE_TABLES:
+        assert len(read_archive(table, [YEAR])) == expected[table]
+        assert not store.read(table)[PROJECT_KEY].isin(codes).any()
+    assert _totals() == pytest.approx(before)
+
+
+def test_close_year_rerun_after_partial_failure(store, monkeypatch):
+    # ล้มหลังเขียน archive ของ expense แต่ก่อนลบออกจากที่เก็บหลัก แล้วปิดปีซ้ำ: archive ต้องไม่มีแถวซ้ำ
+    codes = year_projects(YEAR, store)
+    expected = {table: int(store.read(table)[PROJECT_KEY].isin(codes).sum()) for table in ARCHIVE_TABLES}
+    before = _totals()
+    replace = store.replace
+
+    def failing(table, df):
+        if table == "expense":
+            raise OSError("disk full")
+        return replace(table, df)
+    monkeypatch.setattr(store, "replace", failing)
+    with pytest.raises(OSError):
+        close_year(YEAR, store, today=TODAY)
+    assert len(read_archive("expense", [YEAR])) == expected["expense"]
+    assert store.read("expense")[PROJECT_KEY].isin(codes).sum() == expected["expense"]
+
+    monkeypatch.setattr(store, "replace", replace)
+    moved = close_year(YEAR, store, today=TODAY)
+    assert moved["expense"] == expected["expense"]
+    for table in ARCHIVE_TABLES:
+        assert len(read_archive(table, [YEAR])) == expected[table]
+        assert not store.read(table)[PROJECT_KEY].isin(codes).any()
+    assert _totals() == pytest.approx(before)
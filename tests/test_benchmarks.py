@@ -0,0 +1,135 @@
+import pandas as pd
+import pytest
+
+from ledger import tables
+from ledger.reconcile import ACTUAL_EXPENSE, DISBURSEMENT_COLUMNS, disbursements, period_totals, reconcile
+from ledger.reserve import portfolio
+from ledger.search import SearchIndex
+from ledger.spend_codes import get_spend_index
+from ledger.summaries import budget_pivot
+from ledger.writer import append_rows, transaction
+
+# benchmark ของเส้นทางคำนวณของแต่ละหน้า บนข้อมูลจำลอง (tests/synthetic.py)
+# "cold" = เริ่มจาก cache ว่าง (ครั้งแรกหลังข้อมูลเปลี่ยน) ที่เหลือวัดเฉพาะการคำนวณบนตารางที่โหลดแล้ว
+LOADERS = {
+    "income": tables.income,
+    "expense": tables.expense,
+    "reserve": tables.reserve,
+    "reserve_refund": tables.reserve_refunds,
+    "ar": tables.ar_codes,
+}
+TODAY = pd.Timestamp("2026-10-01")
+
+
+def _cold(benchmark, func, rounds=5):
+    return benchmark.pedantic(func, setup=tables.clear, rounds=rounds, iterations=1)
+
+
+def _busiest_project(ledger):
+    return ledger["expense"]["รหัสโครงการวิจัย"].value_counts().index[0]
+
+
+# --- โหลดตาราง ---
+
+@pytest.mark.parametrize("table", sorted(LOADERS))
+def test_load_cold(benchmark, ledger, table):
+    df = _cold(benchmark, LOADERS[table])
+    assert len(df) == len(ledger[table])
+
+
+def test_load_all_concurrent(benchmark, ledger):
+    frames = _cold(benchmark, lambda: tables.load(*LOADERS.values()))
+    assert [len(df) for df in frames] == [len(ledger[t]) for t in LOADERS]
+
+
+def test_summary_cold(benchmark, ledger):
+    _cold(benchmark, lambda: tables.load(lambda: tables.summary("income"), lambda: tables.summary("expense")))
+
+
+# --- ค้นหา (หน้า 31-33) และหน้ากรอกข้อมูล (10/11) ---
+
+def test_search_index_build(benchmark, ledger):
+    benchmark(SearchIndex, tables.expense())
+
+
+@pytest.mark.parametrize("query", ["ARC001", "ค่าใช้จ่ายจริง 41", "^E2568"])
+def test_search_query(benchmark, ledger, query):
+    df = tables.expense()
+    index = SearchIndex(df)
+    benchmark(index.filter, df, query)
+
+
+def test_entry_project_lookup(benchmark, ledger):
+    # หน้า 10/11 พิมพ์รหัสโครงการ: ar_code ของโครงการ + รายละเอียดรหัสค่าใช้จ่ายทุกแถว
+    ar_index, spend_index = tables.ar_index(), get_spend_index()
+    code = _busiest_project(ledger)
+
+    def lookup():
+        return [spend_index.lookup_many(s for _, s in ar_index.rows(code, ar)) for ar in ar_index.ar_codes(code)]
+    assert benchmark(lookup)
+
+
+# --- หน้า 51 ---
+
+def test_page51_reconcile(benchmark, ledger):
+    income_summary, expend_summary = tables.summary("income"), tables.summary("expense")
+    code = _busiest_project(ledger)
+
+    def run():
+        merged = reconcile(income_summary, expend_summary, code)
+        return merged, period_totals(merged)
+    merged, _ = benchmark(run)
+    assert not merged.empty
+
+
+def test_page51_disbursements_cold(benchmark, ledger):
+    code = _busiest_project(ledger)
+
+    def run():
+        df = tables.query("expense", columns=["รหัสโครงการวิจัย", "ประเภทการจ่ายเงิน"] + DISBURSEMENT_COLUMNS,
+                          project=code, payment_type=ACTUAL_EXPENSE)
+        return disbursements(df, code, 1)
+    _cold(benchmark, run)
+
+
+# --- หน้า 52 ---
+
+def test_page52_portfolio(benchmark, ledger):
+    reserve_df, refund_df = tables.reserve(), tables.reserve_refunds()
+    result = benchmark(portfolio, reserve_df, refund_df, TODAY)
+    assert len(result) == len(ledger["reserve"])
+
+
+def test_page52_project_cold(benchmark, ledger):
+    code = ledger["reserve"]["รหัสโครงการวิจัย"].value_counts().index[0]
+    _cold(benchmark, lambda: tables.reserve_portfolio(TODAY, project=code))
+
+
+# --- หน้า 53 ---
+
+def test_page53_pivot(benchmark, ledger):
+    income_summary, expend_summary = tables.summary("income"), tables.summary("expense")
+    pivot = benchmark(budget_pivot, income_summary, expend_summary)
+    assert list(pivot.index) == ["จัดสรร", "เบิกจ่าย", "คงเหลือ"]
+
+
+# --- บันทึก (หน้า 10/11) ---
+
+def test_save_income_round(benchmark, ledger_copy):
+    # หน้า 10: ข้อมูลโครงการ + รายรับ 1 งวดของทุกรหัสในโครงการ ใน commit เดียว
+    code = _busiest_project(ledger_copy)
+    project, income = ledger_copy["project"], ledger_copy["income"]
+    project_row = project[project["รหัสโครงการวิจัย"] == code]
+    income_rows = income[(income["รหัสโครงการวิจัย"] == code) & (income["งวด"] == 1)]
+
+    def save():
+        with transaction() as tx:
+            tx.append("project", project_row)
+            tx.append("income", income_rows)
+    benchmark.pedantic(save, rounds=20, iterations=1)
+
+
+def test_save_expense(benchmark, ledger_copy):
+    # หน้า 11: รายจ่ายครั้งละไม่กี่แถว
+    rows = ledger_copy["expense"].head(5)
+    benchmark.pedantic(append_rows, args=("expense", rows), rounds=20, iterations=1)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from ledger import cache, config
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(config, "CACHE_MAX_BYTES", 3 * 10_000)
+    cache.clear()
+    cache.reset_stats()
+    yield
+    cache.clear()
+    cache.reset_stats()
+
+
+def _block():
+    return np.zeros(10_000, dtype=np.uint8)
+
+
+def test_version_change_rebuilds():
+    builds = []
+    for version in [1, 1, 2, 2]:
+        cache.cached(("t",), version, lambda: builds.append(version) or version)
+    assert builds == [1, 2]
+    row = cache.stats().set_index("key").loc["t"]
+    assert (row["hits"], row["misses"]) == (2, 2)
+
+
+def test_lru_eviction_counts_rebuilds():
+    for i in range(4):
+        cache.cached(("block", i), 0, _block)
+    used, budget, entries = cache.usage()
+    assert used <= budget and entries == 3
+    cache.cached(("block", 0), 0, _block)
+    stats = cache.stats().set_index("key")
+    assert stats.loc["block:0", "evictions"] == 1
+    assert stats.loc["block:0", "rebuilds"] == 1
+    # คืนล็อกของรายการที่ถูกทิ้ง
+    assert ("block", 0) in cache._locks and ("block", 1) not in cache._locks
+
+
+def test_stats_and_locks_stay_bounded(monkeypatch):
+    monkeypatch.setattr(cache, "STATS_LIMIT", 5)
+    for i in range(50):
+        cache.cached(("block", i), 0, _block)
+    assert len(cache._entries) == 3
+    assert len(cache._stats) <= 3 + 5
+    assert len(cache._locks) <= 3 + 5
+    # สถิติของรายการที่ยังอยู่ใน cache ไม่ถูกทิ้ง
+    assert all(key in cache._stats for key in cache._entries)
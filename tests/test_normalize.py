@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from ledger.normalize import normalize, problems, validate
+
+
+def test_normalize_cleans_text_and_codes():
+    df = pd.DataFrame({
+        "\ufeffรหัสโครงการวิจัย ": [" e2568_001", "E2568_002\ufeff"],
+        "ar_code": ["arc001", None],
+        "ประเภททุน": ["  ทุนภายใน ", "   "],
+        "จำนวนเงิน": [1000.0, 250.5],
+    })
+    result = normalize(df)
+    assert list(result.columns) == ["รหัสโครงการวิจัย", "ar_code", "ประเภททุน", "จำนวนเงิน"]
+    assert result["รหัสโครงการวิจัย"].tolist() == ["E2568_001", "E2568_002"]
+    assert result["ar_code"].iloc[0] == "ARC001"
+    assert pd.isna(result["ar_code"].iloc[1])
+    # ไม่ใช่คอลัมน์รหัส: ไม่เปลี่ยนตัวพิมพ์ ข้อความว่างเป็นค่าว่าง
+    assert result["ประเภททุน"].iloc[0] == "ทุนภายใน"
+    assert pd.isna(result["ประเภททุน"].iloc[1])
+    assert result["จำนวนเงิน"].tolist() == [1000.0, 250.5]
+    # ไม่แก้ df เดิม
+    assert df.columns[0] == "\ufeffรหัสโครงการวิจัย "
+
+
+def test_normalize_drops_derived_columns():
+    df = pd.DataFrame({"รหัสค่าใช้จ่าย": ["11001"], "หมวดรายจ่าย": ["งบบุคลากร"], "รายการ": ["x"], "ประเภทค่าใช้จ่าย": ["y"]})
+    assert list(normalize(df, "income").columns) == ["รหัสค่าใช้จ่าย"]
+    assert list(normalize(df, "ar").columns) == list(df.columns)
+
+
+@pytest.mark.parametrize("column, value", [
+    ("รหัสโครงการวิจัย", "E2568-01"),
+    ("รหัสโครงการวิจัย", "E2568_0011"),
+    ("รหัสสัญญา", "CHR01/2568"),
+    ("รหัสกิจกรรม", "123456789012"),
+])
+def test_validate_rejects_bad_codes(column, value):
+    df = normalize(pd.DataFrame({column: [value]}))
+    assert problems(df)
+    with pytest.raises(ValueError, match=column):
+        validate(df, "expense")
+
+
+def test_validate_accepts_good_codes():
+    df = normalize(pd.DataFrame({
+        "รหัสโครงการวิจัย": ["e2568_001"],
+        "รหัสสัญญา": ["chr001/2568"],
+        "รหัสกิจกรรม": ["1234567890123"],
+        "ar_code": [None],
+    }))
+    assert validate(df, "income") is df
@@ -0,0 +1,84 @@
+import glob
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import pandas as pd
+
+from ledger import config
+from ledger.archive import close_year, read_archive
+from ledger.projects import PROJECT_KEY
+from tests.synthetic import populate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _page(prefix):
+    return AppTest.from_file(glob.glob(os.path.join(ROOT, "pages", f"{prefix}*.py"))[0], default_timeout=60)
+
+
+def _errors(at):
+    return [e.value for e in at.exception]
+
+
+@pytest.fixture
+def no_income_project(store, ledger_data):
+    # โครงการที่อยู่ในทะเบียนและมีรายจ่ายแล้ว แต่ยังไม่มีรายรับ
+    code = "E2568_900"
+    store.append("project", ledger_data["project"].head(1).assign(**{PROJECT_KEY: code}))
+    store.append("expense", ledger_data["expense"].head(3).assign(**{PROJECT_KEY: code, "ประเภทการจ่ายเงิน": "ค่าใช้จ่ายจริง"}))
+    return code
+
+
+def test_page51_project_without_income(no_income_project):
+    at = _page("51 ").run()
+    at.selectbox[0].set_value(no_income_project).run()
+    assert not _errors(at)
+    assert any("รายรับรวมทั้งหมด: 0.00 บาท" in m.value and "(0.00%)" in m.value for m in at.markdown)
+
+
+def test_page51_empty_registry(store):
+    assert not _errors(_page("51 ").run())
+
+
+def test_page31_shows_project_fields(store, ledger_data):
+    # รายรับที่บันทึกหลังแยกทะเบียนโครงการ: หน้าตารางรายรับแสดงข้อมูลโครงการจากทะเบียน
+    project = ledger_data["project"].head(1)
+    code = project[PROJECT_KEY].iloc[0]
+    store.append("project", project)
+    store.append("income", ledger_data["income"].head(2).assign(**{PROJECT_KEY: code}).reindex(columns=config.DEFAULT_COLUMNS["income"]))
+    at = _page("31 ").run()
+    assert not _errors(at)
+    df = at.dataframe[0].value
+    assert df.columns.tolist()[:3] == ["วันที่กรอกข้อมูล", "ปีงบประมาณ", PROJECT_KEY]
+    assert df["รหัสสัญญา"].astype(str).tolist() == [str(project["รหัสสัญญา"].iloc[0])] * 2
+
+
+@pytest.fixture
+def closed_year(store, ledger_data):
+    populate(store, ledger_data)
+    close_year("2566", store, today=pd.Timestamp("2026-10-01"))
+    return "2566"
+
+
+@pytest.mark.parametrize("prefix, table", [("31 ", "income"), ("32 ", "expense"), ("33 ", "expense")])
+def test_table_pages_show_closed_year(closed_year, prefix, table):
+    # ปีที่ปิดแล้วไม่อยู่ในที่เก็บหลัก หน้าตารางเลือกอ่านจาก archive ได้
+    at = _page(prefix).run()
+    assert at.selectbox[0].options == ["ปีที่เปิดอยู่", closed_year]
+    at.selectbox[0].set_value(closed_year).run()
+    assert not _errors(at)
+    codes = set(read_archive(table, [closed_year])[PROJECT_KEY])
+    shown = at.dataframe[0].value
+    assert len(shown) and set(shown[PROJECT_KEY].astype(str)) <= codes
+
+
+def test_page52_closed_year_is_read_only(closed_year):
+    at = _page("52 ").run()
+    at.selectbox[0].set_value(closed_year).run()
+    assert not _errors(at)
+    codes = set(read_archive("reserve", [closed_year])[PROJECT_KEY])
+    assert at.selectbox[1].value in codes
+    assert len(at.dataframe[0].value)
+    assert not at.number_input
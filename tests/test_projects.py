@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from ledger.projects import PROJECT_KEY, registry, with_projects
+
+
+def test_registry_prefers_project_table_over_legacy_income_rows():
+    income = pd.DataFrame({PROJECT_KEY: ["E2568_001", "E2568_001", "E2568_002"], "รหัสสัญญา": ["CHR001/2568", "CHR009/2568", "CHR002/2568"]})
+    project = pd.DataFrame({PROJECT_KEY: ["E2568_002"], "รหัสสัญญา": ["CHR099/2568"]})
+    result = registry(project, income)
+    assert result.index.tolist() == ["E2568_001", "E2568_002"]
+    assert result["รหัสสัญญา"].tolist() == ["CHR001/2568", "CHR099/2568"]
+
+
+def test_registry_rejects_codes_that_collide_as_text():
+    # 2568 (ตัวเลข) กับ "2568" (ข้อความ) ต่างกันก่อนแปลง แต่เป็นรหัสเดียวกันในทะเบียน
+    project = pd.DataFrame({PROJECT_KEY: pd.Series([2568, "2568"], dtype=object), "รหัสสัญญา": ["a", "b"]})
+    with pytest.raises(ValueError, match="2568"):
+        registry(project)
+
+
+def test_with_projects_fills_project_fields_from_registry():
+    # แถวรายรับใหม่ไม่มีข้อมูลระดับโครงการ แถวเดิมที่มีค่าอยู่แล้วใช้ค่าของแถวนั้น
+    project = pd.DataFrame({PROJECT_KEY: ["E2568_001"], "ปีงบประมาณ": ["2568"], "รหัสสัญญา": ["CHR001/2568"]})
+    income = pd.DataFrame({
+        PROJECT_KEY: ["E2568_001", "E2568_001", "E2568_404"],
+        "รหัสสัญญา": [None, "CHR009/2568", None],
+        "จำนวนเงิน": [1.0, 2.0, 3.0],
+    })
+    result = with_projects(income, registry(project))
+    assert result.columns.tolist()[:3] == ["ปีงบประมาณ", PROJECT_KEY, "รหัสงบประมาณ"]
+    assert result["รหัสสัญญา"].tolist()[:2] == ["CHR001/2568", "CHR009/2568"]
+    assert result["รหัสสัญญา"].isna().tolist() == [False, False, True]
+    assert result["ปีงบประมาณ"].astype(object).tolist()[:2] == ["2568", "2568"]
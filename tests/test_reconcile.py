@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from ledger.reconcile import ACTUAL_EXPENSE, disbursements, period_totals, reconcile
+from ledger.summaries import summarize, totals
+
+CODE = "E2568_001"
+
+
+def _rows(rows):
+    return pd.DataFrame(rows, columns=["รหัสโครงการวิจัย", "ประเภททุน", "ประเภทการจ่ายเงิน", "งวด", "ar_code", "รหัสค่าใช้จ่าย", "จำนวนเงิน"])
+
+
+@pytest.fixture
+def summaries():
+    # รายรับ 2 แถวและรายจ่าย 3 แถวที่ key เดียวกัน (join แถวดิบจะได้ 6 แถว ยอดรายรับถูกนับซ้ำ 3 เท่า)
+    income = _rows([
+        (CODE, "ทุนภายใน", None, 1, "ARC001", "11001", 1000.0),
+        (CODE, "ทุนภายใน", None, 1, "ARC001", "11001", 500.0),
+        (CODE, "ทุนภายใน", None, 2, "ARC001", "11002", 800.0),
+        ("E2568_002", "ทุนภายใน", None, 1, "ARC001", "11001", 9999.0),
+    ])
+    expense = _rows([
+        (CODE, "ทุนภายใน", ACTUAL_EXPENSE, 1, "ARC001", "11001", 100.0),
+        (CODE, "ทุนภายใน", ACTUAL_EXPENSE, 1, "ARC001", "11001", 200.0),
+        (CODE, "ทุนภายใน", ACTUAL_EXPENSE, 1, "ARC001", "11001", 300.0),
+        (CODE, "ทุนภายใน", "เงินยืมทดรองจ่าย", 1, "ARC001", "11001", 5000.0),
+        (CODE, "ทุนภายใน", ACTUAL_EXPENSE, 3, "ARC002", "21001", 50.0),
+    ])
+    return summarize(income), summarize(expense)
+
+
+def test_reconcile_does_not_double_count(summaries):
+    income, expense = summaries
+    merged = reconcile(income, expense, CODE)
+    assert len(merged) == 3
+    assert merged["รายรับ"].sum() == 2300.0
+    assert merged["รายจ่าย"].sum() == 650.0
+    first = merged[(merged["งวด"] == 1) & (merged["รหัสค่าใช้จ่าย"] == "11001")].iloc[0]
+    assert (first["รายรับ"], first["รายจ่าย"], first["คงเหลือ"]) == (1500.0, 600.0, 900.0)
+    assert (first["จำนวนรายการรายรับ"], first["จำนวนรายการรายจ่าย"]) == (2, 3)
+
+
+def test_reconcile_keeps_unmatched_rows(summaries):
+    merged = reconcile(*summaries, CODE).set_index("งวด")
+    # งวด 2 มีแต่รายรับ งวด 3 มีแต่รายจ่าย
+    assert (merged.loc[2, "รายรับ"], merged.loc[2, "รายจ่าย"]) == (800.0, 0.0)
+    assert (merged.loc[3, "รายรับ"], merged.loc[3, "รายจ่าย"]) == (0.0, 50.0)
+
+
+def test_period_totals_match_summary_totals(summaries):
+    income, expense = summaries
+    by_period = period_totals(reconcile(income, expense, CODE))
+    assert by_period["รายรับ"].sum() == totals(income, where={"รหัสโครงการวิจัย": CODE})
+    assert by_period["รายจ่าย"].sum() == totals(expense, where={"รหัสโครงการวิจัย": CODE, "ประเภทการจ่ายเงิน": ACTUAL_EXPENSE})
+    assert totals(income, ["งวด"], {"รหัสโครงการวิจัย": CODE})["จำนวนเงิน"].tolist() == [1500.0, 800.0]
+
+
+def test_disbursements_filters_project_and_period():
+    df = _rows([
+        (CODE, "ทุนภายใน", ACTUAL_EXPENSE, 1, "ARC001", "11001", 100.0),
+        (CODE, "ทุนภายใน", ACTUAL_EXPENSE, 2, "ARC001", "11001", 200.0),
+        (CODE, "ทุนภายใน", "เงินยืมทดรองจ่าย", 1, "ARC001", "11001", 300.0),
+        ("E2568_002", "ทุนภายใน", ACTUAL_EXPENSE, 1, "ARC001", "11001", 400.0),
+    ])
+    assert disbursements(df, CODE)["จำนวนเงิน"].tolist() == [100.0, 200.0]
+    assert disbursements(df, CODE, period=2)["จำนวนเงิน"].tolist() == [200.0]
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from ledger.reserve import LOAN_KEYS, STATUS_CLOSED, STATUS_OPEN, portfolio, refund_event
+
+TODAY = pd.Timestamp("2025-06-01")
+
+
+def _loan(**values):
+    row = {
+        "รหัสโครงการวิจัย": "E2568_001", "ar_code": "ARC001", "รหัสค่าใช้จ่าย": "11001",
+        "วันที่ยืม": "2025-01-01", "จำนวนเงิน": "1,000", "วันที่ต้องคืน": "2025-12-31",
+    }
+    row.update(values)
+    return row
+
+
+def _refund(loan, amount, date="2025-02-01"):
+    return {**loan, "วันที่คืนเงิน": date, "เงินที่คืน": amount}
+
+
+def test_refunds_are_summed_per_loan():
+    loans = pd.DataFrame([_loan(), _loan(ar_code="ARC002")])
+    refunds = pd.DataFrame([_refund(_loan(), 300), _refund(_loan(), 700, "2025-03-01")])
+    result = portfolio(loans, refunds, TODAY).set_index("ar_code")
+    assert result.loc["ARC001", "เงินที่คืน"] == 1000
+    assert result.loc["ARC001", "คงเหลือ"] == 0
+    assert result.loc["ARC001", "สถานะ"] == STATUS_CLOSED
+    assert result.loc["ARC001", "วันที่คืนเงิน"] == pd.Timestamp("2025-03-01")
+    assert result.loc["ARC002", "คงเหลือ"] == 1000
+    assert result.loc["ARC002", "สถานะ"] == STATUS_OPEN
+
+
+def test_refund_matches_loan_when_dates_mix_date_and_datetime():
+    # ตาราง reserve มีทั้งวันที่ล้วนและวันที่มีเวลา ส่วนตารางคืนเงินมีแต่วันที่ล้วน
+    loans = pd.DataFrame([_loan(), _loan(ar_code="ARC002", วันที่ยืม="2025-01-05 10:30:00")])
+    refunds = pd.DataFrame([_refund(_loan(วันที่ยืม=pd.Timestamp("2025-01-01")), 400)])
+    result = portfolio(loans, refunds, TODAY).set_index("ar_code")
+    assert result.loc["ARC001", "เงินที่คืน"] == 400
+    assert result.loc["ARC001", "คงเหลือ"] == 600
+
+    refunds = pd.DataFrame([_refund(_loan(ar_code="ARC002", วันที่ยืม="2025-01-05T10:30:00"), 250)])
+    result = portfolio(loans, refunds, TODAY).set_index("ar_code")
+    assert result.loc["ARC002", "เงินที่คืน"] == 250
+
+
+def test_refund_event_round_trip():
+    loan = portfolio(pd.DataFrame([_loan()]), None, TODAY).iloc[0]
+    event = refund_event(loan, 1000, "2025-02-01")
+    assert list(event.columns[1:len(LOAN_KEYS) + 1]) == LOAN_KEYS
+    assert portfolio(pd.DataFrame([_loan()]), event, TODAY).iloc[0]["สถานะ"] == STATUS_CLOSED
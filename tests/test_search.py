@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from ledger.search import SearchIndex, normalize_text
+
+
+@pytest.mark.parametrize("typed, stored", [
+    ("ส\u0e4d\u0e32นักงาน", "สำนักงาน"),   # นิคหิต + สระอา -> สระอำ
+    ("ก\u0e48\u0e35", "ก\u0e35\u0e48"),      # วรรณยุกต์ก่อนสระบน -> สระก่อน
+    ("ค\u0e48\u0e48า", "ค่า"),               # วรรณยุกต์ซ้ำ
+    ("ค่า\u200bใช้จ่าย", "ค่าใช้จ่าย"),        # zero-width space
+    ("  ARC   001 ", "arc 001"),
+])
+def test_normalize_text(typed, stored):
+    assert normalize_text(typed) == normalize_text(stored)
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "รหัสโครงการวิจัย": ["E2568_001", "E2568_002", "E2567_001", None],
+        "รายการ": ["หมวดค่าตอบแทน", "สำนักงาน", "หมวดวัสดุ", "หมวดค่าใช้สอย"],
+        "วันที่": pd.to_datetime(["2025-07-09 13:55:44", "2025-07-10", "2024-01-02", None], format="mixed"),
+        "จำนวนเงิน": [10000.0, 1500.5, 100000.0, None],
+    })
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", [0, 1, 2, 3]),
+    ("หมวด", [0, 2, 3]),
+    ("ส\u0e4d\u0e32นักงาน", [1]),
+    ("e2568", [0, 1]),
+    ("^2568", []),                 # prefix ต้องตรงตั้งแต่ต้นช่อง
+    ("^e2567", [2]),
+    ("หมวด E2568", [0]),           # ทุกคำต้องพบในแถวเดียวกัน (AND)
+    ("หมวด ไม่มีคำนี้", []),
+    ("2025-07", [0, 1]),           # วันที่/ตัวเลข: ตรงเมื่อค่าขึ้นต้นด้วยคำค้น
+    ("2025-07-10", [1]),
+    ("10000", [0, 2]),
+    ("1500.5", [1]),
+    ("000", []),
+])
+def test_search(df, query, expected):
+    index = SearchIndex(df)
+    assert index.search(query).tolist() == expected
+    assert index.filter(df, query).index.tolist() == expected
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from ledger.spend_codes import DETAIL_COLUMNS
+from ledger.summaries import SUMMARY_KEYS, summarize
+
+BACKENDS = pytest.mark.parametrize("store", ["sqlite", "excel"], indirect=True)
+
+
+@pytest.fixture
+def rows(ledger_data):
+    return ledger_data["expense"].head(30).reset_index(drop=True)
+
+
+@BACKENDS
+def test_append_read_round_trip(store, rows):
+    store.append("expense", rows.head(10))
+    version = store.version("expense")
+    store.append("expense", rows.iloc[10:])
+    assert store.version("expense") != version
+    back = store.read("expense")
+    assert len(back) == len(rows)
+    assert back["รหัสโครงการวิจัย"].tolist() == rows["รหัสโครงการวิจัย"].tolist()
+    assert back["จำนวนเงิน"].astype(float).tolist() == pytest.approx(rows["จำนวนเงิน"].tolist())
+    assert pd.to_datetime(back["วันที่เบิกจ่าย"]).tolist() == pd.to_datetime(rows["วันที่เบิกจ่าย"]).tolist()
+    # ข้อความแบบ read_excel(dtype=str): จำนวนเต็มไม่มี .0
+    assert store.read("expense", dtype=str)["งวด"].tolist() == rows["งวด"].astype(str).tolist()
+
+
+@BACKENDS
+def test_append_normalizes_and_drops_derived_columns(store, rows):
+    messy = rows.head(2).assign(**{"ar_code": " arc001\ufeff", "รายการ": "หมวดวัสดุ"})
+    messy.columns = ["\ufeff" + messy.columns[0]] + list(messy.columns[1:])
+    store.append("expense", messy)
+    back = store.read("expense")
+    assert "วันที่กรอกข้อมูล" in back.columns
+    assert not set(DETAIL_COLUMNS) & set(back.columns)
+    assert back["ar_code"].tolist() == ["ARC001", "ARC001"]
+
+
+@BACKENDS
+def test_append_rejects_invalid_rows(store, rows):
+    store.append("expense", rows.head(2))
+    with pytest.raises(ValueError):
+        store.append("expense", rows.head(1).assign(**{"รหัสกิจกรรม": "123"}))
+    assert len(store.read("expense")) == 2
+
+
+@BACKENDS
+def test_query_filters_rows_and_columns(store, rows):
+    store.append("expense", rows)
+    code = rows["รหัสโครงการวิจัย"].iloc[0]
+    got = store.query("expense", columns=["รหัสโครงการวิจัย", "จำนวนเงิน"], where={"รหัสโครงการวิจัย": code})
+    assert list(got.columns) == ["รหัสโครงการวิจัย", "จำนวนเงิน"]
+    assert len(got) == (rows["รหัสโครงการวิจัย"] == code).sum()
+
+
+@BACKENDS
+def test_incremental_summary_matches_rebuild(store, ledger_data):
+    # ตารางสรุปที่บวกยอดทีละชุดตอนบันทึก ต้องเท่ากับการรวมยอดใหม่จากทุกแถว
+    for table in ["income", "expense"]:
+        rows = ledger_data[table].head(300)
+        for start in range(0, len(rows), 100):
+            store.append(table, rows.iloc[start:start + 100])
+        incremental = store.read_summary(table).sort_values(SUMMARY_KEYS, ignore_index=True)
+        rebuilt = summarize(store.read(table, dtype=str)).sort_values(SUMMARY_KEYS, ignore_index=True)
+        assert len(incremental) == len(rebuilt)
+        assert incremental[SUMMARY_KEYS].astype(str).equals(rebuilt[SUMMARY_KEYS].astype(str))
+        assert incremental["จำนวนเงิน"].astype(float).tolist() == pytest.approx(rebuilt["จำนวนเงิน"].tolist())
+        assert incremental["จำนวนรายการ"].astype(int).tolist() == rebuilt["จำนวนรายการ"].tolist()
@@ -0,0 +1,117 @@
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from ledger import read_table, writer
+from ledger.writer import WriteQueue, transaction
+
+
+@pytest.fixture
+def rows(ledger_data):
+    return ledger_data["expense"].head(50).reset_index(drop=True)
+
+
+def _queue(store, **kwargs):
+    return WriteQueue(store, lock_path=os.path.join(os.path.dirname(store.path), ".ledger.lock"), **kwargs)
+
+
+def test_concurrent_appends_keep_every_row(store, rows):
+    # N thread x M ครั้ง บันทึกพร้อมกันผ่านคิวเดียว ต้องได้ครบทุกแถว
+    threads, appends = 8, 10
+    errors = []
+
+    def worker(i):
+        try:
+            for j in range(appends):
+                writer.append_rows("expense", rows.iloc[[(i * appends + j) % len(rows)]])
+        except Exception as e:
+            errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    assert not errors
+    assert len(read_table("expense")) == threads * appends
+
+
+def test_failing_request_does_not_block_others(store, rows, monkeypatch):
+    # คำขอที่ validate ไม่ผ่านอยู่ในชุดเดียวกับคำขออื่น: commit รวมล้ม แล้วลองทีละคำขอ
+    calls = []
+    append_many = store.append_many
+    monkeypatch.setattr(store, "append_many", lambda batches: calls.append(batches) or append_many(batches))
+    queue = _queue(store, window=0.5)
+    bad = rows.iloc[[1]].assign(**{"รหัสโครงการวิจัย": "E2568-01"})
+    futures = [
+        queue.submit({"expense": rows.iloc[[0]]}),
+        queue.submit({"expense": bad}),
+        queue.submit({"expense": rows.iloc[[2, 3]]}),
+    ]
+    assert futures[0].result(10) == 1
+    with pytest.raises(ValueError):
+        futures[1].result(10)
+    assert futures[2].result(10) == 2
+    assert len(calls) == 4
+    assert len(read_table("expense")) == 3
+
+
+def _blocking(store, monkeypatch):
+    # commit แรกค้างจนกว่าจะ set release
+    started, release = threading.Event(), threading.Event()
+    append_many = store.append_many
+
+    def slow(batches):
+        started.set()
+        release.wait(10)
+        return append_many(batches)
+    monkeypatch.setattr(store, "append_many", slow)
+    return started, release
+
+
+def test_timeout_while_queued_is_never_committed(store, rows, monkeypatch):
+    started, release = _blocking(store, monkeypatch)
+    queue = _queue(store, window=0)
+    monkeypatch.setattr(writer, "_writer", queue)
+    first = queue.submit({"expense": rows.iloc[[0]]})
+    assert started.wait(10)
+    with pytest.raises(FutureTimeout):
+        writer.append_rows("expense", rows.iloc[[1]], timeout=0.1)
+    release.set()
+    assert first.result(10) == 1
+    assert writer.append_rows("expense", rows.iloc[[2]]) == 1
+    assert len(read_table("expense")) == 2
+
+
+def test_timeout_while_committing_waits_for_result(store, rows, monkeypatch):
+    _, release = _blocking(store, monkeypatch)
+    monkeypatch.setattr(writer, "_writer", _queue(store, window=0))
+    threading.Timer(0.6, release.set).start()
+    assert writer.append_rows("expense", rows.iloc[[0]], timeout=0.2) == 1
+    assert len(read_table("expense")) == 1
+
+
+def test_transaction_commits_all_tables(store, rows, ledger_data):
+    with transaction() as tx:
+        tx.append("expense", rows.head(3))
+        tx.append("reserve", ledger_data["reserve"].head(2))
+    assert len(read_table("expense")) == 3
+    assert len(read_table("reserve")) == 2
+
+
+def test_transaction_is_all_or_nothing(store, rows, ledger_data):
+    # ตารางหนึ่ง validate ไม่ผ่าน: ตารางอื่นใน transaction เดียวกันต้องไม่ถูกบันทึกด้วย
+    bad = ledger_data["reserve"].head(1).assign(**{"รหัสโครงการวิจัย": "E2568-01"})
+    with pytest.raises(ValueError):
+        with transaction() as tx:
+            tx.append("expense", rows.head(3))
+            tx.append("reserve", bad)
+    # ข้อผิดพลาดในบล็อก with: ไม่ส่งอะไรเข้าคิวเลย
+    with pytest.raises(RuntimeError):
+        with transaction() as tx:
+            tx.append("expense", rows.head(3))
+            raise RuntimeError("cancelled")
+    assert read_table("expense").empty
+    assert read_table("reserve").empty
@@ -0,0 +1,3 @@
+from ui.paged_table import paged_dataframe
+from ui.trace_panel import page_trace
+from ui.year_select import fiscal_year_select
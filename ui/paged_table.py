@@ -0,0 +1,47 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 200, 500]
+NO_SORT = "(ไม่เรียง)"
+
+
+def _sort_positions(series, ascending):
+    # คอลัมน์ที่เป็นตัวเลขทั้งหมด (แม้เก็บเป็นข้อความ) ให้เรียงแบบตัวเลข
+    values = series.reset_index(drop=True)
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().sum() == values.notna().sum():
+        values = numeric
+    return values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def paged_dataframe(df, key, page_sizes=PAGE_SIZES, style=None, **dataframe_kwargs):
+    # แสดงตารางทีละหน้า: เรียง/ตัดหน้าที่ฝั่ง server แล้วส่งไปแสดงเฉพาะแถวในหน้านั้น
+    # style: ฟังก์ชันรับ DataFrame (เฉพาะหน้าที่แสดง) คืน Styler
+    total = len(df)
+    col_sort, col_order, col_size, col_page = st.columns([3, 2, 2, 2])
+    with col_sort:
+        sort_col = st.selectbox("↕️ เรียงตาม", [NO_SORT] + [str(c) for c in df.columns], key=f"{key}_sort")
+    with col_order:
+        ascending = st.radio("ลำดับ", ["น้อย→มาก", "มาก→น้อย"], horizontal=True, key=f"{key}_order") == "น้อย→มาก"
+    with col_size:
+        page_size = st.selectbox("แถวต่อหน้า", page_sizes, key=f"{key}_size")
+
+    n_pages = max(math.ceil(total / page_size), 1)
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    with col_page:
+        page = st.number_input(f"หน้า (จาก {n_pages:,})", min_value=1, max_value=n_pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total)
+    if sort_col != NO_SORT and sort_col in df.columns:
+        view = df.iloc[_sort_positions(df[sort_col], ascending)[start:stop]]
+    else:
+        view = df.iloc[start:stop]
+
+    st.dataframe(style(view) if style else view, **dataframe_kwargs)
+    st.caption(f"แสดงแถวที่ {start + 1 if total else 0:,}–{stop:,} จากทั้งหมด {total:,} แถว")
+    return view
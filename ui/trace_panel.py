@@ -0,0 +1,54 @@
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from ledger import config, trace
+
+_STATE_KEY = "_page_trace"
+
+
+def debug_enabled():
+    return config.DEBUG_PANEL or st.query_params.get("debug") == "1"
+
+
+class PageTrace(trace.Trace):
+    # trace ของการรันหน้า 1 ครั้ง เมื่อ finish แสดงแผงเวลาใน sidebar (ถ้าเปิด debug)
+
+    def finish(self, status="ok"):
+        done = self.finished
+        super().finish(status)
+        if not done and status == "ok" and debug_enabled():
+            trace_panel(self)
+        return self
+
+
+def page_trace(page):
+    # เรียกตอนต้นสคริปต์ของหน้า แล้วแบ่งช่วงด้วย tr.phase("load"/"compute"/"render") และจบด้วย tr.finish()
+    # รอบก่อนหน้าที่ไม่ได้ finish (หน้าหยุดด้วย st.stop หรือ error) ถูกบันทึกเป็น status "stopped"
+    previous = st.session_state.get(_STATE_KEY)
+    if previous is not None and not previous.finished:
+        previous.finish("stopped")
+    ctx = get_script_run_ctx()
+    tr = trace.activate(PageTrace(page, ctx.session_id if ctx else None))
+    st.session_state[_STATE_KEY] = tr
+    return tr
+
+
+def trace_panel(tr):
+    # ตาราง span ของรอบนี้ เยื้องตามระดับการซ้อน พร้อมสัดส่วนจากเวลาทั้งหมด
+    total = tr.elapsed_ms or 0.0
+    rows = []
+    for record in tr.spans:
+        detail = ", ".join(f"{k}={v}" for k, v in record.items() if k not in ("name", "id", "parent", "depth", "start_ms", "ms"))
+        rows.append({
+            "span": "\u2003" * record["depth"] + record["name"] + (f" ({detail})" if detail else ""),
+            "ms": record["ms"],
+            "%": record["ms"] / total * 100 if total else 0.0,
+        })
+    with st.sidebar.expander(f"🐞 เวลาทำงาน {total:,.0f} ms", expanded=True):
+        st.caption(f"{tr.page} · บันทึกใน {config.TRACE_FILE or '(ปิดการบันทึก)'}")
+        st.dataframe(
+            pd.DataFrame(rows, columns=["span", "ms", "%"]).style.format({"ms": "{:,.1f}", "%": "{:.0f}%"}),
+            hide_index=True,
+            width="stretch",
+        )
@@ -0,0 +1,19 @@
+import streamlit as st
+
+from ledger import tables
+
+OPEN_YEARS = "ปีที่เปิดอยู่"
+
+
+def fiscal_year_select(table, key):
+    # ตัวเลือกปีงบประมาณของหน้าตาราง: ปีที่เปิดอยู่ (ที่เก็บหลัก) หรือปีที่ปิดแล้ว (archive ดู ledger.archive)
+    # คืน None = ปีที่เปิดอยู่ หรือปีที่เลือก ถ้ายังไม่เคยปิดปีไม่แสดงตัวเลือก
+    years = tables.closed_years(table)
+    if not years:
+        return None
+    choice = st.selectbox("📅 ปีงบประมาณ", [OPEN_YEARS] + years[::-1], key=key)
+    if choice == OPEN_YEARS:
+        st.caption(f"ปีงบประมาณที่ปิดแล้ว ({', '.join(years)}) เลือกดูได้จากช่องด้านบน")
+        return None
+    st.info(f"📦 แสดงข้อมูลปีงบประมาณ {choice} ที่ปิดแล้ว (อ่านจาก archive)")
+    return choice